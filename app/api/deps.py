@@ -0,0 +1,53 @@
+from fastapi import HTTPException, Request
+
+from app.services.analytics import AnalyticsService
+from app.services.category_index import CategoryIndex
+from app.services.live_feed import LiveFeed
+from app.services.transaction_store import TransactionStore
+from app.services.transaction_sync import TransactionSyncService
+from app.services.up_api_service import UpBankApiService
+from app.services.webhooks import WebhookProcessor
+
+
+def get_up_api_service(request: Request) -> UpBankApiService:
+    """Get the shared Up Bank API service created during application startup."""
+    return request.app.state.up_api_service
+
+
+def get_category_index(request: Request) -> CategoryIndex:
+    """Get the shared category tree index created during application startup."""
+    return request.app.state.category_index
+
+
+def get_transaction_store(request: Request) -> TransactionStore:
+    """Get the local transaction store, failing with 503 if it is disabled."""
+    store = request.app.state.transaction_store
+    if store is None:
+        raise HTTPException(status_code=503, detail="The local transaction store is disabled. Set STORE_PATH to enable it.")
+    return store
+
+
+def get_sync_service(request: Request) -> TransactionSyncService:
+    """Get the transaction sync service, failing with 503 if the store is disabled."""
+    sync_service = request.app.state.sync_service
+    if sync_service is None:
+        raise HTTPException(status_code=503, detail="The local transaction store is disabled. Set STORE_PATH to enable it.")
+    return sync_service
+
+
+def get_live_feed(request: Request) -> LiveFeed:
+    """Get the shared live transaction feed created during application startup."""
+    return request.app.state.live_feed
+
+
+def get_webhook_processor(request: Request) -> WebhookProcessor:
+    """Get the shared webhook processor created during application startup."""
+    return request.app.state.webhook_processor
+
+
+def get_analytics_service(request: Request) -> AnalyticsService:
+    """Get the analytics service, failing with 503 if the store is disabled."""
+    analytics_service = request.app.state.analytics_service
+    if analytics_service is None:
+        raise HTTPException(status_code=503, detail="The local transaction store is disabled. Set STORE_PATH to enable it.")
+    return analytics_service
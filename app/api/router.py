@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import accounts, categories, transactions
+from app.api.routes import accounts, analytics, categories, diagnostics, sync, transactions, webhooks
 
 # Create main router
 api_router = APIRouter()
@@ -8,4 +8,8 @@ api_router = APIRouter()
 # Include sub-routers
 api_router.include_router(accounts.router, prefix="/accounts", tags=["accounts"])
 api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
-api_router.include_router(categories.router, prefix="/categories", tags=["categories"]) 
\ No newline at end of file
+api_router.include_router(categories.router, prefix="/categories", tags=["categories"]) 
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
+api_router.include_router(diagnostics.router, prefix="/diagnostics", tags=["diagnostics"])
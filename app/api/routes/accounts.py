@@ -1,11 +1,15 @@
-from typing import Any
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Path, Query, Request
 
-from app.models.api_models import AccountFilterParams, ErrorResponse
-from app.models.up_models import AccountResponse, AccountsResponse
+from app.api.deps import get_up_api_service
+from app.core.config import settings
+from app.models.api_models import AccountFilterParams, AggregateAccountsResponse, ErrorResponse
+from app.models.up_models import Account, AccountResponse, AccountsResponse
+from app.services.fan_out import fan_out
 from app.services.up_api_service import UpBankApiService
-from app.utils.helpers import AccountType
+from app.utils.helpers import AccountType, get_configured_account_types
+from app.utils.serialization import model_response
 
 router = APIRouter()
 
@@ -18,11 +22,48 @@ router = APIRouter()
     description="Returns all accounts for the specified account type",
 )
 async def get_accounts(
+    request: Request,
     account_type: AccountType = Query(..., description="Account type to query"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    service: UpBankApiService = Depends(get_up_api_service),
 ) -> Any:
     """Get all accounts for the specified account type."""
-    return await service.get_accounts(account_type)
+    return model_response(
+        await service.get_accounts(account_type), request=request, max_age=settings.client_max_age_accounts
+    )
+
+
+@router.get(
+    "/all",
+    response_model=AggregateAccountsResponse,
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get accounts for every account type",
+    description="Queries every configured token concurrently and merges the accounts, reporting per-account-type failures",
+)
+async def get_all_accounts(
+    request: Request,
+    account_types: Optional[List[AccountType]] = Query(
+        None, alias="account_type", description="Account types to query; defaults to every configured token"
+    ),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get accounts for several account types in one call."""
+    results, errors = await fan_out(account_types or get_configured_account_types(), service.get_accounts)
+
+    data: List[Account] = []
+    sources: Dict[str, List[AccountType]] = {}
+    for account_type, response in results.items():
+        for account in response.data:
+            # Joint accounts are visible to more than one token
+            if account.id not in sources:
+                sources[account.id] = []
+                data.append(account)
+            sources[account.id].append(account_type)
+
+    return model_response(
+        AggregateAccountsResponse(data=data, sources=sources, errors=errors),
+        request=request,
+        max_age=settings.client_max_age_accounts,
+    )
 
 
 @router.get(
@@ -33,9 +74,13 @@ async def get_accounts(
     description="Returns a specific account by ID",
 )
 async def get_account(
+    request: Request,
     account_id: str = Path(..., description="Account ID"),
     account_type: AccountType = Query(..., description="Account type to query"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    service: UpBankApiService = Depends(get_up_api_service),
 ) -> Any:
     """Get a specific account by ID."""
-    return await service.get_account(account_type, account_id) 
\ No newline at end of file
+    return model_response(
+        await service.get_account(account_type, account_id), request=request, max_age=settings.client_max_age_accounts
+    )
+ 
\ No newline at end of file
@@ -0,0 +1,163 @@
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.api.deps import get_analytics_service, get_up_api_service
+from app.core.config import settings
+from app.models.api_models import (
+    BalanceHistoryResponse,
+    BalancePoint,
+    CategorySpend,
+    ErrorResponse,
+    MerchantSpend,
+    MonthSpend,
+    RunningBalanceResponse,
+    SpendByCategoryResponse,
+    SpendByMonthResponse,
+    TopMerchantsResponse,
+)
+from app.services.analytics import AnalyticsService
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+from app.utils.serialization import model_response
+
+router = APIRouter()
+
+RESPONSES = {400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+
+
+@router.get(
+    "/spend-by-category",
+    response_model=SpendByCategoryResponse,
+    responses=RESPONSES,
+    summary="Get spending by category",
+    description="Totals outgoing transactions per category over the locally synced history",
+)
+async def spend_by_category(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    since: Optional[datetime] = Query(None, description="Only include transactions since this date"),
+    until: Optional[datetime] = Query(None, description="Only include transactions before this date"),
+    account_id: Optional[str] = Query(None, description="Only include transactions for this account"),
+    parent: bool = Query(False, description="Group by parent category instead of category"),
+    analytics: AnalyticsService = Depends(get_analytics_service),
+) -> Any:
+    """Get spending per category."""
+    index = await analytics.get_index(account_type)
+    rows = index.spend_by_category(since, until, account_id, parent)
+    return model_response(SpendByCategoryResponse(data=[
+        CategorySpend(category_id=category_id, spent_base_units=spent, count=count)
+        for category_id, spent, count in rows
+    ]), request=request, max_age=settings.client_max_age_analytics)
+
+
+@router.get(
+    "/spend-by-month",
+    response_model=SpendByMonthResponse,
+    responses=RESPONSES,
+    summary="Get spending by month",
+    description="Totals spending and income per calendar month over the locally synced history",
+)
+async def spend_by_month(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    since: Optional[datetime] = Query(None, description="Only include transactions since this date"),
+    until: Optional[datetime] = Query(None, description="Only include transactions before this date"),
+    account_id: Optional[str] = Query(None, description="Only include transactions for this account"),
+    category: Optional[str] = Query(None, description="Only include transactions in this category"),
+    analytics: AnalyticsService = Depends(get_analytics_service),
+) -> Any:
+    """Get spending and income per month."""
+    index = await analytics.get_index(account_type)
+    rows = index.spend_by_month(since, until, account_id, category)
+    return model_response(SpendByMonthResponse(data=[
+        MonthSpend(month=month, spent_base_units=spent, received_base_units=received, count=count)
+        for month, spent, received, count in rows
+    ]), request=request, max_age=settings.client_max_age_analytics)
+
+
+@router.get(
+    "/top-merchants",
+    response_model=TopMerchantsResponse,
+    responses=RESPONSES,
+    summary="Get top merchants",
+    description="Returns the merchants with the most spending over the locally synced history",
+)
+async def top_merchants(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    since: Optional[datetime] = Query(None, description="Only include transactions since this date"),
+    until: Optional[datetime] = Query(None, description="Only include transactions before this date"),
+    account_id: Optional[str] = Query(None, description="Only include transactions for this account"),
+    limit: int = Query(10, ge=1, le=100, description="Number of merchants to return"),
+    analytics: AnalyticsService = Depends(get_analytics_service),
+) -> Any:
+    """Get the merchants with the most spending."""
+    index = await analytics.get_index(account_type)
+    rows = index.top_merchants(since, until, account_id, limit)
+    return model_response(TopMerchantsResponse(data=[
+        MerchantSpend(merchant=merchant, spent_base_units=spent, count=count)
+        for merchant, spent, count in rows
+    ]), request=request, max_age=settings.client_max_age_analytics)
+
+
+@router.get(
+    "/running-balance",
+    response_model=RunningBalanceResponse,
+    responses={**RESPONSES, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    summary="Get running balance",
+    description="Returns the end-of-day balance for each day with activity, walked back from the current balance",
+)
+async def running_balance(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    account_id: str = Query(..., description="Account to compute the balance for"),
+    since: Optional[datetime] = Query(None, description="Only include days from this date"),
+    until: Optional[datetime] = Query(None, description="Only include days before this date"),
+    analytics: AnalyticsService = Depends(get_analytics_service),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get the running end-of-day balance for an account."""
+    account = await service.get_account(account_type, account_id)
+    current_balance = account.data.attributes.balance["valueInBaseUnits"]
+    index = await analytics.get_index(account_type)
+    points = index.running_balance(account_id, current_balance, since, until)
+    return model_response(RunningBalanceResponse(
+        account_id=account_id,
+        data=[BalancePoint(date=date, balance_base_units=balance) for date, balance in points],
+    ), request=request, max_age=settings.client_max_age_analytics)
+
+
+@router.get(
+    "/balance-history",
+    response_model=BalanceHistoryResponse,
+    responses={**RESPONSES, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    summary="Get daily balance history",
+    description=(
+        "Returns the settled end-of-day balance for every day in the range from a stored daily series "
+        "that is updated incrementally as transactions are synced"
+    ),
+)
+async def balance_history(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    account_id: str = Query(..., description="Account to get the history for"),
+    since: Optional[date] = Query(None, description="First day to include; defaults to the first settled transaction"),
+    until: Optional[date] = Query(
+        None, description="Only include days before this date; defaults to the day after the last settled transaction"
+    ),
+    analytics: AnalyticsService = Depends(get_analytics_service),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get the daily settled balance history for an account."""
+    account = await service.get_account(account_type, account_id)
+    current_balance = account.data.attributes.balance["valueInBaseUnits"]
+    try:
+        points = await analytics.balance_history(account_type, account_id, current_balance, since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return model_response(BalanceHistoryResponse(
+        account_id=account_id,
+        data=[BalancePoint(date=day, balance_base_units=balance) for day, balance in points],
+    ), request=request, max_age=settings.client_max_age_analytics)
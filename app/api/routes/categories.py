@@ -1,29 +1,64 @@
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
 
-from app.models.api_models import CategoryParams, ErrorResponse
+from app.api.deps import get_category_index
+from app.core.config import settings
+from app.models.api_models import CategoryParams, CategoryTreeResponse, ErrorResponse
 from app.models.up_models import CategoriesResponse, CategoryResponse
-from app.services.up_api_service import UpBankApiService
-from app.utils.helpers import AccountType
+from app.services.category_index import CategoryIndex, CategoryTree
+from app.utils.helpers import AccountType, get_configured_account_types
+from app.utils.serialization import model_response
 
 router = APIRouter()
 
 
+async def _category_tree(index: CategoryIndex, account_type: AccountType) -> CategoryTree:
+    """Get the category tree, rejecting account types without a token even when the tree is already loaded."""
+    if account_type not in get_configured_account_types():
+        raise HTTPException(status_code=400, detail=f"API token for account type '{account_type.value}' is not configured")
+    return await index.tree(account_type)
+
+
 @router.get(
     "/",
     response_model=CategoriesResponse,
-    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
     summary="Get all categories",
-    description="Returns all categories with optional parent filter",
+    description="Returns all categories with optional parent filter, served from the category tree",
 )
 async def get_categories(
+    request: Request,
     account_type: AccountType = Query(..., description="Account type to query"),
     parent: Optional[str] = Query(None, description="Filter by parent category ID"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    index: CategoryIndex = Depends(get_category_index),
 ) -> Any:
     """Get all categories with optional parent filter."""
-    return await service.get_categories(account_type, parent)
+    tree = await _category_tree(index, account_type)
+    if parent is not None and tree.get(parent) is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return model_response(
+        CategoriesResponse(data=tree.categories(parent)), request=request, max_age=settings.client_max_age_categories
+    )
+
+
+@router.get(
+    "/tree",
+    response_model=CategoryTreeResponse,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get the category tree",
+    description="Returns every category in one response, top-level categories with their subcategories nested below",
+)
+async def get_category_tree(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    index: CategoryIndex = Depends(get_category_index),
+) -> Any:
+    """Get the whole category tree."""
+    tree = await _category_tree(index, account_type)
+    return model_response(
+        CategoryTreeResponse(data=tree.as_nested()), request=request, max_age=settings.client_max_age_categories
+    )
 
 
 @router.get(
@@ -31,12 +66,18 @@ async def get_categories(
     response_model=CategoryResponse,
     responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
     summary="Get category by ID",
-    description="Returns a specific category by ID",
+    description="Returns a specific category by ID, served from the category tree",
 )
 async def get_category(
+    request: Request,
     category_id: str = Path(..., description="Category ID"),
     account_type: AccountType = Query(..., description="Account type to query"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    index: CategoryIndex = Depends(get_category_index),
 ) -> Any:
     """Get a specific category by ID."""
-    return await service.get_category(account_type, category_id) 
\ No newline at end of file
+    node = (await _category_tree(index, account_type)).get(category_id)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return model_response(
+        CategoryResponse(data=node.category), request=request, max_age=settings.client_max_age_categories
+    )
@@ -0,0 +1,57 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_up_api_service
+from app.models.api_models import CacheStats, UpstreamStats
+from app.services.up_api_service import UpBankApiService
+
+router = APIRouter()
+
+
+@router.get(
+    "/cache",
+    response_model=CacheStats,
+    summary="Get cache statistics",
+    description="Returns hit, miss and size counters for the upstream response cache",
+)
+async def get_cache_stats(
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get response cache statistics."""
+    if service.cache is None:
+        return CacheStats(enabled=False)
+    return CacheStats(enabled=True, **service.cache.stats())
+
+
+@router.delete(
+    "/cache",
+    response_model=CacheStats,
+    summary="Clear the cache",
+    description="Drops every cached upstream response and returns the statistics beforehand",
+)
+async def clear_cache(
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Clear the response cache."""
+    if service.cache is None:
+        return CacheStats(enabled=False)
+    stats = CacheStats(enabled=True, **service.cache.stats())
+    service.cache.clear()
+    return stats
+
+
+@router.get(
+    "/upstream",
+    response_model=List[UpstreamStats],
+    summary="Get upstream scheduler statistics",
+    description="Returns queue depth, in-flight requests, retries and circuit breaker state for each token used so far",
+)
+async def get_upstream_stats(
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get upstream scheduler statistics per account type."""
+    return [
+        UpstreamStats(account_type=account_type, **scheduler.stats())
+        for account_type, scheduler in service.schedulers.items()
+    ]
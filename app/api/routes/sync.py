@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import get_sync_service
+from app.models.api_models import ErrorResponse, SyncResult, SyncStatus
+from app.services.transaction_sync import TransactionSyncService
+from app.utils.helpers import AccountType, get_configured_account_types
+
+router = APIRouter()
+
+
+def _from_timestamp(value: Any) -> Any:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+@router.get(
+    "/",
+    response_model=List[SyncStatus],
+    responses={503: {"model": ErrorResponse}},
+    summary="Get sync status",
+    description="Returns the local store sync state for every configured account type",
+)
+async def get_sync_status(
+    sync_service: TransactionSyncService = Depends(get_sync_service),
+) -> Any:
+    """Get the sync state for every configured account type."""
+    statuses = []
+    for account_type in get_configured_account_types():
+        state = await asyncio.to_thread(sync_service.store.get_sync_state, account_type)
+        statuses.append(SyncStatus(
+            account_type=account_type,
+            high_water_mark=_from_timestamp(state["high_water_mark"]),
+            last_synced_at=_from_timestamp(state["last_synced_at"]),
+            transaction_count=state["transaction_count"],
+        ))
+    return statuses
+
+
+@router.post(
+    "/",
+    response_model=SyncResult,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
+    summary="Sync transactions",
+    description="Pulls new and changed transactions from Up Bank into the local store",
+)
+async def sync_transactions(
+    account_type: AccountType = Query(..., description="Account type to sync"),
+    sync_service: TransactionSyncService = Depends(get_sync_service),
+) -> Any:
+    """Run an incremental sync for the specified account type."""
+    result = await sync_service.sync_account_type(account_type)
+    return SyncResult(account_type=account_type, **result)
+
+
+@router.post(
+    "/backfill",
+    response_model=SyncResult,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
+    summary="Backfill transactions",
+    description="Pulls every transaction in a date range into the local store, walking date shards concurrently",
+)
+async def backfill_transactions(
+    account_type: AccountType = Query(..., description="Account type to backfill"),
+    since: Optional[datetime] = Query(None, description="Start of the range; defaults to when the oldest account was opened"),
+    until: Optional[datetime] = Query(None, description="End of the range; defaults to now"),
+    sync_service: TransactionSyncService = Depends(get_sync_service),
+) -> Any:
+    """Backfill a date range of transactions for the specified account type."""
+    result = await sync_service.backfill(account_type, since, until)
+    return SyncResult(account_type=account_type, **result)
@@ -1,35 +1,194 @@
+import asyncio
+import heapq
+import logging
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
 
-from app.models.api_models import ErrorResponse, TransactionFilterParams
-from app.models.up_models import TransactionResponse, TransactionsResponse
+from app.api.deps import get_category_index, get_live_feed, get_transaction_store, get_up_api_service
+from app.core.config import settings
+from app.models.api_models import (
+    AggregateTransactionsResponse,
+    ErrorResponse,
+    ExportFormat,
+    LocalTransactionFilters,
+    TransactionBatchRequest,
+    TransactionBatchResponse,
+    TransactionError,
+    TransactionExpansion,
+    TransactionFilterParams,
+    TransactionFormat,
+    TransactionSort,
+    TransactionSource,
+)
+from app.models.up_models import Transaction, TransactionResponse, TransactionsResponse
+from app.services import export
+from app.services.fan_out import fan_out, fetch_many
+from app.services.live_feed import LiveFeed, Subscriber, TokenFeed
 from app.services.up_api_service import UpBankApiService
-from app.utils.helpers import AccountType
+from app.utils.fieldsets import TransactionFieldset, expand_categories, with_category_name
+from app.utils.helpers import AccountType, get_configured_account_types
+from app.utils.serialization import json_dumps, json_response, model_response
+
+logger = logging.getLogger("up_bank_api")
 
 router = APIRouter()
 
+SOURCE_DESCRIPTION = "Read from the Up Bank API or from the locally synced store"
+# How long an EventSource waits before reconnecting
+LIVE_RETRY_MS = 3000
+LOCAL_ONLY_DETAIL = "The search, amount_min, amount_max, foreign, round_up and sort parameters require source=local"
+
+
+def local_filters(
+    search: Optional[str] = Query(None, description="Words the description or raw text must contain (prefix match; source=local)"),
+    amount_min: Optional[int] = Query(None, description="Minimum amount in base units, spending is negative (source=local)"),
+    amount_max: Optional[int] = Query(None, description="Maximum amount in base units, spending is negative (source=local)"),
+    foreign: Optional[bool] = Query(None, description="Only transactions with or without a foreign amount (source=local)"),
+    round_up: Optional[bool] = Query(None, description="Only transactions with or without a round-up (source=local)"),
+    sort: TransactionSort = Query(TransactionSort.NEWEST, description="Sort order (source=local)"),
+) -> LocalTransactionFilters:
+    """Collect the filters only the local store supports from the query string."""
+    return LocalTransactionFilters(
+        search=search, amount_min=amount_min, amount_max=amount_max, foreign=foreign, round_up=round_up, sort=sort
+    )
+
+
+def transaction_fieldset(
+    fields: Optional[str] = Query(
+        None,
+        alias="fields[transactions]",
+        description="Comma-separated attributes and relationships to return (flat columns with format=flat)",
+    ),
+    format: TransactionFormat = Query(
+        TransactionFormat.JSONAPI, description="jsonapi for Up's resources, flat for one flat object per transaction"
+    ),
+) -> Optional[TransactionFieldset]:
+    """Collect the requested response shape from the query string; None returns full resources."""
+    try:
+        return TransactionFieldset.parse(fields, flat=format == TransactionFormat.FLAT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def expanded_category_names(
+    request: Request,
+    expand: Optional[TransactionExpansion] = Query(
+        None, description="category inlines category and parent category names from the category tree"
+    ),
+) -> Optional[Dict[str, str]]:
+    """Look up category names in the category tree when ``expand=category`` is requested."""
+    if expand != TransactionExpansion.CATEGORY:
+        return None
+    try:
+        return (await get_category_index(request).tree()).names
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _expand_models(transactions: Iterable[Transaction], category_names: Optional[Dict[str, str]]) -> None:
+    """Inline category names into validated transactions for ``expand=category``."""
+    if category_names is None:
+        return
+    for txn in transactions:
+        txn.relationships.category = with_category_name(txn.relationships.category, category_names)
+        txn.relationships.parent_category = with_category_name(txn.relationships.parent_category, category_names)
+
+
+async def _local_transactions(
+    request: Request,
+    account_type: AccountType,
+    account_id: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    category: Optional[str],
+    status: Optional[str],
+    tag: Optional[str],
+    page_size: int,
+    page_cursor: Optional[str],
+    filters: LocalTransactionFilters,
+    fieldset: Optional[TransactionFieldset] = None,
+    category_names: Optional[Dict[str, str]] = None,
+) -> Any:
+    """Serve a page of transactions from the local store."""
+    store = get_transaction_store(request)
+    try:
+        rows, next_cursor = await asyncio.to_thread(
+            store.query_transactions,
+            account_type,
+            account_id=account_id,
+            since=since,
+            until=until,
+            category=category,
+            status=status,
+            page_size=page_size,
+            page_cursor=page_cursor,
+            search=filters.search,
+            amount_min=filters.amount_min,
+            amount_max=filters.amount_max,
+            foreign=filters.foreign,
+            round_up=filters.round_up,
+            tag=tag,
+            sort=filters.sort.value,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    next_url = str(request.url.include_query_params(page_cursor=next_cursor)) if next_cursor else None
+    if fieldset is not None:
+        return json_response(
+            {"data": fieldset.project_all(rows, category_names), "links": {"prev": None, "next": next_url}},
+            request=request,
+            max_age=settings.client_max_age_transactions,
+        )
+    response = TransactionsResponse.model_validate({"data": rows, "links": {"prev": None, "next": next_url}})
+    _expand_models(response.data, category_names)
+    return model_response(response, request=request, max_age=settings.client_max_age_transactions)
+
 
 @router.get(
     "/",
     response_model=TransactionsResponse,
-    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
     summary="Get all transactions",
     description="Returns all transactions with optional filtering",
 )
 async def get_transactions(
+    request: Request,
     account_type: AccountType = Query(..., description="Account type to query"),
     since: Optional[datetime] = Query(None, description="Filter transactions since this date"),
     until: Optional[datetime] = Query(None, description="Filter transactions until this date"),
     category: Optional[str] = Query(None, description="Filter by category ID"),
     status: Optional[str] = Query(None, description="Filter by transaction status"),
+    tag: Optional[str] = Query(None, description="Filter by tag ID"),
     page_size: int = Query(20, description="Number of items per page"),
     page_cursor: Optional[str] = Query(None, description="Cursor for pagination"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    source: TransactionSource = Query(TransactionSource.UPSTREAM, description=SOURCE_DESCRIPTION),
+    filters: LocalTransactionFilters = Depends(local_filters),
+    fieldset: Optional[TransactionFieldset] = Depends(transaction_fieldset),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
 ) -> Any:
     """Get all transactions with optional filtering."""
-    return await service.get_transactions(
+    if source == TransactionSource.LOCAL:
+        return await _local_transactions(
+            request, account_type, None, since, until, category, status, tag, page_size, page_cursor, filters,
+            fieldset, category_names,
+        )
+    if not filters.is_empty():
+        raise HTTPException(status_code=400, detail=LOCAL_ONLY_DETAIL)
+    if fieldset is not None:
+        page = await service.get_raw_transactions(
+            account_type, None, since, until, category, status, page_size, page_cursor, tag
+        )
+        return json_response(
+            {"data": fieldset.project_all(page.get("data") or [], category_names), "links": page.get("links")},
+            request=request,
+            max_age=settings.client_max_age_transactions,
+        )
+    response = await service.get_transactions(
         account_type=account_type,
         since=since,
         until=until,
@@ -37,45 +196,388 @@ async def get_transactions(
         status=status,
         page_size=page_size,
         page_cursor=page_cursor,
+        tag=tag,
+    )
+    _expand_models(response.data, category_names)
+    return model_response(response, request=request, max_age=settings.client_max_age_transactions)
+
+
+@router.get(
+    "/all",
+    response_model=AggregateTransactionsResponse,
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get transactions for every account type",
+    description="Queries every configured token concurrently and merges one page from each, newest first",
+)
+async def get_all_transactions(
+    request: Request,
+    account_types: Optional[List[AccountType]] = Query(
+        None, alias="account_type", description="Account types to query; defaults to every configured token"
+    ),
+    since: Optional[datetime] = Query(None, description="Filter transactions since this date"),
+    until: Optional[datetime] = Query(None, description="Filter transactions until this date"),
+    category: Optional[str] = Query(None, description="Filter by category ID"),
+    status: Optional[str] = Query(None, description="Filter by transaction status"),
+    page_size: int = Query(20, description="Number of items per page for each account type"),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get one merged page of transactions across several account types."""
+    async def fetch(account_type: AccountType) -> TransactionsResponse:
+        return await service.get_transactions(
+            account_type=account_type,
+            since=since,
+            until=until,
+            category=category,
+            status=status,
+            page_size=page_size,
+        )
+
+    results, errors = await fan_out(account_types or get_configured_account_types(), fetch)
+
+    # Each page is already newest first, so a k-way merge keeps the order without a full sort
+    merged = heapq.merge(
+        *([(account_type, txn) for txn in response.data] for account_type, response in results.items()),
+        key=lambda item: item[1].attributes.created_at,
+        reverse=True,
+    )
+    data: List[Transaction] = []
+    sources: Dict[str, List[AccountType]] = {}
+    for account_type, txn in merged:
+        # Transactions on a joint account are returned to every token that can see it
+        if txn.id not in sources:
+            sources[txn.id] = []
+            data.append(txn)
+        sources[txn.id].append(account_type)
+
+    _expand_models(data, category_names)
+    links = {account_type: (response.links or {}).get("next") for account_type, response in results.items()}
+    return model_response(
+        AggregateTransactionsResponse(data=data, sources=sources, links=links, errors=errors),
+        request=request,
+        max_age=settings.client_max_age_transactions,
+    )
+
+
+async def _ndjson_lines(
+    first_page: Dict[str, Any],
+    pages: AsyncIterator[Dict[str, Any]],
+    fieldset: Optional[TransactionFieldset] = None,
+    category_names: Optional[Dict[str, str]] = None,
+) -> AsyncIterator[bytes]:
+    """Encode every transaction in a page stream as one JSON document per line."""
+    try:
+        page: Optional[Dict[str, Any]] = first_page
+        while page is not None:
+            transactions = page.get("data") or []
+            if fieldset is not None:
+                transactions = fieldset.project_all(transactions, category_names)
+            elif category_names is not None:
+                transactions = [expand_categories(txn, category_names) for txn in transactions]
+            yield b"".join(json_dumps(txn) + b"\n" for txn in transactions)
+            page = await anext(pages, None)
+    except HTTPException as e:
+        # The status line has already been sent, so report the failure in-band
+        logger.error(f"Transaction stream aborted: {e.status_code} - {e.detail}")
+        yield json_dumps({"errors": [{"status": str(e.status_code), "detail": e.detail}]}) + b"\n"
+    finally:
+        await pages.aclose()
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One transaction resource per line"},
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+    summary="Stream all transactions",
+    description="Follows Up's pagination server-side and streams every matching transaction as newline-delimited JSON",
+)
+async def stream_transactions(
+    account_type: AccountType = Query(..., description="Account type to query"),
+    account_id: Optional[str] = Query(None, description="Only stream transactions for this account"),
+    since: Optional[datetime] = Query(None, description="Filter transactions since this date"),
+    until: Optional[datetime] = Query(None, description="Filter transactions until this date"),
+    category: Optional[str] = Query(None, description="Filter by category ID"),
+    status: Optional[str] = Query(None, description="Filter by transaction status"),
+    page_size: int = Query(100, ge=1, le=100, description="Number of items per upstream page"),
+    fieldset: Optional[TransactionFieldset] = Depends(transaction_fieldset),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Stream every matching transaction as NDJSON."""
+    pages = service.iter_transaction_pages(
+        account_type,
+        account_id=account_id,
+        since=since,
+        until=until,
+        category=category,
+        status=status,
+        page_size=page_size,
+        prefetch=True,
+    )
+    # Fetch the first page before responding so auth and filter errors keep their status code
+    try:
+        first_page = await anext(pages)
+    except BaseException:
+        await pages.aclose()
+        raise
+    return StreamingResponse(
+        _ndjson_lines(first_page, pages, fieldset, category_names), media_type="application/x-ndjson"
+    )
+
+
+async def _sse_events(feed: TokenFeed, subscriber: Subscriber) -> AsyncIterator[bytes]:
+    """Encode a subscriber's events as Server-Sent Events until it disconnects or falls behind."""
+    try:
+        # Sent straight away so the response starts before the first event
+        yield b"retry: %d\n\n" % LIVE_RETRY_MS
+        if subscriber.reset:
+            yield b"event: reset\ndata: {}\n\n"
+        if subscriber.backlog:
+            yield b"".join(event.encode() for event in subscriber.backlog)
+            subscriber.backlog = []
+        while True:
+            if subscriber.lagged and subscriber.queue.empty():
+                # The client reconnects with Last-Event-ID and resumes from the feed's history
+                yield b"event: lagged\ndata: {}\n\n"
+                return
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), settings.live_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            chunks = [event.encode()]
+            while not subscriber.queue.empty():
+                chunks.append(subscriber.queue.get_nowait().encode())
+            yield b"".join(chunks)
+    finally:
+        feed.unsubscribe(subscriber)
+
+
+@router.get(
+    "/live",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events, one per transaction change"},
+        400: {"model": ErrorResponse},
+    },
+    summary="Live transaction feed",
+    description=(
+        "Streams created, settled, updated and deleted transactions as Server-Sent Events. One shared poller "
+        "(and any verified webhook deliveries) feeds every connected client, and reconnecting with "
+        "Last-Event-ID replays missed events"
+    ),
+)
+async def live_transactions(
+    account_type: AccountType = Query(..., description="Account type to follow"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID", description="Resume after this event"),
+    live_feed: LiveFeed = Depends(get_live_feed),
+) -> Any:
+    """Stream transaction changes for the specified account type."""
+    if account_type not in get_configured_account_types():
+        raise HTTPException(status_code=400, detail=f"API token for account type '{account_type.value}' is not configured")
+    feed = live_feed.feed(account_type)
+    subscriber = feed.subscribe(last_event_id)
+    return StreamingResponse(
+        _sse_events(feed, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in export.MEDIA_TYPES.values()},
+            "description": "A flat file with one row per transaction",
+        },
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+    summary="Export transactions",
+    description=(
+        "Streams matching transactions as a flat CSV, Parquet or Arrow IPC file: ids, amounts in base units, "
+        "currency, category, parent category, status, timestamps and tags. Parquet and Arrow need pyarrow"
+    ),
+)
+async def export_transactions(
+    request: Request,
+    account_type: AccountType = Query(..., description="Account type to export"),
+    format: ExportFormat = Query(ExportFormat.CSV, description="File format"),
+    account_id: Optional[str] = Query(None, description="Only export transactions for this account"),
+    since: Optional[datetime] = Query(None, description="Only export transactions created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only export transactions created before this time"),
+    source: TransactionSource = Query(TransactionSource.UPSTREAM, description=SOURCE_DESCRIPTION),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Export transactions for the specified account type as a file."""
+    encoder = export.create_encoder(format)
+    if source == TransactionSource.LOCAL:
+        pages = export.local_pages(get_transaction_store(request), account_type, account_id, since, until)
+    else:
+        pages = export.upstream_pages(service, account_type, account_id, since, until)
+    try:
+        pages = await export.started(pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"transactions-{account_type.value}.{export.FILE_EXTENSIONS[format]}"
+    return StreamingResponse(
+        export.encode_export(pages, format, encoder=encoder),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=TransactionBatchResponse,
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get transactions by ID",
+    description="Looks up many transactions in one call, reporting per-transaction failures",
+)
+async def get_transactions_batch(
+    request: Request,
+    batch: TransactionBatchRequest,
+    account_type: AccountType = Query(..., description="Account type to query"),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """
+    Look up transactions by ID.
+
+    Settled transactions in the local store are served from it; the rest are
+    fetched from Up Bank concurrently (through the response cache), at most
+    ``BATCH_MAX_CONCURRENCY`` at a time.
+    """
+    transaction_ids = list(dict.fromkeys(batch.ids))
+    if len(transaction_ids) > settings.batch_max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_ids} transaction IDs can be looked up at once")
+
+    found: Dict[str, Transaction] = {}
+    sources: Dict[str, TransactionSource] = {}
+    store = request.app.state.transaction_store
+    if store is not None:
+        stored = await asyncio.to_thread(store.get_settled_transactions, account_type, transaction_ids)
+        for transaction_id, payload in stored.items():
+            found[transaction_id] = Transaction.model_validate(payload)
+            sources[transaction_id] = TransactionSource.LOCAL
+
+    async def fetch(transaction_id: str) -> Transaction:
+        return (await service.get_transaction(account_type, transaction_id)).data
+
+    fetched, failures = await fetch_many(
+        [transaction_id for transaction_id in transaction_ids if transaction_id not in found],
+        fetch,
+        settings.batch_max_concurrency,
+    )
+    for transaction_id, transaction in fetched.items():
+        found[transaction_id] = transaction
+        sources[transaction_id] = TransactionSource.UPSTREAM
+
+    _expand_models(found.values(), category_names)
+    return model_response(TransactionBatchResponse(
+        data=[found[transaction_id] for transaction_id in transaction_ids if transaction_id in found],
+        sources=sources,
+        errors=[
+            TransactionError(id=transaction_id, status_code=status_code, detail=detail)
+            for transaction_id, (status_code, detail) in failures.items()
+        ],
+    ))
+
+
 @router.get(
     "/{transaction_id}",
     response_model=TransactionResponse,
-    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
     summary="Get transaction by ID",
     description="Returns a specific transaction by ID",
 )
 async def get_transaction(
+    request: Request,
     transaction_id: str = Path(..., description="Transaction ID"),
     account_type: AccountType = Query(..., description="Account type to query"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    source: TransactionSource = Query(TransactionSource.UPSTREAM, description=SOURCE_DESCRIPTION),
+    fieldset: Optional[TransactionFieldset] = Depends(transaction_fieldset),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
 ) -> Any:
     """Get a specific transaction by ID."""
-    return await service.get_transaction(account_type, transaction_id)
+    if source == TransactionSource.LOCAL:
+        store = get_transaction_store(request)
+        transaction = await asyncio.to_thread(store.get_transaction, account_type, transaction_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found in the local store")
+        if fieldset is not None:
+            return json_response(
+                {"data": fieldset.project(transaction, category_names)},
+                request=request,
+                max_age=settings.client_max_age_transactions,
+            )
+        response = TransactionResponse.model_validate({"data": transaction})
+        _expand_models([response.data], category_names)
+        return model_response(response, request=request, max_age=settings.client_max_age_transactions)
+    if fieldset is not None:
+        transaction = (await service.get_raw_transaction(account_type, transaction_id))["data"]
+        return json_response(
+            {"data": fieldset.project(transaction, category_names)},
+            request=request,
+            max_age=settings.client_max_age_transactions,
+        )
+    response = await service.get_transaction(account_type, transaction_id)
+    _expand_models([response.data], category_names)
+    return model_response(response, request=request, max_age=settings.client_max_age_transactions)
 
 
 @router.get(
     "/account/{account_id}",
     response_model=TransactionsResponse,
-    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
     summary="Get transactions for account",
     description="Returns transactions for a specific account with optional filtering",
 )
 async def get_account_transactions(
+    request: Request,
     account_id: str = Path(..., description="Account ID"),
     account_type: AccountType = Query(..., description="Account type to query"),
     since: Optional[datetime] = Query(None, description="Filter transactions since this date"),
     until: Optional[datetime] = Query(None, description="Filter transactions until this date"),
     category: Optional[str] = Query(None, description="Filter by category ID"),
     status: Optional[str] = Query(None, description="Filter by transaction status"),
+    tag: Optional[str] = Query(None, description="Filter by tag ID"),
     page_size: int = Query(20, description="Number of items per page"),
     page_cursor: Optional[str] = Query(None, description="Cursor for pagination"),
-    service: UpBankApiService = Depends(lambda: UpBankApiService()),
+    source: TransactionSource = Query(TransactionSource.UPSTREAM, description=SOURCE_DESCRIPTION),
+    filters: LocalTransactionFilters = Depends(local_filters),
+    fieldset: Optional[TransactionFieldset] = Depends(transaction_fieldset),
+    category_names: Optional[Dict[str, str]] = Depends(expanded_category_names),
+    service: UpBankApiService = Depends(get_up_api_service),
 ) -> Any:
     """Get transactions for a specific account."""
-    return await service.get_account_transactions(
+    if source == TransactionSource.LOCAL:
+        return await _local_transactions(
+            request, account_type, account_id, since, until, category, status, tag, page_size, page_cursor, filters,
+            fieldset, category_names,
+        )
+    if not filters.is_empty():
+        raise HTTPException(status_code=400, detail=LOCAL_ONLY_DETAIL)
+    if fieldset is not None:
+        page = await service.get_raw_transactions(
+            account_type, account_id, since, until, category, status, page_size, page_cursor, tag
+        )
+        return json_response(
+            {"data": fieldset.project_all(page.get("data") or [], category_names), "links": page.get("links")},
+            request=request,
+            max_age=settings.client_max_age_transactions,
+        )
+    response = await service.get_account_transactions(
         account_type=account_type,
         account_id=account_id,
         since=since,
@@ -84,4 +586,7 @@ async def get_account_transactions(
         status=status,
         page_size=page_size,
         page_cursor=page_cursor,
-    ) 
\ No newline at end of file
+        tag=tag,
+    )
+    _expand_models(response.data, category_names)
+    return model_response(response, request=request, max_age=settings.client_max_age_transactions)
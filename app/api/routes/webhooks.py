@@ -0,0 +1,154 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Path, Query, Request, Response
+from pydantic import ValidationError
+
+from app.api.deps import get_up_api_service, get_webhook_processor
+from app.models.api_models import ErrorResponse, WebhookCreateRequest, WebhookDeliveryResult
+from app.models.up_models import WebhookEvent, WebhookEventResponse, WebhookResponse, WebhooksResponse
+from app.services.up_api_service import UpBankApiService
+from app.services.webhooks import WebhookProcessor
+from app.utils.helpers import AccountType
+
+router = APIRouter()
+
+
+@router.post(
+    "/up",
+    response_model=WebhookDeliveryResult,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Receive an Up Bank webhook event",
+    description="Endpoint to register with Up Bank. Verifies the signature and applies the event to the cache and local store",
+)
+async def receive_webhook(
+    request: Request,
+    signature: Optional[str] = Header(None, alias="X-Up-Authenticity-Signature"),
+    processor: WebhookProcessor = Depends(get_webhook_processor),
+) -> Any:
+    """Receive a webhook event delivered by Up Bank."""
+    # The signature covers the exact bytes Up sent, so read the raw body
+    body = await request.body()
+    try:
+        payload = json.loads(body)
+        webhook_id = payload["data"]["relationships"]["webhook"]["data"]["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Malformed webhook event")
+
+    account_type = await processor.verify(body, signature, webhook_id)
+    try:
+        event = WebhookEvent.model_validate(payload["data"])
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Malformed webhook event")
+
+    transaction_id, action = await processor.handle_event(account_type, event)
+    return WebhookDeliveryResult(
+        event_type=event.attributes.event_type.value,
+        account_type=account_type,
+        transaction_id=transaction_id,
+        action=action,
+    )
+
+
+@router.get(
+    "/",
+    response_model=WebhooksResponse,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get all webhooks",
+    description="Returns the webhooks registered with Up Bank for the specified account type",
+)
+async def get_webhooks(
+    account_type: AccountType = Query(..., description="Account type to query"),
+    page_size: int = Query(20, description="Number of items per page"),
+    page_cursor: Optional[str] = Query(None, description="Cursor for pagination"),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get all webhooks for the specified account type."""
+    return await service.get_webhooks(account_type, page_size, page_cursor)
+
+
+@router.post(
+    "/",
+    response_model=WebhookResponse,
+    status_code=201,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
+    summary="Register a webhook",
+    description="Registers a webhook with Up Bank and remembers its secret key so deliveries can be verified",
+)
+async def create_webhook(
+    request: Request,
+    webhook: WebhookCreateRequest = Body(...),
+    account_type: AccountType = Query(..., description="Account type to register the webhook for"),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Register a webhook for the specified account type."""
+    store = request.app.state.transaction_store
+    if store is None:
+        # Up only reveals the secret key once, and without it deliveries cannot be verified
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                "Registering a webhook needs the local transaction store to keep its secret key. Set STORE_PATH, "
+                "or register it elsewhere and set the account type's *_WEBHOOK_SECRET."
+            ),
+        )
+    response = await service.create_webhook(account_type, webhook.url, webhook.description)
+    if response.data.attributes.secret_key:
+        await asyncio.to_thread(store.save_webhook, account_type, response.data.id, response.data.attributes.secret_key)
+    return response
+
+
+@router.get(
+    "/{webhook_id}",
+    response_model=WebhookResponse,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get webhook by ID",
+    description="Returns a specific webhook by ID",
+)
+async def get_webhook(
+    webhook_id: str = Path(..., description="Webhook ID"),
+    account_type: AccountType = Query(..., description="Account type to query"),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Get a specific webhook by ID."""
+    return await service.get_webhook(account_type, webhook_id)
+
+
+@router.delete(
+    "/{webhook_id}",
+    status_code=204,
+    response_class=Response,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Delete a webhook",
+    description="Deletes a webhook from Up Bank and forgets its secret key",
+)
+async def delete_webhook(
+    request: Request,
+    webhook_id: str = Path(..., description="Webhook ID"),
+    account_type: AccountType = Query(..., description="Account type the webhook belongs to"),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Response:
+    """Delete a webhook."""
+    await service.delete_webhook(account_type, webhook_id)
+    store = request.app.state.transaction_store
+    if store is not None:
+        await asyncio.to_thread(store.delete_webhook, webhook_id)
+    return Response(status_code=204)
+
+
+@router.post(
+    "/{webhook_id}/ping",
+    response_model=WebhookEventResponse,
+    status_code=201,
+    responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Ping a webhook",
+    description="Asks Up Bank to deliver a PING event to the webhook",
+)
+async def ping_webhook(
+    webhook_id: str = Path(..., description="Webhook ID"),
+    account_type: AccountType = Query(..., description="Account type the webhook belongs to"),
+    service: UpBankApiService = Depends(get_up_api_service),
+) -> Any:
+    """Send a PING event to a webhook."""
+    return await service.ping_webhook(account_type, webhook_id)
@@ -0,0 +1,199 @@
+"""
+Response compression middleware.
+
+Supports gzip from the standard library, and Brotli and Zstandard when the
+optional ``brotli``/``brotlicffi`` and ``zstandard`` packages are installed.
+"""
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Content types worth compressing; everything else is sent as is
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class Encoder(ABC):
+    """Incremental compressor for one response body."""
+
+    @abstractmethod
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; with ``flush`` everything so far is emitted so a client can decode it."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """End the compressed stream."""
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.compress(data)
+        return chunk + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.process(data)
+        return chunk + self._compressor.flush() if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.compress(data)
+        return chunk + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """Configured encodings in order of preference, limited to those that are installed."""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    configured = (name.strip().lower() for name in settings.compression_encodings.split(","))
+    return [name for name in configured if installed.get(name)]
+
+
+def create_encoder(encoding: str) -> Encoder:
+    """Create an encoder for a content coding returned by ``negotiate_encoding``."""
+    if encoding == "br":
+        return BrotliEncoder(settings.compression_brotli_quality)
+    if encoding == "zstd":
+        return ZstdEncoder(settings.compression_zstd_level)
+    return GzipEncoder(settings.compression_gzip_level)
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    Pick the first of ``encodings`` that an ``Accept-Encoding`` header allows.
+
+    Codings with ``q=0`` are refused; ``*`` stands for any coding not listed.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    for encoding in encodings:
+        if weights.get(encoding, weights.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON, NDJSON and text responses.
+
+    Complete responses smaller than ``COMPRESSION_MINIMUM_SIZE`` are sent
+    uncompressed. Streaming responses are always compressed and flushed
+    after every chunk, so each NDJSON page reaches the client as soon as it
+    is produced.
+    """
+
+    def __init__(self, app: Any, minimum_size: Optional[int] = None, encodings: Optional[Sequence[str]] = None):
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.encodings = list(encodings) if encodings is not None else available_encodings()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Dict[str, Any]] = None
+        encoder: Optional[Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(scope=start_message)
+                if not self._compressible(start_message["status"], headers):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = create_encoder(encoding)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                    body = encoder.compress(body, flush=True)
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if more_body:
+                body = encoder.compress(body, flush=True)
+            else:
+                body = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        if status in (204, 304) or "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -11,10 +13,96 @@ class Settings(BaseSettings):
     user2_up_token: str | None = Field(None, description="User 2 Up Bank API token")
     shared_up_token: str | None = Field(None, description="Shared Up Bank account API token")
     
+    # Webhook secrets for webhooks registered outside this API (secretKey returned by Up)
+    user1_webhook_secret: str | None = Field(None, description="User 1 webhook secret key")
+    user2_webhook_secret: str | None = Field(None, description="User 2 webhook secret key")
+    shared_webhook_secret: str | None = Field(None, description="Shared account webhook secret key")
+    
     # API settings
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     log_level: str = "INFO"
+    api_workers: int = Field(1, description="Worker processes started by the production entry point")
+    fast_serialization: bool = Field(False, description="Opt in to serializing validated responses once instead of re-validating them; FAST_SERIALIZATION=true enables it")
+    etag_enabled: bool = Field(True, description="Send ETags and answer matching If-None-Match requests with 304")
+    metrics_enabled: bool = Field(True, description="Record request metrics and expose them at /metrics")
+    docs_enabled: bool = Field(True, description="Serve /docs, /redoc and /openapi.json")
+    
+    # Response compression
+    compression_enabled: bool = Field(True, description="Compress JSON, NDJSON and text responses for clients that accept it")
+    compression_encodings: str = Field("zstd,br,gzip", description="Content codings in order of preference; br and zstd need optional packages")
+    compression_minimum_size: int = Field(1024, description="Responses smaller than this many bytes are sent uncompressed")
+    compression_gzip_level: int = Field(6, description="gzip compression level (1-9)")
+    compression_brotli_quality: int = Field(4, description="Brotli compression quality (0-11)")
+    compression_zstd_level: int = Field(3, description="Zstandard compression level (1-22)")
+    
+    # Upstream HTTP client settings
+    http_timeout: float = Field(30.0, description="Total timeout in seconds for Up Bank API requests")
+    http_connect_timeout: float = Field(10.0, description="Connect timeout in seconds for Up Bank API requests")
+    http_max_connections: int = Field(20, description="Maximum open connections per token")
+    http_max_keepalive_connections: int = Field(10, description="Maximum idle keep-alive connections per token")
+    http_keepalive_expiry: float = Field(60.0, description="Seconds an idle connection is kept open")
+    http2_enabled: bool = Field(True, description="Use HTTP/2 when the 'h2' package is installed")
+    
+    # Upstream scheduling, retry and circuit breaker settings (per token)
+    upstream_rate_limit: float = Field(10.0, description="Sustained requests per second to Up Bank; 0 disables rate limiting")
+    upstream_burst: int = Field(20, description="Requests that may be sent in a burst above the sustained rate")
+    upstream_max_concurrency: int = Field(10, description="Maximum concurrent requests to Up Bank")
+    upstream_max_retries: int = Field(3, description="Retries for idempotent requests on 429/502/503/504 and connection errors")
+    upstream_backoff_base: float = Field(0.5, description="Base delay in seconds for exponential retry backoff")
+    upstream_backoff_max: float = Field(30.0, description="Maximum delay in seconds between retries")
+    upstream_circuit_failure_threshold: int = Field(5, description="Consecutive failures before failing fast; 0 disables the breaker")
+    upstream_circuit_reset_seconds: float = Field(30.0, description="Seconds the circuit stays open before a trial request")
+    
+    # Response cache settings (TTLs in seconds, 0 disables caching for that endpoint)
+    cache_enabled: bool = Field(True, description="Cache slow-changing Up Bank responses in memory")
+    cache_backend: Literal["memory", "sqlite"] = Field("memory", description="Where cached responses live; sqlite shares them between workers")
+    cache_path: str = Field("up_bank_cache.db", description="SQLite file for the sqlite cache backend")
+    cache_max_entries: int = Field(1024, description="Maximum cached responses before least-recently-used eviction")
+    cache_ttl_accounts: float = Field(30.0, description="TTL for account responses")
+    cache_ttl_categories: float = Field(86400.0, description="TTL for category responses")
+    cache_ttl_transaction: float = Field(3600.0, description="TTL for single settled transaction responses")
+    upstream_conditional_requests: bool = Field(True, description="Revalidate Up Bank responses that carry an ETag or Last-Modified")
+    category_tree_refresh_seconds: float = Field(86400.0, description="Seconds before the in-memory category tree is reloaded from Up Bank")
+    
+    # Client caching (Cache-Control max-age in seconds, 0 means revalidate every time)
+    client_max_age_accounts: int = Field(10, description="Cache-Control max-age for account responses")
+    client_max_age_categories: int = Field(3600, description="Cache-Control max-age for category responses")
+    client_max_age_transactions: int = Field(0, description="Cache-Control max-age for transaction responses")
+    client_max_age_analytics: int = Field(0, description="Cache-Control max-age for analytics responses")
+    
+    # Cache warm-up
+    warmup_enabled: bool = Field(True, description="Prefetch accounts, categories and recent transactions at startup")
+    warmup_interval_seconds: float = Field(3600.0, description="Seconds between warm-ups after startup; 0 warms up only once")
+    warmup_transaction_pages: int = Field(2, description="Most recent transaction pages to prefetch per token")
+    warmup_page_size: int = Field(100, description="Transactions per prefetched page")
+    warmup_stagger_seconds: float = Field(1.0, description="Delay between starting warm-up for each token")
+    
+    # Batch lookups
+    batch_max_ids: int = Field(500, description="Maximum transaction IDs in one batch lookup")
+    batch_max_concurrency: int = Field(10, description="Maximum concurrent upstream requests for one batch lookup")
+    
+    # Local transaction store and background sync
+    store_path: str | None = Field("up_bank_local.db", description="SQLite file for the local transaction store; empty disables it")
+    sync_enabled: bool = Field(False, description="Run the background transaction sync for every configured token")
+    sync_interval_seconds: float = Field(300.0, description="Seconds between background syncs")
+    sync_page_size: int = Field(100, description="Transactions per upstream page when syncing")
+    sync_backfill_shards: int = Field(8, description="Date ranges the first sync splits the history into; 1 follows a single cursor chain")
+    sync_backfill_concurrency: int = Field(4, description="Maximum date ranges walked concurrently during a backfill")
+    sync_backfill_min_shard_hours: float = Field(24.0, description="Dense date ranges are split until they are this narrow")
+    
+    # Analytics
+    balance_history_max_days: int = Field(3660, description="Most days one balance history response may cover")
+    
+    # Transaction export
+    export_batch_size: int = Field(10_000, description="Rows per Parquet row group, Arrow record batch or CSV write when exporting")
+    
+    # Live transaction feed
+    live_poll_interval_seconds: float = Field(5.0, description="Seconds between polls of the newest transactions per token while clients are connected; 0 relies on webhooks only")
+    live_page_size: int = Field(50, description="Newest transactions compared on every live feed poll")
+    live_queue_size: int = Field(100, description="Events buffered per live feed client before it is dropped as too slow")
+    live_replay_events: int = Field(1000, description="Recent live feed events kept per token for clients resuming with Last-Event-ID")
+    live_keepalive_seconds: float = Field(15.0, description="Seconds of silence before a live feed sends a keep-alive comment")
     
     # Configure environment variables loading
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
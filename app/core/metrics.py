@@ -0,0 +1,278 @@
+"""
+Minimal Prometheus-compatible metrics.
+
+Metrics live in process memory and are rendered in the Prometheus text
+exposition format by ``/metrics``, so no client library or external server
+is needed. Recording a sample is a dictionary update, cheap enough for
+every request.
+"""
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base class for a named metric with a fixed set of label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Every (sample name, labels, value) this metric currently exposes."""
+
+
+class Counter(Metric):
+    """A monotonically increasing value."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in list(self._values.items()):
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels: Any) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> Iterable[Sample]:
+        for key, state in list(self._values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, state[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and renders them for scraping.
+
+    Collectors are callables run at scrape time that return extra metrics,
+    for values better read on demand than tracked on every change.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: Dict[str, Callable[[], Iterable[Metric]]] = {}
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def set_collector(self, name: str, collector: Optional[Callable[[], Iterable[Metric]]]) -> None:
+        """Register (or with None, remove) a named scrape-time collector."""
+        if collector is None:
+            self.collectors.pop(name, None)
+        else:
+            self.collectors[name] = collector
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        metrics: List[Metric] = list(self.metrics.values())
+        for collector in list(self.collectors.values()):
+            metrics.extend(collector())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, by route", ["method", "route", "status"]
+)
+HTTP_RESPONSE_BYTES = registry.counter(
+    "http_response_bytes_total", "Response body bytes sent, by route", ["route"]
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = registry.gauge(
+    "upstream_requests_in_flight", "Requests to Up Bank currently queued or awaiting a response", ["account_type"]
+)
+UPSTREAM_REQUEST_DURATION = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Network time for Up Bank requests including scheduling and retries",
+    ["account_type", "endpoint"],
+)
+UPSTREAM_RESPONSES = registry.counter(
+    "upstream_responses_total", "Up Bank responses by status code", ["account_type", "endpoint", "status"]
+)
+UPSTREAM_RESPONSE_BYTES = registry.counter(
+    "upstream_response_bytes_total", "Response body bytes received from Up Bank, as sent on the wire", ["account_type", "endpoint"]
+)
+UPSTREAM_DECODE_DURATION = registry.histogram(
+    "upstream_decode_duration_seconds", "Time to parse Up Bank JSON responses", ["endpoint"]
+)
+MODEL_VALIDATION_DURATION = registry.histogram(
+    "model_validation_duration_seconds", "Time to validate Up Bank responses into models", ["model"]
+)
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """The request path with path parameter values replaced by ``{name}``."""
+    if "route" not in scope:
+        # Unmatched paths would otherwise add a series per probe or typo
+        return "unmatched"
+    path_params = {str(value): f"{{{name}}}" for name, value in scope.get("path_params", {}).items()}
+    if not path_params:
+        return scope["path"]
+    return "/".join(path_params.get(segment, segment) for segment in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, response size and in-flight requests.
+
+    Latencies are labelled with the route template (e.g.
+    ``/api/v1/accounts/{account_id}``) rather than the raw path to keep the
+    number of series bounded.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        body_bytes = 0
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route_label = _route_label(scope)
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=scope["method"], route=route_label, status=status
+            )
+            HTTP_RESPONSE_BYTES.inc(body_bytes, route=route_label)
@@ -4,9 +4,56 @@ from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.models.up_models import Account, Transaction
 from app.utils.helpers import AccountType
 
 
+class TransactionSource(str, Enum):
+    """Where transaction routes read their data from."""
+    UPSTREAM = "upstream"
+    LOCAL = "local"
+
+
+class ExportFormat(str, Enum):
+    """File formats transactions can be exported to."""
+    CSV = "csv"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class TransactionFormat(str, Enum):
+    """Response shapes for transaction routes."""
+    JSONAPI = "jsonapi"
+    FLAT = "flat"
+
+
+class TransactionExpansion(str, Enum):
+    """Related data that can be inlined into transactions."""
+    CATEGORY = "category"
+
+
+class TransactionSort(str, Enum):
+    """Orderings for transactions read from the local store."""
+    NEWEST = "-created_at"
+    OLDEST = "created_at"
+    AMOUNT_ASC = "amount"
+    AMOUNT_DESC = "-amount"
+
+
+class LocalTransactionFilters(BaseModel):
+    """Filters Up Bank does not support, evaluated over the local store."""
+    search: Optional[str] = Field(None, description="Words the description or raw text must contain (prefix match)")
+    amount_min: Optional[int] = Field(None, description="Minimum amount in base units; spending is negative")
+    amount_max: Optional[int] = Field(None, description="Maximum amount in base units; spending is negative")
+    foreign: Optional[bool] = Field(None, description="Only transactions with (true) or without (false) a foreign amount")
+    round_up: Optional[bool] = Field(None, description="Only transactions with (true) or without (false) a round-up")
+    sort: TransactionSort = Field(TransactionSort.NEWEST, description="Sort order")
+
+    def is_empty(self) -> bool:
+        """Whether no local-only filter or ordering was requested."""
+        return self == LocalTransactionFilters()
+
+
 class ErrorResponse(BaseModel):
     detail: str
 
@@ -35,4 +82,147 @@ class TagsParams(BaseModel):
 
 class CategoryParams(BaseModel):
     account_type: AccountType = Field(..., description="Account type to query")
-    parent: Optional[str] = Field(None, description="Filter by parent category ID") 
\ No newline at end of file
+    parent: Optional[str] = Field(None, description="Filter by parent category ID") 
+
+
+class CategoryTreeNode(BaseModel):
+    """A category with its subcategories nested below it."""
+    id: str
+    name: str
+    parent_id: Optional[str] = Field(None, description="The parent category, or null for a top-level category")
+    path: List[str] = Field(..., description="Category IDs from the top-level category down to this one")
+    children: List["CategoryTreeNode"] = Field(default_factory=list)
+
+
+class CategoryTreeResponse(BaseModel):
+    data: List[CategoryTreeNode]
+
+
+class SyncResult(BaseModel):
+    account_type: AccountType
+    upserted: int
+    removed: int
+
+
+class SyncStatus(BaseModel):
+    account_type: AccountType
+    high_water_mark: Optional[datetime] = Field(None, description="Creation time of the newest synced transaction")
+    last_synced_at: Optional[datetime] = Field(None, description="When the last sync completed")
+    transaction_count: int = Field(..., description="Transactions held in the local store")
+
+
+class CacheStats(BaseModel):
+    enabled: bool
+    backend: Optional[str] = None
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = Field(0, description="Lookups that waited on an identical in-flight upstream request")
+    evictions: int = 0
+    hit_ratio: float = 0.0
+
+
+class AccountTypeError(BaseModel):
+    account_type: AccountType
+    status_code: int
+    detail: str
+
+
+class AggregateAccountsResponse(BaseModel):
+    data: List[Account]
+    sources: Dict[str, List[AccountType]] = Field(..., description="Account types that returned each account, by account ID")
+    errors: List[AccountTypeError] = Field(default_factory=list, description="Account types that could not be queried")
+
+
+class AggregateTransactionsResponse(BaseModel):
+    data: List[Transaction] = Field(..., description="Transactions from every account type, newest first")
+    sources: Dict[str, List[AccountType]] = Field(..., description="Account types that returned each transaction, by transaction ID")
+    links: Dict[AccountType, Optional[str]] = Field(..., description="Next page link for each account type")
+    errors: List[AccountTypeError] = Field(default_factory=list, description="Account types that could not be queried")
+
+
+class TransactionBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, description="Transaction IDs to look up; duplicates are ignored")
+
+
+class TransactionError(BaseModel):
+    id: str
+    status_code: int
+    detail: str
+
+
+class TransactionBatchResponse(BaseModel):
+    data: List[Transaction] = Field(..., description="Transactions that were found, in request order")
+    sources: Dict[str, TransactionSource] = Field(..., description="Where each transaction was read from, by transaction ID")
+    errors: List[TransactionError] = Field(default_factory=list, description="Transactions that could not be looked up")
+
+
+class UpstreamStats(BaseModel):
+    account_type: AccountType
+    queued: int = Field(..., description="Requests waiting for a rate-limit token or concurrency slot")
+    in_flight: int = Field(..., description="Requests currently awaiting Up Bank")
+    max_concurrency: int
+    requests: int = Field(..., description="Requests sent, including retries")
+    retries: int
+    rate_limited: int = Field(..., description="429 responses received")
+    rejected: int = Field(..., description="Requests rejected while the circuit breaker was open")
+    rate_limit_remaining: Optional[int] = Field(None, description="Last X-RateLimit-Remaining reported by Up Bank")
+    circuit_state: str
+
+
+class WebhookCreateRequest(BaseModel):
+    url: str = Field(..., description="URL Up Bank should deliver events to, e.g. https://example.com/api/v1/webhooks/up")
+    description: Optional[str] = Field(None, max_length=64, description="Optional description shown in Up Bank")
+
+
+class WebhookDeliveryResult(BaseModel):
+    event_type: str
+    account_type: AccountType
+    transaction_id: Optional[str] = None
+    action: str = Field(..., description="What the receiver did: ignored, upserted or deleted")
+
+
+class CategorySpend(BaseModel):
+    category_id: Optional[str] = Field(None, description="Category ID, or null for uncategorised transactions")
+    spent_base_units: int = Field(..., description="Total spent in base units (cents), as a positive number")
+    count: int
+
+
+class MonthSpend(BaseModel):
+    month: str = Field(..., description="Calendar month as YYYY-MM")
+    spent_base_units: int
+    received_base_units: int
+    count: int
+
+
+class MerchantSpend(BaseModel):
+    merchant: Optional[str] = Field(None, description="Transaction description")
+    spent_base_units: int
+    count: int
+
+
+class BalancePoint(BaseModel):
+    date: str = Field(..., description="Date as YYYY-MM-DD")
+    balance_base_units: int = Field(..., description="Balance at the end of the day in base units (cents)")
+
+
+class SpendByCategoryResponse(BaseModel):
+    data: List[CategorySpend]
+
+
+class SpendByMonthResponse(BaseModel):
+    data: List[MonthSpend]
+
+
+class TopMerchantsResponse(BaseModel):
+    data: List[MerchantSpend]
+
+
+class RunningBalanceResponse(BaseModel):
+    account_id: str
+    data: List[BalancePoint]
+
+
+class BalanceHistoryResponse(BaseModel):
+    account_id: str
+    data: List[BalancePoint] = Field(..., description="Settled balance at the end of every day in the range")
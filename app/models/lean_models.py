@@ -0,0 +1,206 @@
+"""
+Compact transaction representation for bulk paths.
+
+``LeanTransaction`` keeps what filtering, sorting and exporting need as
+plain typed fields (amounts in base units, relationships reduced to ids)
+in a frozen, slotted dataclass. Attributes that are rarely read, such as
+hold info, round-ups, cashback and foreign amounts, are kept as one compact
+JSON blob and only parsed when accessed. ``to_jsonapi`` rebuilds the full
+Up Bank resource when a client needs it.
+"""
+import json
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.up_models import Transaction
+from app.utils.serialization import json_loads
+
+# Attributes stored as typed fields; everything else goes into the lazily parsed blob
+CORE_ATTRIBUTES = frozenset({"status", "rawText", "description", "message", "amount", "createdAt", "settledAt"})
+# Rarely used attributes Up always sends, restored as null when absent from the blob
+RARE_ATTRIBUTES = (
+    "isCategorizable", "holdInfo", "roundUp", "cashback", "foreignAmount", "cardPurchaseMethod",
+    "transactionType", "note", "performingCustomer", "deepLinkURL",
+)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Statuses, descriptions, currencies and ids repeat across thousands of rows
+    return sys.intern(value) if value is not None else None
+
+
+def _related_id(relationships: Dict[str, Any], name: str) -> Optional[str]:
+    data = (relationships.get(name) or {}).get("data")
+    return _intern(data["id"]) if data else None
+
+
+def format_base_units(value_in_base_units: int, decimals: int = 2) -> str:
+    """Format an amount in base units the way Up writes ``value``, e.g. -1234 -> "-12.34"."""
+    if decimals == 0:
+        return str(value_in_base_units)
+    sign = "-" if value_in_base_units < 0 else ""
+    whole, fraction = divmod(abs(value_in_base_units), 10 ** decimals)
+    return f"{sign}{whole}.{fraction:0{decimals}d}"
+
+
+@dataclass(frozen=True, slots=True)
+class Money:
+    """An amount in the currency's smallest unit."""
+    value_in_base_units: int
+    currency_code: str
+
+    @classmethod
+    def from_jsonapi(cls, money: Dict[str, Any]) -> "Money":
+        return cls(money["valueInBaseUnits"], sys.intern(money["currencyCode"]))
+
+    def to_jsonapi(self, decimals: int = 2) -> Dict[str, Any]:
+        return {
+            "currencyCode": self.currency_code,
+            "value": format_base_units(self.value_in_base_units, decimals),
+            "valueInBaseUnits": self.value_in_base_units,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class LeanTransaction:
+    """A transaction reduced to typed fields and relationship ids."""
+    id: str
+    status: str
+    description: str
+    raw_text: Optional[str]
+    message: Optional[str]
+    amount_base_units: int
+    currency_code: str
+    created_at: str
+    settled_at: Optional[str]
+    account_id: str
+    transfer_account_id: Optional[str]
+    category_id: Optional[str]
+    parent_category_id: Optional[str]
+    tag_ids: Tuple[str, ...]
+    attachment_id: Optional[str]
+    # Non-null rarely used attributes as compact JSON, or None if there are none
+    extra: Optional[bytes] = None
+
+    @classmethod
+    def from_jsonapi(cls, resource: Dict[str, Any]) -> "LeanTransaction":
+        """Build from an Up Bank transaction resource (``data`` item)."""
+        attributes = resource["attributes"]
+        relationships = resource.get("relationships") or {}
+        extra = {
+            name: value for name, value in attributes.items() if name not in CORE_ATTRIBUTES and value is not None
+        }
+        return cls(
+            id=resource["id"],
+            status=sys.intern(attributes["status"]),
+            description=sys.intern(attributes["description"]),
+            raw_text=_intern(attributes.get("rawText")),
+            message=attributes.get("message"),
+            amount_base_units=attributes["amount"]["valueInBaseUnits"],
+            currency_code=sys.intern(attributes["amount"]["currencyCode"]),
+            created_at=attributes["createdAt"],
+            settled_at=attributes.get("settledAt"),
+            account_id=_related_id(relationships, "account"),
+            transfer_account_id=_related_id(relationships, "transferAccount"),
+            category_id=_related_id(relationships, "category"),
+            parent_category_id=_related_id(relationships, "parentCategory"),
+            tag_ids=tuple(
+                sys.intern(tag["id"]) for tag in (relationships.get("tags") or {}).get("data") or []
+            ),
+            attachment_id=_related_id(relationships, "attachment"),
+            # The standard library allocates exactly what the blob needs; orjson's buffer is 4 KiB
+            extra=json.dumps(extra, separators=(",", ":"), ensure_ascii=False).encode() if extra else None,
+        )
+
+    @property
+    def amount(self) -> Money:
+        return Money(self.amount_base_units, self.currency_code)
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromisoformat(self.created_at)
+
+    @property
+    def settled(self) -> Optional[datetime]:
+        return datetime.fromisoformat(self.settled_at) if self.settled_at else None
+
+    @property
+    def extra_attributes(self) -> Dict[str, Any]:
+        """The rarely used attributes, parsed on every access."""
+        return json_loads(self.extra) if self.extra is not None else {}
+
+    @property
+    def foreign_amount(self) -> Optional[Money]:
+        money = self.extra_attributes.get("foreignAmount")
+        return Money.from_jsonapi(money) if money else None
+
+    @property
+    def round_up(self) -> Optional[Money]:
+        round_up = self.extra_attributes.get("roundUp")
+        return Money.from_jsonapi(round_up["amount"]) if round_up else None
+
+    def to_jsonapi(self, base_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rebuild the Up Bank JSON:API resource.
+
+        Args:
+            base_url: API base URL used in relationship links; defaults to ``UP_API_BASE_URL``
+
+        Returns:
+            The transaction resource as Up Bank returns it
+        """
+        base_url = (base_url or settings.up_api_base_url).rstrip("/")
+        extra = self.extra_attributes
+        attributes: Dict[str, Any] = {
+            "status": self.status,
+            "rawText": self.raw_text,
+            "description": self.description,
+            "message": self.message,
+            "amount": self.amount.to_jsonapi(),
+            "createdAt": self.created_at,
+            "settledAt": self.settled_at,
+        }
+        for name in RARE_ATTRIBUTES:
+            attributes[name] = extra.pop(name, None)
+        attributes.update(extra)
+
+        def related(resource_type: str, resource_id: Optional[str]) -> Dict[str, Any]:
+            if resource_id is None:
+                return {"data": None}
+            return {
+                "data": {"type": resource_type, "id": resource_id},
+                "links": {"related": f"{base_url}/{resource_type}/{resource_id}"},
+            }
+
+        self_link = f"{base_url}/transactions/{self.id}"
+        category = related("categories", self.category_id)
+        category["links"] = {"self": f"{self_link}/relationships/category", **category.get("links", {})}
+        return {
+            "type": "transactions",
+            "id": self.id,
+            "attributes": attributes,
+            "relationships": {
+                "account": related("accounts", self.account_id),
+                "transferAccount": related("accounts", self.transfer_account_id),
+                "category": category,
+                "parentCategory": related("categories", self.parent_category_id),
+                "tags": {
+                    "data": [{"type": "tags", "id": tag_id} for tag_id in self.tag_ids],
+                    "links": {"self": f"{self_link}/relationships/tags"},
+                },
+                "attachment": related("attachments", self.attachment_id),
+            },
+            "links": {"self": self_link},
+        }
+
+    def to_model(self, base_url: Optional[str] = None) -> Transaction:
+        """Convert to the full ``Transaction`` model."""
+        return Transaction.model_validate(self.to_jsonapi(base_url))
+
+
+def lean_transactions(resources: Iterable[Dict[str, Any]]) -> List[LeanTransaction]:
+    """Convert a page (or any iterable) of transaction resources."""
+    return [LeanTransaction.from_jsonapi(resource) for resource in resources]
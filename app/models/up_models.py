@@ -110,4 +110,59 @@ class CategoryResponse(BaseModel):
 
 
 class CategoriesResponse(BaseModel):
-    data: List[Category] 
\ No newline at end of file
+    data: List[Category] 
+
+
+class WebhookAttributes(BaseModel):
+    url: str
+    description: Optional[str] = None
+    secret_key: Optional[str] = Field(None, alias="secretKey")
+    created_at: datetime = Field(..., alias="createdAt")
+
+
+class WebhookRelationships(BaseModel):
+    logs: Optional[Dict[str, Any]] = None
+
+
+class Webhook(BaseModel):
+    type: str
+    id: str
+    attributes: WebhookAttributes
+    relationships: Optional[WebhookRelationships] = None
+
+
+class WebhookResponse(BaseModel):
+    data: Webhook
+
+
+class WebhooksResponse(BaseModel):
+    data: List[Webhook]
+    links: Optional[Dict[str, Any]] = None
+
+
+class WebhookEventType(str, Enum):
+    TRANSACTION_CREATED = "TRANSACTION_CREATED"
+    TRANSACTION_SETTLED = "TRANSACTION_SETTLED"
+    TRANSACTION_DELETED = "TRANSACTION_DELETED"
+    PING = "PING"
+
+
+class WebhookEventAttributes(BaseModel):
+    event_type: WebhookEventType = Field(..., alias="eventType")
+    created_at: datetime = Field(..., alias="createdAt")
+
+
+class WebhookEventRelationships(BaseModel):
+    webhook: Dict[str, Any]
+    transaction: Optional[Dict[str, Any]] = None
+
+
+class WebhookEvent(BaseModel):
+    type: str
+    id: str
+    attributes: WebhookEventAttributes
+    relationships: WebhookEventRelationships
+
+
+class WebhookEventResponse(BaseModel):
+    data: WebhookEvent
@@ -0,0 +1,365 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.transaction_store import TransactionStore, to_timestamp
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+# numpy takes tens of milliseconds to import, so it is loaded when the first index is built
+np: Any = None
+_numpy_loaded = False
+
+UNCATEGORIZED = None
+
+
+def _load_numpy() -> Any:
+    """Import the optional numpy dependency on first use; None if it is not installed."""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            numpy = None
+        np = numpy
+    return np
+
+
+class Interner:
+    """Maps repeated strings to small integer codes."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self._codes: Dict[Optional[str], int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class TransactionIndex:
+    """
+    Columnar, in-memory view of one account type's transactions for aggregates.
+
+    Each column is a flat ``array`` in creation order: epoch timestamps,
+    local dates as YYYYMMDD ints, amounts in base units, and interned codes
+    for category, parent category, account and merchant (description).
+    Date ranges are found by bisecting the timestamp column and a
+    per-category posting list gives the rows of each category. Aggregates
+    run vectorised with NumPy when it is installed, over zero-copy views of
+    the same arrays, and fall back to plain loops otherwise.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        self.created_at = array("d")
+        self.day = array("i")
+        self.amount = array("q")
+        self.category = array("i")
+        self.parent_category = array("i")
+        self.account = array("i")
+        self.merchant = array("i")
+        self.settled = array("b")
+        self.categories = Interner()
+        self.accounts = Interner()
+        self.merchants = Interner()
+        self.by_category: Dict[int, array] = {}
+
+        for row_id, (created_at, local_date, amount, category, parent, account, status, description) in enumerate(rows):
+            self.created_at.append(created_at)
+            self.day.append(int(local_date.replace("-", "")))
+            self.amount.append(amount)
+            category_code = self.categories.code(category)
+            self.category.append(category_code)
+            self.parent_category.append(self.categories.code(parent))
+            self.account.append(self.accounts.code(account))
+            self.merchant.append(self.merchants.code(description))
+            self.settled.append(status == "SETTLED")
+            self.by_category.setdefault(category_code, array("i")).append(row_id)
+
+        self._np: Dict[str, Any] = {}
+        if _load_numpy() is not None:
+            self._np = {
+                "amount": np.frombuffer(self.amount, dtype=np.int64),
+                "day": np.frombuffer(self.day, dtype=np.intc),
+                "category": np.frombuffer(self.category, dtype=np.intc),
+                "parent_category": np.frombuffer(self.parent_category, dtype=np.intc),
+                "account": np.frombuffer(self.account, dtype=np.intc),
+                "merchant": np.frombuffer(self.merchant, dtype=np.intc),
+            }
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the column arrays."""
+        columns = [self.created_at, self.day, self.amount, self.category, self.parent_category,
+                   self.account, self.merchant, self.settled]
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def _select(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        account_id: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> Any:
+        """Row ids matching the filters, as a NumPy array or a Python sequence."""
+        lo = bisect_left(self.created_at, to_timestamp(since)) if since else 0
+        hi = bisect_left(self.created_at, to_timestamp(until)) if until else len(self)
+
+        if category is not None:
+            code = self.categories.lookup(category)
+            postings = self.by_category.get(code, array("i")) if code is not None else array("i")
+            start, stop = bisect_left(postings, lo), bisect_left(postings, hi)
+            rows: Any = np.frombuffer(postings, dtype=np.intc)[start:stop] if self._np else postings[start:stop]
+        else:
+            rows = np.arange(lo, hi) if self._np else range(lo, hi)
+
+        if account_id is not None:
+            code = self.accounts.lookup(account_id)
+            if code is None:
+                return np.arange(0) if self._np else []
+            if self._np:
+                rows = rows[self._np["account"][rows] == code]
+            else:
+                rows = [row for row in rows if self.account[row] == code]
+        return rows
+
+    def _outflows_by(self, column: str, rows: Any, labels: Interner) -> List[Tuple[Optional[str], int, int]]:
+        """Sum spending (negative amounts, reported as positive) per code of ``column``."""
+        if self._np:
+            amounts = self._np["amount"][rows]
+            codes = self._np[column][rows]
+            spent = amounts < 0
+            totals = np.bincount(codes[spent], weights=-amounts[spent], minlength=len(labels.values))
+            counts = np.bincount(codes[spent], minlength=len(labels.values))
+            result = [(labels.values[code], int(totals[code]), int(counts[code])) for code in np.flatnonzero(counts)]
+        else:
+            column_values = getattr(self, column)
+            sums: Dict[int, List[int]] = {}
+            for row in rows:
+                amount = self.amount[row]
+                if amount < 0:
+                    entry = sums.setdefault(column_values[row], [0, 0])
+                    entry[0] -= amount
+                    entry[1] += 1
+            result = [(labels.values[code], total, count) for code, (total, count) in sums.items()]
+        return sorted(result, key=lambda item: item[1], reverse=True)
+
+    def spend_by_category(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        account_id: Optional[str] = None,
+        parent: bool = False,
+    ) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Total spending per category, largest first.
+
+        Returns:
+            (category id or None for uncategorised, spent in base units, transaction count)
+        """
+        rows = self._select(since, until, account_id)
+        return self._outflows_by("parent_category" if parent else "category", rows, self.categories)
+
+    def top_merchants(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        account_id: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Merchants (transaction descriptions) with the most spending.
+
+        Returns:
+            (merchant, spent in base units, transaction count), at most ``limit`` of them
+        """
+        rows = self._select(since, until, account_id)
+        return self._outflows_by("merchant", rows, self.merchants)[:limit]
+
+    def spend_by_month(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        account_id: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[str, int, int, int]]:
+        """
+        Spending and income per calendar month, oldest first.
+
+        Returns:
+            (month as YYYY-MM, spent in base units, received in base units, transaction count)
+        """
+        rows = self._select(since, until, account_id, category)
+        if self._np:
+            amounts = self._np["amount"][rows]
+            months = self._np["day"][rows] // 100
+            unique, inverse = np.unique(months, return_inverse=True)
+            spent = np.bincount(inverse, weights=np.where(amounts < 0, -amounts, 0), minlength=len(unique))
+            received = np.bincount(inverse, weights=np.where(amounts > 0, amounts, 0), minlength=len(unique))
+            counts = np.bincount(inverse, minlength=len(unique))
+            buckets = list(zip(unique.tolist(), spent.astype(np.int64).tolist(),
+                               received.astype(np.int64).tolist(), counts.tolist()))
+        else:
+            totals: Dict[int, List[int]] = {}
+            for row in rows:
+                amount = self.amount[row]
+                entry = totals.setdefault(self.day[row] // 100, [0, 0, 0])
+                entry[0 if amount < 0 else 1] += abs(amount)
+                entry[2] += 1
+            buckets = [(month, *totals[month]) for month in sorted(totals)]
+        return [(f"{month // 100:04d}-{month % 100:02d}", spent, received, count) for month, spent, received, count in buckets]
+
+    def running_balance(
+        self,
+        account_id: str,
+        current_balance: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        End-of-day balance for each day the account had activity, oldest first.
+
+        The balance is anchored to the account's current balance and walked
+        back through every stored transaction, so it is only exact once the
+        account's full history has been synced.
+
+        Returns:
+            (date as YYYY-MM-DD, balance in base units)
+        """
+        rows = self._select(None, None, account_id)
+        if len(rows) == 0:
+            return []
+        since_day = int(since.strftime("%Y%m%d")) if since else 0
+        until_day = int(until.strftime("%Y%m%d")) if until else 99999999
+
+        if self._np:
+            amounts = self._np["amount"][rows]
+            days = self._np["day"][rows]
+            cumulative = np.cumsum(amounts)
+            balances = current_balance - (cumulative[-1] - cumulative)
+            # The last transaction of each day carries that day's closing balance
+            last_of_day = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+            points = list(zip(days[last_of_day].tolist(), balances[last_of_day].tolist()))
+        else:
+            points = []
+            balance = current_balance - sum(self.amount[row] for row in rows)
+            for position, row in enumerate(rows):
+                balance += self.amount[row]
+                if position + 1 == len(rows) or self.day[rows[position + 1]] != self.day[row]:
+                    points.append((self.day[row], balance))
+
+        return [
+            (f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}", balance)
+            for day, balance in points
+            if since_day <= day < until_day
+        ]
+
+
+class AnalyticsService:
+    """
+    Keeps a ``TransactionIndex`` per account type in step with the local store.
+
+    Indexes are built lazily in a worker thread and rebuilt when the store's
+    change token moves.
+    """
+
+    def __init__(self, store: TransactionStore):
+        self.store = store
+        self._indexes: Dict[AccountType, Tuple[Any, TransactionIndex]] = {}
+        self._locks: Dict[AccountType, asyncio.Lock] = {}
+
+    async def get_index(self, account_type: AccountType) -> TransactionIndex:
+        """Get an up-to-date index for an account type, rebuilding it if the store changed."""
+        lock = self._locks.setdefault(account_type, asyncio.Lock())
+        async with lock:
+            token = await asyncio.to_thread(self.store.change_token)
+            cached = self._indexes.get(account_type)
+            if cached is not None and cached[0] == token:
+                return cached[1]
+
+            rows = await asyncio.to_thread(self.store.index_rows, account_type)
+            index = await asyncio.to_thread(TransactionIndex, rows)
+            logger.debug(f"Built analytics index for {account_type.value}: {len(index)} transactions")
+            self._indexes[account_type] = (token, index)
+            return index
+
+    async def balance_history(
+        self,
+        account_type: AccountType,
+        account_id: str,
+        current_balance: int,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        End-of-day settled balance for every day in a range, oldest first.
+
+        The store keeps the cumulative settled amount per account and day,
+        updated incrementally as transactions arrive. That series is anchored
+        to the current balance less amounts still on hold, so it is only exact
+        once the account's full history has been synced.
+
+        Args:
+            account_type: Account type the account belongs to
+            account_id: Account to compute the history for
+            current_balance: The account's current balance in base units
+            since: First day to include; defaults to the first day with a settled transaction
+            until: Day to stop before; defaults to the day after the last settled transaction
+
+        Returns:
+            (date as YYYY-MM-DD, balance in base units) for each day
+
+        Raises:
+            ValueError: If the range covers more than ``BALANCE_HISTORY_MAX_DAYS`` days
+        """
+        await asyncio.to_thread(self.store.refresh_balance_history, account_type)
+        history = await asyncio.to_thread(
+            self.store.get_balance_history,
+            account_type,
+            account_id,
+            since.isoformat() if since else None,
+            until.isoformat() if until else None,
+        )
+        days = history["days"]
+        if since is None:
+            if not days:
+                return []
+            since = date.fromisoformat(days[0][0])
+        if until is None:
+            # Stored days are Up's local dates, so the server's own date could be a day out
+            if history["last_day"] is None:
+                return []
+            until = date.fromisoformat(history["last_day"]) + timedelta(days=1)
+        if (until - since).days > settings.balance_history_max_days:
+            raise ValueError(
+                f"Balance history covers at most {settings.balance_history_max_days} days; narrow since or until"
+            )
+
+        # balance(day) = current settled balance - settled amounts after that day
+        offset = current_balance - history["held"] - history["total"]
+        cumulative = history["opening"]
+        points = []
+        position = 0
+        day = since
+        while day < until:
+            key = day.isoformat()
+            if position < len(days) and days[position][0] == key:
+                cumulative = days[position][1]
+                position += 1
+            points.append((key, offset + cumulative))
+            day += timedelta(days=1)
+        return points
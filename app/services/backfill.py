@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+# Up timestamps have one-second precision; ranges overlap by this much so no
+# transaction falls between two of them whichever way Up treats the bounds
+OVERLAP = timedelta(seconds=1)
+
+PageHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+@dataclass
+class _Shard:
+    since: datetime
+    until: Optional[datetime]
+
+
+def split_range(since: datetime, until: datetime, shards: int) -> List[_Shard]:
+    """Split ``[since, until)`` into ``shards`` equal, slightly overlapping ranges, newest first."""
+    width = (until - since) / shards
+    bounds = [since + width * index for index in range(shards)] + [until]
+    return [
+        _Shard(bounds[index], bounds[index + 1] + OVERLAP) for index in reversed(range(shards))
+    ]
+
+
+class ShardedBackfill:
+    """
+    Walk a date range of transactions as several concurrent cursor chains.
+
+    Up's cursor pagination is sequential within one query, so the range is
+    split into sub-ranges that are walked concurrently, at most
+    ``max_concurrency`` at a time. Up returns transactions newest first:
+    whenever a worker would otherwise be idle and a full page shows that
+    the rest of a range is still dense, that remainder is split in two
+    instead of being followed by cursor. Ranges overlap by a second at
+    their bounds, so transactions are de-duplicated by id before being
+    handed to ``on_page``.
+    """
+
+    def __init__(
+        self,
+        api_service: UpBankApiService,
+        account_type: AccountType,
+        on_page: PageHandler,
+        max_concurrency: int = 4,
+        page_size: int = 100,
+        min_shard: timedelta = timedelta(days=1),
+    ):
+        self.api_service = api_service
+        self.account_type = account_type
+        self.on_page = on_page
+        self.max_concurrency = max(1, max_concurrency)
+        self.page_size = page_size
+        self.min_shard = max(min_shard, OVERLAP * 4)
+        self.seen: Set[str] = set()
+        self.pages = 0
+        self.shards = 0
+        self._queue: "asyncio.Queue[_Shard]" = asyncio.Queue()
+        self._busy = 0
+
+    async def run(self, since: datetime, until: Optional[datetime], shards: int) -> int:
+        """
+        Backfill every transaction created in ``[since, until)``.
+
+        Args:
+            since: Start of the range
+            until: End of the range; None includes transactions created while the backfill runs
+            shards: Number of sub-ranges to start with
+
+        Returns:
+            Number of distinct transactions handed to ``on_page``
+        """
+        end = until or datetime.now(since.tzinfo)
+        shards = max(1, min(shards, int((end - since) / self.min_shard) or 1))
+        initial = split_range(since, end, shards)
+        if until is None:
+            initial[0].until = None
+        for shard in initial:
+            self._queue.put_nowait(shard)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+        finished = asyncio.create_task(self._queue.join())
+        try:
+            await asyncio.wait([finished, *workers], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in [finished, *workers]:
+                task.cancel()
+            await asyncio.gather(finished, *workers, return_exceptions=True)
+        for worker in workers:
+            if worker.done() and not worker.cancelled() and worker.exception() is not None:
+                raise worker.exception()
+
+        logger.info(
+            f"Backfilled {self.account_type.value}: {len(self.seen)} transactions "
+            f"from {self.pages} pages in {self.shards} ranges"
+        )
+        return len(self.seen)
+
+    async def _worker(self) -> None:
+        while True:
+            shard = await self._queue.get()
+            self._busy += 1
+            try:
+                await self._walk(shard)
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    def _should_split(self, since: datetime, until: datetime) -> bool:
+        idle = self.max_concurrency - self._busy - self._queue.qsize()
+        return idle > 0 and until - since >= self.min_shard * 2
+
+    async def _walk(self, shard: _Shard) -> None:
+        self.shards += 1
+        pages = self.api_service.iter_transaction_pages(
+            self.account_type, since=shard.since, until=shard.until, page_size=self.page_size
+        )
+        try:
+            async for page in pages:
+                self.pages += 1
+                transactions = page.get("data") or []
+                fresh = [txn for txn in transactions if txn["id"] not in self.seen]
+                self.seen.update(txn["id"] for txn in fresh)
+                if fresh:
+                    await self.on_page(fresh)
+                if not (page.get("links") or {}).get("next") or not transactions:
+                    return
+                # Everything left in this range is older than the page's oldest transaction
+                oldest = min(datetime.fromisoformat(txn["attributes"]["createdAt"]) for txn in transactions)
+                remaining_until = oldest + OVERLAP
+                if self._should_split(shard.since, remaining_until):
+                    for part in split_range(shard.since, remaining_until, 2):
+                        self._queue.put_nowait(part)
+                    return
+        finally:
+            await pages.aclose()
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from app.utils.helpers import AccountType
+from app.utils.serialization import json_dumps, json_loads
+
+logger = logging.getLogger("up_bank_api")
+
+
+def make_cache_key(account_type: AccountType, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build a stable cache key from an account type, endpoint and query parameters."""
+    key = f"{account_type.value}:{endpoint}"
+    if params:
+        key += "?" + urlencode(sorted(params.items()))
+    return key
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface for ``ResponseCache``.
+
+    Values must be JSON-compatible so that backends shared between
+    processes can serialise them.
+    """
+
+    # True when other worker processes see the same entries
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, or None if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ``ttl`` seconds."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a value, returning True if it was present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every value."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of stored values, including any not yet purged after expiry."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process cache with per-entry TTLs and least-recently-used eviction."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache kept in a SQLite file so every worker process shares its hits.
+
+    Expiry uses wall-clock time, since monotonic clocks are not comparable
+    between processes. Reads do not write, so instead of least-recently-used
+    eviction the entries closest to expiry are dropped when the table grows
+    past ``max_entries``; expired and surplus rows are purged every
+    ``PURGE_EVERY`` writes. Calls block on SQLite directly: a WAL-mode lookup
+    on a local file is cheaper than handing it to a thread. So that another
+    worker's write cannot stall the event loop, a lock is waited on for only
+    ``BUSY_TIMEOUT_MS``; a read that times out is a miss and a write is
+    skipped.
+    """
+
+    shared = True
+    PURGE_EVERY = 64
+    BUSY_TIMEOUT_MS = 50
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        # Last counted entries, or -1 before the first successful count
+        self._size = -1
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache "
+            "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires ON response_cache (expires_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Shared cache read for {key} treated as a miss: {e}")
+            return None
+        return json_loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = json_dumps(value)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, time.time() + ttl, data),
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._purge()
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Shared cache write for {key} skipped: {e}")
+
+    def _purge(self) -> None:
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        surplus = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+        if surplus > 0:
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY expires_at LIMIT ?)",
+                (surplus,),
+            )
+            self.evictions += surplus
+
+    def delete(self, key: str) -> bool:
+        try:
+            with self._lock:
+                return self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,)).rowcount > 0
+        except sqlite3.OperationalError as e:
+            # The entry then lives out its TTL, as it would in another worker's memory cache
+            logger.warning(f"Shared cache delete for {key} skipped: {e}")
+            return False
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM response_cache")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Shared cache clear skipped: {e}")
+
+    def size(self) -> int:
+        try:
+            with self._lock:
+                self._size = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        except sqlite3.OperationalError as e:
+            # Stats and /metrics report the last count rather than failing while another worker writes
+            logger.debug(f"Shared cache size unavailable, reporting the last count: {e}")
+        return self._size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    Caches upstream responses and coalesces concurrent identical misses.
+
+    While a key is being fetched, every other caller asking for the same key
+    waits for that single upstream call instead of issuing its own.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or MemoryCacheBackend()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for ``key``, fetching and storing it on a miss.
+
+        Args:
+            key: Cache key, usually from ``make_cache_key``
+            ttl: Seconds to keep a fetched value
+            fetch: Coroutine factory that loads the value from upstream
+            cacheable: Optional predicate; values it rejects are returned but not stored
+
+        Returns:
+            The cached or freshly fetched value
+
+        Raises:
+            Exception: Whatever ``fetch`` raised. Errors are never cached.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leading request was cancelled rather than us; fetch again ourselves
+                if inflight.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get_or_fetch(key, ttl, fetch, cacheable)
+                raise
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the future; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if ttl > 0 and (cacheable is None or cacheable(value)):
+                self.backend.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value obtained outside ``get_or_fetch``, e.g. by cache warm-up."""
+        self.backend.set(key, value, ttl)
+
+    def invalidate(self, key: str) -> bool:
+        """Drop a cached value, returning True if it was present."""
+        return self.backend.delete(key)
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and size counters for diagnostics."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.api_models import CategoryTreeNode
+from app.models.up_models import Category
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType, get_configured_account_types
+
+logger = logging.getLogger("up_bank_api")
+
+# How soon a failed refresh is retried while the previous tree is served
+REFRESH_RETRY_SECONDS = 60.0
+
+
+def _related_id(relationship: Optional[Dict[str, Any]]) -> Optional[str]:
+    data = (relationship or {}).get("data")
+    return data["id"] if data else None
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryNode:
+    """One category and its place in the tree."""
+    category: Category
+    parent_id: Optional[str]
+    children: Tuple[str, ...]
+    # Category ids from the top-level category down to this one
+    path: Tuple[str, ...]
+
+    @property
+    def id(self) -> str:
+        return self.category.id
+
+    @property
+    def name(self) -> str:
+        return self.category.attributes.name
+
+
+class CategoryTree:
+    """Up Bank's categories indexed by id, with parents, children and ancestor paths precomputed."""
+
+    def __init__(self, categories: List[Category]):
+        parents = {category.id: _related_id(category.relationships.parent) for category in categories}
+        children: Dict[str, List[str]] = {category.id: [] for category in categories}
+        for category_id, parent_id in parents.items():
+            if parent_id in children:
+                children[parent_id].append(category_id)
+
+        def path(category_id: str) -> Tuple[str, ...]:
+            ids = [category_id]
+            # Bounded by the number of categories, so a malformed cycle cannot loop forever
+            while parents.get(ids[-1]) in parents and len(ids) <= len(parents):
+                ids.append(parents[ids[-1]])
+            return tuple(reversed(ids))
+
+        self.nodes: Dict[str, CategoryNode] = {
+            category.id: CategoryNode(category, parents[category.id], tuple(children[category.id]), path(category.id))
+            for category in categories
+        }
+        self.roots = tuple(category_id for category_id, parent_id in parents.items() if parent_id not in parents)
+        self.names: Dict[str, str] = {category_id: node.name for category_id, node in self.nodes.items()}
+
+    def get(self, category_id: str) -> Optional[CategoryNode]:
+        return self.nodes.get(category_id)
+
+    def categories(self, parent: Optional[str] = None) -> List[Category]:
+        """Every category in Up's order, or only the direct children of ``parent``."""
+        if parent is None:
+            return [node.category for node in self.nodes.values()]
+        return [self.nodes[child].category for child in self.nodes[parent].children]
+
+    def as_nested(self) -> List[CategoryTreeNode]:
+        """The whole tree, top-level categories first with their subcategories nested below."""
+        def nested(category_id: str) -> CategoryTreeNode:
+            node = self.nodes[category_id]
+            return CategoryTreeNode(
+                id=node.id,
+                name=node.name,
+                parent_id=node.parent_id,
+                path=list(node.path),
+                children=[nested(child) for child in node.children],
+            )
+
+        return [nested(category_id) for category_id in self.roots]
+
+
+class CategoryIndex:
+    """
+    Holds the category tree, loaded from Up Bank on first use.
+
+    Up's categories are the same for every customer, so one tree serves
+    every token. It is reloaded after ``CATEGORY_TREE_REFRESH_SECONDS``;
+    if a reload fails the previous tree keeps being served.
+    """
+
+    def __init__(self, api_service: UpBankApiService, refresh_seconds: Optional[float] = None):
+        self.api_service = api_service
+        self.refresh_seconds = settings.category_tree_refresh_seconds if refresh_seconds is None else refresh_seconds
+        self._tree: Optional[CategoryTree] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._tree is not None and time.monotonic() < self._expires_at
+
+    async def tree(self, account_type: Optional[AccountType] = None) -> CategoryTree:
+        """
+        Get the category tree, loading it if it is missing or due for a refresh.
+
+        Args:
+            account_type: Token to load the tree with; defaults to the first configured one
+
+        Raises:
+            ValueError: If no token is configured
+        """
+        if self._is_fresh():
+            return self._tree
+        async with self._lock:
+            # Concurrent callers wait for one load instead of each fetching the categories
+            if self._is_fresh():
+                return self._tree
+            if account_type is None:
+                configured = get_configured_account_types()
+                if not configured:
+                    raise ValueError("No Up Bank API token is configured")
+                account_type = configured[0]
+            try:
+                response = await self.api_service.get_categories(account_type)
+            except Exception as e:
+                if self._tree is None:
+                    raise
+                logger.warning(f"Category tree refresh failed, serving the previous tree: {e}")
+                self._expires_at = time.monotonic() + min(self.refresh_seconds, REFRESH_RETRY_SECONDS)
+                return self._tree
+            self._tree = CategoryTree(response.data)
+            self._expires_at = time.monotonic() + self.refresh_seconds
+            logger.info(f"Loaded the category tree: {len(self._tree.nodes)} categories")
+            return self._tree
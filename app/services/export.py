@@ -0,0 +1,331 @@
+"""
+Flat, columnar export of transactions.
+
+Transactions are read page by page from Up Bank or the local store,
+reduced to ``LeanTransaction`` and written in batches of
+``EXPORT_BATCH_SIZE`` rows: one Parquet row group, one Arrow IPC record
+batch or one block of CSV lines per batch. Only the current batch is held
+in memory, so exporting years of history uses as much memory as exporting
+a month. Parquet and Arrow need the optional ``pyarrow`` package, which is
+imported on first use.
+"""
+import asyncio
+import csv
+import io
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.api_models import ExportFormat
+from app.models.lean_models import LeanTransaction, format_base_units, lean_transactions
+from app.services.transaction_store import TransactionStore
+from app.services.up_api_service import UpBankApiService
+from app.utils.fieldsets import FLAT_FIELDS
+from app.utils.helpers import AccountType
+
+pa: Any = None
+pq: Any = None
+_pyarrow_loaded = False
+
+T = TypeVar("T")
+
+# The same columns as format=flat transaction responses
+COLUMNS = tuple(FLAT_FIELDS)
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+FILE_EXTENSIONS = {
+    ExportFormat.CSV: "csv",
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.ARROW: "arrows",
+}
+
+
+def _load_pyarrow() -> Any:
+    """Import the optional pyarrow dependency on first use; None if it is not installed."""
+    global pa, pq, _pyarrow_loaded
+    if not _pyarrow_loaded:
+        _pyarrow_loaded = True
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:  # pragma: no cover - optional dependency
+            pyarrow = None
+        pa = pyarrow
+        pq = pyarrow.parquet if pyarrow is not None else None
+    return pa
+
+
+def flatten(txn: LeanTransaction) -> Tuple[Any, ...]:
+    """One export row, in ``COLUMNS`` order."""
+    foreign = txn.foreign_amount
+    return (
+        txn.id,
+        txn.account_id,
+        txn.transfer_account_id,
+        txn.status,
+        txn.description,
+        format_base_units(txn.amount_base_units),
+        txn.amount_base_units,
+        txn.currency_code,
+        foreign.value_in_base_units if foreign else None,
+        foreign.currency_code if foreign else None,
+        txn.category_id,
+        txn.parent_category_id,
+        txn.created_at,
+        txn.settled_at,
+        txn.tag_ids,
+    )
+
+
+class Encoder(ABC):
+    """Encodes batches of transactions into one export file, returning the bytes produced so far."""
+
+    @abstractmethod
+    def write_batch(self, transactions: List[LeanTransaction]) -> bytes:
+        """Encode one batch of transactions."""
+
+    @abstractmethod
+    def close(self) -> bytes:
+        """Finish the file."""
+
+
+class CsvEncoder(Encoder):
+    """CSV with a header row. Timestamps keep Up's offsets and tags are joined with ``|``."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(COLUMNS)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def write_batch(self, transactions: List[LeanTransaction]) -> bytes:
+        for txn in transactions:
+            row = flatten(txn)
+            self._writer.writerow(row[:-1] + ("|".join(row[-1]),))
+        return self._drain()
+
+    def close(self) -> bytes:
+        return self._drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """A write-only stream handing back what was written since the last drain, with absolute positions."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer, so this must not reset on drain
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def arrow_schema() -> Any:
+    """The Arrow schema of an export. Timestamps are converted to UTC."""
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("id", pa.string()),
+        ("account_id", pa.string()),
+        ("transfer_account_id", pa.string()),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("description", pa.string()),
+        ("amount", pa.string()),
+        ("amount_base_units", pa.int64()),
+        ("currency_code", pa.dictionary(pa.int8(), pa.string())),
+        ("foreign_amount_base_units", pa.int64()),
+        ("foreign_currency_code", pa.string()),
+        ("category_id", pa.dictionary(pa.int16(), pa.string())),
+        ("parent_category_id", pa.dictionary(pa.int16(), pa.string())),
+        ("created_at", timestamp),
+        ("settled_at", timestamp),
+        ("tags", pa.list_(pa.string())),
+    ])
+
+
+def _utc(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value).astimezone(timezone.utc) if value else None
+
+
+class ArrowEncoder(Encoder):
+    """Parquet (one row group per batch) or the Arrow IPC stream format (one record batch per batch)."""
+
+    def __init__(self, export_format: ExportFormat):
+        self.schema = arrow_schema()
+        self._sink = _ChunkSink()
+        if export_format == ExportFormat.PARQUET:
+            self._writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_stream(pa.PythonFile(self._sink, mode="w"), self.schema)
+
+    def write_batch(self, transactions: List[LeanTransaction]) -> bytes:
+        columns = list(zip(*(flatten(txn) for txn in transactions)))
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = columns[index]
+            if field.name in ("created_at", "settled_at"):
+                values = [_utc(value) for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if isinstance(self._writer, pq.ParquetWriter):
+            self._writer.write_batch(batch, row_group_size=len(transactions))
+        else:
+            self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def create_encoder(export_format: ExportFormat) -> Encoder:
+    """
+    Create the encoder for an export format.
+
+    Raises:
+        HTTPException: 503 if the format needs pyarrow and it is not installed
+    """
+    if export_format == ExportFormat.CSV:
+        return CsvEncoder()
+    if _load_pyarrow() is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{export_format.value} export needs the optional pyarrow package. Install it with: pip install 'up-bank-local-api[export]'",
+        )
+    return ArrowEncoder(export_format)
+
+
+async def upstream_pages(
+    api_service: UpBankApiService,
+    account_type: AccountType,
+    account_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Transaction resources from Up Bank, one page at a time."""
+    pages = api_service.iter_transaction_pages(
+        account_type, account_id=account_id, since=since, until=until, page_size=100, prefetch=True
+    )
+    try:
+        async for page in pages:
+            yield page.get("data") or []
+    finally:
+        await pages.aclose()
+
+
+async def local_pages(
+    store: TransactionStore,
+    account_type: AccountType,
+    account_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page_size: int = 1000,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Transaction resources from the local store, one keyset page at a time."""
+    cursor = None
+    while True:
+        transactions, cursor = await asyncio.to_thread(
+            store.query_transactions,
+            account_type,
+            account_id=account_id,
+            since=since,
+            until=until,
+            page_size=page_size,
+            page_cursor=cursor,
+        )
+        yield transactions
+        if cursor is None:
+            return
+
+
+async def started(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Fetch the first item now and return an iterator over all of them.
+
+    Used before a streaming response begins, so that authentication and
+    filter errors are still reported with their status code.
+    """
+    try:
+        first = await anext(items)
+    except StopAsyncIteration:
+        return _empty()
+    except BaseException:
+        await items.aclose()
+        raise
+
+    async def chained() -> AsyncIterator[T]:
+        try:
+            yield first
+            async for item in items:
+                yield item
+        finally:
+            await items.aclose()
+
+    return chained()
+
+
+async def _empty() -> AsyncIterator[Any]:
+    return
+    yield
+
+
+async def encode_export(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    export_format: ExportFormat,
+    batch_size: Optional[int] = None,
+    encoder: Optional[Encoder] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encode pages of transaction resources into an export file, yielding it in chunks.
+
+    Args:
+        pages: Pages of Up Bank transaction resources
+        export_format: File format to produce
+        batch_size: Rows per row group, record batch or CSV chunk; defaults to ``EXPORT_BATCH_SIZE``
+        encoder: An encoder created beforehand with ``create_encoder``
+    """
+    batch_size = batch_size or settings.export_batch_size
+    encoder = encoder or create_encoder(export_format)
+    batch: List[LeanTransaction] = []
+    try:
+        async for resources in pages:
+            batch.extend(lean_transactions(resources))
+            while len(batch) >= batch_size:
+                chunk, batch = batch[:batch_size], batch[batch_size:]
+                # Encoding a full batch takes long enough to stall other requests
+                data = await asyncio.to_thread(encoder.write_batch, chunk)
+                if data:
+                    yield data
+        if batch:
+            yield await asyncio.to_thread(encoder.write_batch, batch)
+        yield encoder.close()
+    finally:
+        await pages.aclose()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+from app.models.api_models import AccountTypeError
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+
+def _error_for(outcome: BaseException) -> Tuple[int, str]:
+    """Map a failed call to the status code and detail to report for it."""
+    if isinstance(outcome, HTTPException):
+        return outcome.status_code, str(outcome.detail)
+    if isinstance(outcome, ValueError):
+        return 400, str(outcome)
+    return 500, str(outcome)
+
+
+async def fan_out(
+    account_types: Iterable[AccountType],
+    call: Callable[[AccountType], Awaitable[T]],
+) -> Tuple[Dict[AccountType, T], List[AccountTypeError]]:
+    """
+    Run ``call`` for every account type concurrently.
+
+    A failure for one account type does not cancel the others, so total
+    latency is that of the slowest call rather than the sum of all of them.
+
+    Args:
+        account_types: The account types to query
+        call: Coroutine function taking an account type
+
+    Returns:
+        Results for the account types that succeeded, and an error for each one that failed
+    """
+    account_types = list(account_types)
+    outcomes = await asyncio.gather(*(call(account_type) for account_type in account_types), return_exceptions=True)
+
+    results: Dict[AccountType, T] = {}
+    errors: List[AccountTypeError] = []
+    for account_type, outcome in zip(account_types, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            status_code, detail = _error_for(outcome)
+            if status_code == 500:
+                logger.error(f"Unexpected error querying {account_type.value}: {outcome}")
+            errors.append(AccountTypeError(account_type=account_type, status_code=status_code, detail=detail))
+        else:
+            results[account_type] = outcome
+    return results, errors
+
+
+async def fetch_many(
+    keys: Iterable[K],
+    call: Callable[[K], Awaitable[T]],
+    max_concurrency: int,
+) -> Tuple[Dict[K, T], Dict[K, Tuple[int, str]]]:
+    """
+    Run ``call`` for every key concurrently, at most ``max_concurrency`` at a time.
+
+    Like ``fan_out``, one failure does not cancel the other calls.
+
+    Args:
+        keys: The keys to fetch, e.g. transaction IDs
+        call: Coroutine function taking a key
+        max_concurrency: Maximum calls in flight at once
+
+    Returns:
+        Results for the keys that succeeded, and the status code and detail for each one that failed
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(key: K) -> T:
+        async with semaphore:
+            return await call(key)
+
+    keys = list(keys)
+    outcomes = await asyncio.gather(*(bounded(key) for key in keys), return_exceptions=True)
+
+    results: Dict[K, T] = {}
+    errors: Dict[K, Tuple[int, str]] = {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            errors[key] = _error_for(outcome)
+            if errors[key][0] == 500:
+                logger.error(f"Unexpected error fetching {key}: {outcome}")
+        else:
+            results[key] = outcome
+    return results, errors
@@ -0,0 +1,79 @@
+import importlib.util
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.utils.helpers import AccountType, format_headers, get_token_for_account
+
+logger = logging.getLogger("up_bank_api")
+
+# Ask Up for gzip, which httpx decodes without optional packages
+UPSTREAM_ACCEPT_ENCODING = "gzip"
+
+
+def http2_available() -> bool:
+    """Return True if the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class UpBankClientPool:
+    """
+    Long-lived HTTP clients for the Up Bank API, one per account type.
+
+    Each client keeps its own keep-alive connection pool and carries the
+    authorization headers for its token, so repeated requests reuse both the
+    TCP/TLS connection and the pre-built headers.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.base_url = (base_url or settings.up_api_base_url).rstrip("/") + "/"
+        self.limits = limits or httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        self.timeout = timeout or httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+
+        if http2 is None:
+            http2 = settings.http2_enabled
+        if http2 and not http2_available():
+            logger.info("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
+        self._clients: Dict[AccountType, httpx.AsyncClient] = {}
+
+    def get_client(self, account_type: AccountType) -> httpx.AsyncClient:
+        """
+        Get the shared client for an account type, creating it on first use.
+
+        Raises:
+            ValueError: If no token is configured for the account type
+        """
+        client = self._clients.get(account_type)
+        if client is None or client.is_closed:
+            token = get_token_for_account(account_type)
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={**format_headers(token), "Accept-Encoding": UPSTREAM_ACCEPT_ENCODING},
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+            self._clients[account_type] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client and release their connections."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
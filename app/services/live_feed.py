@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import secrets
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Metric
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+from app.utils.serialization import json_dumps
+
+logger = logging.getLogger("up_bank_api")
+
+
+@dataclass
+class LiveEvent:
+    """A change to one transaction, encoded once and shared by every subscriber."""
+    id: str
+    event: str
+    data: bytes
+
+    def encode(self) -> bytes:
+        """The event in Server-Sent Events wire format."""
+        return b"id: %s\nevent: %s\ndata: %s\n\n" % (self.id.encode(), self.event.encode(), self.data)
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """One connected client: events missed before it connected, then a bounded queue of new ones."""
+    queue: "asyncio.Queue[LiveEvent]"
+    backlog: List[LiveEvent] = field(default_factory=list)
+    # Set when the client's Last-Event-ID can no longer be resumed from
+    reset: bool = False
+    # Set when the client fell behind and its queue overflowed
+    lagged: bool = False
+
+
+def _related_id(resource: Dict[str, Any], name: str) -> Optional[str]:
+    data = ((resource.get("relationships") or {}).get(name) or {}).get("data")
+    return data["id"] if data else None
+
+
+def change_key(txn: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    The parts of a transaction a client would notice changing.
+
+    Compared instead of the serialized resource, so the same transaction
+    reported in slightly different shapes (a poll and a webhook delivery)
+    is not taken for a change.
+    """
+    attributes = txn["attributes"]
+    return (
+        attributes["status"],
+        attributes.get("settledAt"),
+        attributes["amount"]["valueInBaseUnits"],
+        attributes["description"],
+        _related_id(txn, "category"),
+        tuple(tag["id"] for tag in ((txn.get("relationships") or {}).get("tags") or {}).get("data") or []),
+    )
+
+
+class TokenFeed:
+    """
+    Detects transaction changes for one account type and fans them out.
+
+    A single poller re-reads the newest page of transactions and diffs it
+    against a snapshot of what it saw last time, so the upstream cost is one
+    request per interval however many clients are subscribed. Verified
+    webhook deliveries are diffed the same way, so a change reported by both
+    is only published once. The most recent events are kept so a client
+    reconnecting with ``Last-Event-ID`` receives what it missed.
+    """
+
+    def __init__(self, api_service: UpBankApiService, account_type: AccountType):
+        self.api_service = api_service
+        self.account_type = account_type
+        # Event ids from another process or an earlier run cannot be resumed from
+        self.epoch = secrets.token_hex(4)
+        self.sequence = 0
+        self.history: Deque[Tuple[int, LiveEvent]] = deque(maxlen=settings.live_replay_events)
+        self.subscribers: Set[Subscriber] = set()
+        # Transaction id -> (createdAt, change_key) for the window last polled
+        self.snapshot: Dict[str, Tuple[datetime, Tuple[Any, ...]]] = {}
+        # The first poll only records what exists; without polling every webhook is news
+        self.primed = settings.live_poll_interval_seconds <= 0
+        self.published = 0
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        """Register a subscriber, replaying events after ``last_event_id`` if they are still held."""
+        subscriber = Subscriber(asyncio.Queue(maxsize=settings.live_queue_size))
+        if last_event_id is not None:
+            replay = self._events_after(last_event_id)
+            if replay is None:
+                subscriber.reset = True
+            else:
+                subscriber.backlog = replay
+        self.subscribers.add(subscriber)
+        if self._task is None and settings.live_poll_interval_seconds > 0:
+            self._task = asyncio.create_task(self._poll_periodically())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber, stopping the poller when nobody is listening."""
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # The snapshot goes stale while nobody listens, so the next poller re-primes
+            # instead of publishing everything that changed meanwhile as live events
+            self.snapshot = {}
+            self.primed = settings.live_poll_interval_seconds <= 0
+
+    def _events_after(self, last_event_id: str) -> Optional[List[LiveEvent]]:
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        after = int(sequence)
+        oldest = self.history[0][0] if self.history else self.sequence + 1
+        # Events between the client's last one and the oldest kept have been lost
+        if after < oldest - 1 or after > self.sequence:
+            return None
+        return [event for number, event in self.history if number > after]
+
+    def _publish(self, event_type: str, resource: bytes) -> None:
+        self.sequence += 1
+        data = b'{"account_type":"%s","data":%s}' % (self.account_type.value.encode(), resource)
+        event = LiveEvent(f"{self.epoch}-{self.sequence}", event_type, data)
+        self.history.append((self.sequence, event))
+        self.published += 1
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Never block the feed on one slow client: it reconnects and resumes from history
+                subscriber.lagged = True
+                self.subscribers.discard(subscriber)
+                self.dropped += 1
+                logger.warning(f"Dropped a slow live feed subscriber for {self.account_type.value}")
+
+    def apply(self, transactions: Iterable[Dict[str, Any]]) -> None:
+        """Publish created, settled and updated events for transactions that differ from the snapshot."""
+        for txn in transactions:
+            key = change_key(txn)
+            previous = self.snapshot.get(txn["id"])
+            if previous is not None and previous[1] == key:
+                continue
+            self.snapshot[txn["id"]] = (datetime.fromisoformat(txn["attributes"]["createdAt"]), key)
+            if not self.primed:
+                continue
+            encoded = json_dumps(txn)
+            if previous is None:
+                self._publish("created", encoded)
+            elif previous[1][0] == "HELD" and key[0] == "SETTLED":
+                self._publish("settled", encoded)
+            else:
+                self._publish("updated", encoded)
+
+    def remove(self, transaction_id: str) -> None:
+        """Publish a deleted event for a transaction."""
+        self.snapshot.pop(transaction_id, None)
+        if self.primed:
+            self._publish("deleted", json_dumps({"type": "transactions", "id": transaction_id}))
+
+    def _diff_page(self, transactions: List[Dict[str, Any]], complete: bool) -> None:
+        self.apply(transactions)
+        current = {txn["id"] for txn in transactions}
+        # Older transactions pushed off the page are forgotten; newer ones missing were deleted
+        oldest = None if complete else min(
+            (self.snapshot[transaction_id][0] for transaction_id in current), default=None
+        )
+        for transaction_id, (created_at, _) in list(self.snapshot.items()):
+            if transaction_id in current:
+                continue
+            if oldest is None or created_at > oldest:
+                self.remove(transaction_id)
+            else:
+                del self.snapshot[transaction_id]
+        self.primed = True
+
+    async def poll(self) -> None:
+        """Read the newest page of transactions and publish what changed since the last poll."""
+        pages = self.api_service.iter_transaction_pages(self.account_type, page_size=settings.live_page_size)
+        try:
+            page = await anext(pages)
+        finally:
+            await pages.aclose()
+        self._diff_page(page.get("data") or [], complete=not (page.get("links") or {}).get("next"))
+
+    async def _poll_periodically(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live feed poll for {self.account_type.value} failed: {e}")
+            await asyncio.sleep(settings.live_poll_interval_seconds)
+
+    async def stop(self) -> None:
+        """Cancel the poller."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class LiveFeed:
+    """The live transaction feeds of every account type, created on first subscription."""
+
+    def __init__(self, api_service: UpBankApiService):
+        self.api_service = api_service
+        self.feeds: Dict[AccountType, TokenFeed] = {}
+
+    def feed(self, account_type: AccountType) -> TokenFeed:
+        if account_type not in self.feeds:
+            self.feeds[account_type] = TokenFeed(self.api_service, account_type)
+        return self.feeds[account_type]
+
+    def apply(self, account_type: AccountType, transactions: Iterable[Dict[str, Any]]) -> None:
+        """Feed transactions delivered by a webhook to the account type's live feed, if it has one."""
+        if account_type in self.feeds:
+            self.feeds[account_type].apply(transactions)
+
+    def remove(self, account_type: AccountType, transaction_id: str) -> None:
+        """Report a transaction deleted by a webhook to the account type's live feed, if it has one."""
+        if account_type in self.feeds:
+            self.feeds[account_type].remove(transaction_id)
+
+    async def stop(self) -> None:
+        """Cancel every poller."""
+        await asyncio.gather(*(feed.stop() for feed in self.feeds.values()))
+
+    def collect_metrics(self) -> List[Metric]:
+        """Scrape-time metrics for subscribers and published events."""
+        subscribers = Gauge("live_subscribers", "Clients connected to the live transaction feed", ["account_type"])
+        events = Counter("live_events_total", "Live transaction feed events published", ["account_type"])
+        dropped = Counter("live_dropped_subscribers_total", "Live feed clients dropped for falling behind", ["account_type"])
+        for account_type, feed in self.feeds.items():
+            subscribers.set(len(feed.subscribers), account_type=account_type.value)
+            events.inc(feed.published, account_type=account_type.value)
+            dropped.inc(feed.dropped, account_type=account_type.value)
+        return [subscribers, events, dropped]
@@ -0,0 +1,698 @@
+import base64
+import json
+import logging
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    account_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    settled_at REAL,
+    category_id TEXT,
+    parent_category_id TEXT,
+    amount_base_units INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    raw_text TEXT NOT NULL DEFAULT '',
+    foreign_amount_base_units INTEGER,
+    round_up_base_units INTEGER,
+    settled_date TEXT,
+    PRIMARY KEY (account_type, id)
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_created
+    ON transactions (account_type, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_transactions_account_created
+    ON transactions (account_type, account_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_transactions_status
+    ON transactions (account_type, status);
+CREATE INDEX IF NOT EXISTS ix_transactions_amount
+    ON transactions (account_type, amount_base_units, id);
+CREATE TABLE IF NOT EXISTS transaction_tags (
+    account_type TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    tag_id TEXT NOT NULL,
+    PRIMARY KEY (account_type, transaction_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS ix_transaction_tags_tag
+    ON transaction_tags (account_type, tag_id);
+CREATE TRIGGER IF NOT EXISTS transactions_tags_delete AFTER DELETE ON transactions BEGIN
+    DELETE FROM transaction_tags WHERE account_type = old.account_type AND transaction_id = old.id;
+END;
+CREATE TABLE IF NOT EXISTS webhooks (
+    id TEXT PRIMARY KEY,
+    account_type TEXT NOT NULL,
+    secret_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_type TEXT PRIMARY KEY,
+    high_water_mark REAL,
+    last_synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS balance_history (
+    account_type TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    net_base_units INTEGER NOT NULL,
+    cumulative_base_units INTEGER NOT NULL,
+    PRIMARY KEY (account_type, account_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS balance_history_dirty (
+    account_type TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    from_day TEXT NOT NULL,
+    PRIMARY KEY (account_type, account_id)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+# Inverted index over description and raw text, kept in sync with the transactions table by triggers
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+    description, raw_text, content='transactions', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts (rowid, description, raw_text) VALUES (new.rowid, new.description, new.raw_text);
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, description, raw_text)
+    VALUES ('delete', old.rowid, old.description, old.raw_text);
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, raw_text ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, description, raw_text)
+    VALUES ('delete', old.rowid, old.description, old.raw_text);
+    INSERT INTO transactions_fts (rowid, description, raw_text) VALUES (new.rowid, new.description, new.raw_text);
+END;
+"""
+
+# Marks the earliest settled day whose balance history must be recomputed; created after
+# migrations because it needs the settled_date column
+BALANCE_HISTORY_SCHEMA = """
+CREATE INDEX IF NOT EXISTS ix_transactions_settled_date
+    ON transactions (account_type, account_id, settled_date) WHERE status = 'SETTLED';
+CREATE TRIGGER IF NOT EXISTS transactions_balance_insert AFTER INSERT ON transactions
+WHEN new.status = 'SETTLED' BEGIN
+    INSERT INTO balance_history_dirty (account_type, account_id, from_day)
+    VALUES (new.account_type, new.account_id, coalesce(new.settled_date, ''))
+    ON CONFLICT (account_type, account_id) DO UPDATE SET from_day = min(from_day, excluded.from_day);
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_balance_update AFTER UPDATE ON transactions
+WHEN (old.status = 'SETTLED' OR new.status = 'SETTLED') AND (
+    old.status IS NOT new.status OR old.amount_base_units IS NOT new.amount_base_units
+    OR old.settled_date IS NOT new.settled_date OR old.account_id IS NOT new.account_id
+) BEGIN
+    INSERT INTO balance_history_dirty (account_type, account_id, from_day)
+    SELECT old.account_type, old.account_id, coalesce(old.settled_date, '') WHERE old.status = 'SETTLED'
+    ON CONFLICT (account_type, account_id) DO UPDATE SET from_day = min(from_day, excluded.from_day);
+    INSERT INTO balance_history_dirty (account_type, account_id, from_day)
+    SELECT new.account_type, new.account_id, coalesce(new.settled_date, '') WHERE new.status = 'SETTLED'
+    ON CONFLICT (account_type, account_id) DO UPDATE SET from_day = min(from_day, excluded.from_day);
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_balance_delete AFTER DELETE ON transactions
+WHEN old.status = 'SETTLED' BEGIN
+    INSERT INTO balance_history_dirty (account_type, account_id, from_day)
+    VALUES (old.account_type, old.account_id, coalesce(old.settled_date, ''))
+    ON CONFLICT (account_type, account_id) DO UPDATE SET from_day = min(from_day, excluded.from_day);
+END;
+"""
+
+SCHEMA_VERSION = 2
+
+# Columns added after the first release, for databases created before them
+ADDED_COLUMNS = {
+    "raw_text": "raw_text TEXT NOT NULL DEFAULT ''",
+    "foreign_amount_base_units": "foreign_amount_base_units INTEGER",
+    "round_up_base_units": "round_up_base_units INTEGER",
+    "settled_date": "settled_date TEXT",
+}
+
+# Sort keys accepted by ``query_transactions``; prefix with "-" for descending
+SORT_COLUMNS = {"created_at": "created_at", "amount": "amount_base_units"}
+
+COLUMNS = (
+    "account_type", "id", "account_id", "status", "created_at", "settled_at", "category_id",
+    "parent_category_id", "amount_base_units", "description", "payload", "raw_text",
+    "foreign_amount_base_units", "round_up_base_units", "settled_date",
+)
+UPSERT_SQL = (
+    f"INSERT INTO transactions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+    f"ON CONFLICT (account_type, id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[2:])
+)
+
+
+def to_timestamp(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _relationship_id(relationships: Dict[str, Any], name: str) -> Optional[str]:
+    data = (relationships.get(name) or {}).get("data")
+    return data.get("id") if data else None
+
+
+def _base_units(money: Optional[Dict[str, Any]]) -> Optional[int]:
+    return money["valueInBaseUnits"] if money else None
+
+
+def _search_terms(search: str) -> List[str]:
+    return re.findall(r"\w+", search.lower())
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(position: float, transaction_id: str) -> str:
+    """Encode a keyset position (sort key value and id) as an opaque page cursor."""
+    return base64.urlsafe_b64encode(json.dumps([position, transaction_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a page cursor created by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        position, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(position), str(transaction_id)
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor: {cursor}") from e
+
+
+class TransactionStore:
+    """
+    Persistent local copy of Up Bank transactions backed by SQLite.
+
+    Rows are keyed by (account type, transaction id) so each token only sees
+    what Up returned for it. The raw JSON:API resource is kept alongside a few
+    indexed columns used for filtering and ordering, a tag table and, when
+    SQLite has FTS5, a full-text index over descriptions. Several worker
+    processes may open the same file; leases let one of them own background
+    work. All methods are blocking; call them through ``asyncio.to_thread``
+    from async code.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Identifies this process when holding leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Other workers' writes hold the lock briefly; wait for them instead of failing
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(BALANCE_HISTORY_SCHEMA)
+        self.full_text_search = self._create_search_index()
+
+    def _migrate(self) -> None:
+        """Bring a database created by an older version up to ``SCHEMA_VERSION``."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self._conn:
+            # Take the write lock before re-checking, so workers starting together migrate only once
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(transactions)")}
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE transactions ADD COLUMN {definition}")
+            if version < 1:
+                self._conn.execute(
+                    "UPDATE transactions SET "
+                    "raw_text = coalesce(json_extract(payload, '$.attributes.rawText'), ''), "
+                    "foreign_amount_base_units = json_extract(payload, '$.attributes.foreignAmount.valueInBaseUnits'), "
+                    "round_up_base_units = json_extract(payload, '$.attributes.roundUp.amount.valueInBaseUnits')"
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO transaction_tags (account_type, transaction_id, tag_id) "
+                    "SELECT t.account_type, t.id, json_extract(tag.value, '$.id') "
+                    "FROM transactions t, json_each(t.payload, '$.relationships.tags.data') tag"
+                )
+            if version < 2:
+                self._conn.execute(
+                    "UPDATE transactions SET settled_date = substr(json_extract(payload, '$.attributes.settledAt'), 1, 10) "
+                    "WHERE settled_at IS NOT NULL"
+                )
+                # Build every account's balance history on first use
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO balance_history_dirty (account_type, account_id, from_day) "
+                    "SELECT account_type, account_id, coalesce(MIN(settled_date), '') FROM transactions "
+                    "WHERE status = 'SETTLED' GROUP BY account_type, account_id"
+                )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _create_search_index(self) -> bool:
+        """Create the full-text index if SQLite supports FTS5, returning whether it is available."""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+        ).fetchone()
+        try:
+            self._conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 is unavailable ({e}); searching descriptions without an index")
+            return False
+        if not exists:
+            with self._conn:
+                self._conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+        return True
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def upsert_transactions(self, account_type: AccountType, transactions: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace raw transaction resources, returning how many were written."""
+        rows = []
+        tags = []
+        for txn in transactions:
+            attributes = txn["attributes"]
+            relationships = txn.get("relationships") or {}
+            settled_at = attributes.get("settledAt")
+            round_up = attributes.get("roundUp")
+            rows.append((
+                account_type.value,
+                txn["id"],
+                _relationship_id(relationships, "account") or "",
+                attributes["status"],
+                to_timestamp(datetime.fromisoformat(attributes["createdAt"])),
+                to_timestamp(datetime.fromisoformat(settled_at)) if settled_at else None,
+                _relationship_id(relationships, "category"),
+                _relationship_id(relationships, "parentCategory"),
+                attributes["amount"]["valueInBaseUnits"],
+                attributes.get("description") or "",
+                json.dumps(txn, separators=(",", ":")),
+                attributes.get("rawText") or "",
+                _base_units(attributes.get("foreignAmount")),
+                _base_units(round_up.get("amount")) if round_up else None,
+                # Up's local date, so history days follow the account holder's timezone
+                settled_at[:10] if settled_at else None,
+            ))
+            tags.extend(
+                (account_type.value, txn["id"], tag["id"])
+                for tag in (relationships.get("tags") or {}).get("data") or []
+            )
+        if not rows:
+            return 0
+        with self._lock:
+            with self._conn:
+                # An upsert rather than INSERT OR REPLACE so the search index triggers see an update
+                self._conn.executemany(UPSERT_SQL, rows)
+                self._conn.executemany(
+                    "DELETE FROM transaction_tags WHERE account_type = ? AND transaction_id = ?",
+                    [(account_type.value, row[1]) for row in rows],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO transaction_tags (account_type, transaction_id, tag_id) VALUES (?, ?, ?)",
+                    tags,
+                )
+            self._writes += 1
+        return len(rows)
+
+    def delete_transactions(self, account_type: AccountType, transaction_ids: Iterable[str]) -> int:
+        """Delete transactions by id, returning how many were removed."""
+        ids = [(account_type.value, transaction_id) for transaction_id in transaction_ids]
+        with self._lock:
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany("DELETE FROM transactions WHERE account_type = ? AND id = ?", ids)
+            self._writes += 1
+            return self._conn.total_changes - before
+
+    def get_transaction(self, account_type: AccountType, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Get a raw transaction resource by id, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM transactions WHERE account_type = ? AND id = ?",
+                (account_type.value, transaction_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_settled_transactions(self, account_type: AccountType, transaction_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the stored settled transactions among ``transaction_ids``, keyed by id."""
+        transaction_ids = list(transaction_ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(transaction_ids), 500):
+            chunk = transaction_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, payload FROM transactions "
+                    f"WHERE account_type = ? AND status = 'SETTLED' AND id IN ({placeholders})",
+                    (account_type.value, *chunk),
+                ).fetchall()
+            found.update((transaction_id, json.loads(payload)) for transaction_id, payload in rows)
+        return found
+
+    def query_transactions(
+        self,
+        account_type: AccountType,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 20,
+        page_cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        amount_min: Optional[int] = None,
+        amount_max: Optional[int] = None,
+        foreign: Optional[bool] = None,
+        round_up: Optional[bool] = None,
+        tag: Optional[str] = None,
+        sort: str = "-created_at",
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Query stored transactions, with Up's filters and several Up does not support.
+
+        Args:
+            account_type: The account type whose transactions to read
+            account_id: Only return transactions for this account
+            since: Only return transactions created at or after this time
+            until: Only return transactions created before this time
+            category: Only return transactions in this category
+            status: Only return transactions with this status
+            page_size: Maximum number of transactions to return
+            page_cursor: Cursor returned by a previous call with the same sort
+            search: Only return transactions whose description or raw text has words starting with every word given
+            amount_min: Only return transactions of at least this amount in base units (spending is negative)
+            amount_max: Only return transactions of at most this amount in base units
+            foreign: Only return transactions with (True) or without (False) a foreign amount
+            round_up: Only return transactions with (True) or without (False) a round-up
+            tag: Only return transactions with this tag
+            sort: ``created_at`` or ``amount``, prefixed with ``-`` for descending
+
+        Returns:
+            The raw transaction resources and the cursor for the next page, if any
+
+        Raises:
+            ValueError: If the page cursor or sort is invalid
+        """
+        descending = sort.startswith("-")
+        sort_column = SORT_COLUMNS.get(sort.lstrip("-"))
+        if sort_column is None:
+            raise ValueError(f"Unsupported sort: {sort}. Use one of: {', '.join(SORT_COLUMNS)}")
+
+        clauses = ["account_type = ?"]
+        args: List[Any] = [account_type.value]
+        if account_id:
+            clauses.append("account_id = ?")
+            args.append(account_id)
+        if since:
+            clauses.append("created_at >= ?")
+            args.append(to_timestamp(since))
+        if until:
+            clauses.append("created_at < ?")
+            args.append(to_timestamp(until))
+        if category:
+            clauses.append("category_id = ?")
+            args.append(category)
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if search and _search_terms(search):
+            if self.full_text_search:
+                clauses.append("rowid IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)")
+                args.append(" ".join(f'"{term}"*' for term in _search_terms(search)))
+            else:
+                for term in _search_terms(search):
+                    clauses.append("(description LIKE ? ESCAPE '\\' OR raw_text LIKE ? ESCAPE '\\')")
+                    args.extend([f"%{_escape_like(term)}%"] * 2)
+        if amount_min is not None:
+            clauses.append("amount_base_units >= ?")
+            args.append(amount_min)
+        if amount_max is not None:
+            clauses.append("amount_base_units <= ?")
+            args.append(amount_max)
+        if foreign is not None:
+            clauses.append(f"foreign_amount_base_units IS {'NOT ' if foreign else ''}NULL")
+        if round_up is not None:
+            clauses.append(f"round_up_base_units IS {'NOT ' if round_up else ''}NULL")
+        if tag:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM transaction_tags tt WHERE tt.account_type = transactions.account_type "
+                "AND tt.transaction_id = transactions.id AND tt.tag_id = ?)"
+            )
+            args.append(tag)
+        if page_cursor:
+            position, transaction_id = decode_cursor(page_cursor)
+            after = "<" if descending else ">"
+            clauses.append(f"({sort_column} {after} ? OR ({sort_column} = ? AND id {after} ?))")
+            args.extend([position, position, transaction_id])
+
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            f"SELECT {sort_column}, id, payload FROM transactions WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {sort_column} {direction}, id {direction} LIMIT ?"
+        )
+        args.append(page_size + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][0], rows[-1][1])
+        return [json.loads(row[2]) for row in rows], next_cursor
+
+    def change_token(self) -> Tuple[int, int]:
+        """
+        Get a value that changes whenever the stored transactions may have changed.
+
+        Combines this connection's write count with SQLite's ``data_version``,
+        which moves when another connection (e.g. another worker) commits.
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return self._writes, data_version
+
+    def index_rows(self, account_type: AccountType) -> List[Tuple[Any, ...]]:
+        """
+        Get the columns needed for analytics, oldest transaction first.
+
+        Each row is (created_at, local date as YYYY-MM-DD, amount in base units,
+        category id, parent category id, account id, status, description). The
+        local date comes from Up's own timestamp so days and months follow the
+        account holder's timezone.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT created_at, substr(json_extract(payload, '$.attributes.createdAt'), 1, 10), "
+                "amount_base_units, category_id, parent_category_id, account_id, status, description "
+                "FROM transactions WHERE account_type = ? ORDER BY created_at, id",
+                (account_type.value,),
+            ).fetchall()
+
+    def held_transactions(self, account_type: AccountType) -> List[Tuple[str, float]]:
+        """Get (id, created_at) for every stored HELD transaction."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, created_at FROM transactions WHERE account_type = ? AND status = 'HELD'",
+                (account_type.value,),
+            ).fetchall()
+
+    def get_sync_state(self, account_type: AccountType) -> Dict[str, Any]:
+        """Get the high-water mark, last sync time and row count for an account type."""
+        with self._lock:
+            state = self._conn.execute(
+                "SELECT high_water_mark, last_synced_at FROM sync_state WHERE account_type = ?",
+                (account_type.value,),
+            ).fetchone()
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM transactions WHERE account_type = ?", (account_type.value,)
+            ).fetchone()[0]
+        high_water_mark, last_synced_at = state or (None, None)
+        return {
+            "high_water_mark": high_water_mark,
+            "last_synced_at": last_synced_at,
+            "transaction_count": count,
+        }
+
+    def set_sync_state(self, account_type: AccountType, high_water_mark: Optional[float]) -> None:
+        """Record a completed sync and its new high-water mark."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (account_type, high_water_mark, last_synced_at) "
+                    "VALUES (?, ?, ?)",
+                    (account_type.value, high_water_mark, time.time()),
+                )
+
+    def save_webhook(self, account_type: AccountType, webhook_id: str, secret_key: str) -> None:
+        """Remember the secret key of a webhook registered through this API."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO webhooks (id, account_type, secret_key) VALUES (?, ?, ?)",
+                    (webhook_id, account_type.value, secret_key),
+                )
+
+    def get_webhook_secret(self, webhook_id: str) -> Optional[Tuple[AccountType, str]]:
+        """Get the account type and secret key for a stored webhook."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT account_type, secret_key FROM webhooks WHERE id = ?", (webhook_id,)
+            ).fetchone()
+        return (AccountType(row[0]), row[1]) if row else None
+
+    def delete_webhook(self, webhook_id: str) -> None:
+        """Forget a stored webhook."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM webhooks WHERE id = ?", (webhook_id,))
+
+    def acquire_lease(self, name: str, ttl: float) -> bool:
+        """
+        Take or renew a named lease for ``ttl`` seconds.
+
+        Succeeds when the lease is free, expired or already held by this
+        process, so a holder that stops renewing is replaced once it expires.
+
+        Returns:
+            True if this process now holds the lease
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                    "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                    (name, self.owner, now + ttl, now),
+                )
+                row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == self.owner
+
+    def release_lease(self, name: str) -> None:
+        """Give up a lease if this process holds it."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def refresh_balance_history(self, account_type: AccountType) -> int:
+        """
+        Bring the stored daily balance history up to date with the transactions table.
+
+        Triggers record the earliest settled day each write touched, so only
+        that day onwards is recomputed; new settlements normally just rewrite
+        the last day or two.
+
+        Returns:
+            Number of accounts whose history was recomputed
+        """
+        query = "SELECT account_id, from_day FROM balance_history_dirty WHERE account_type = ?"
+        with self._lock:
+            # Checked before taking the write lock, since usually nothing has changed
+            if not self._conn.execute(query, (account_type.value,)).fetchone():
+                return 0
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                dirty = self._conn.execute(query, (account_type.value,)).fetchall()
+                for account_id, from_day in dirty:
+                    key = (account_type.value, account_id)
+                    previous = self._conn.execute(
+                        "SELECT cumulative_base_units FROM balance_history "
+                        "WHERE account_type = ? AND account_id = ? AND day < ? ORDER BY day DESC LIMIT 1",
+                        (*key, from_day),
+                    ).fetchone()
+                    cumulative = previous[0] if previous else 0
+                    days = self._conn.execute(
+                        "SELECT settled_date, SUM(amount_base_units) FROM transactions "
+                        "WHERE account_type = ? AND account_id = ? AND status = 'SETTLED' AND settled_date >= ? "
+                        "GROUP BY settled_date ORDER BY settled_date",
+                        (*key, from_day),
+                    ).fetchall()
+                    rows = []
+                    for day, net in days:
+                        cumulative += net
+                        rows.append((*key, day, net, cumulative))
+                    self._conn.execute(
+                        "DELETE FROM balance_history WHERE account_type = ? AND account_id = ? AND day >= ?",
+                        (*key, from_day),
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO balance_history "
+                        "(account_type, account_id, day, net_base_units, cumulative_base_units) VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                self._conn.execute("DELETE FROM balance_history_dirty WHERE account_type = ?", (account_type.value,))
+        return len(dirty)
+
+    def get_balance_history(
+        self, account_type: AccountType, account_id: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Read an account's stored daily balance history.
+
+        Args:
+            account_type: Account type the account belongs to
+            account_id: Account to read
+            since: First day to include, as YYYY-MM-DD
+            until: Day to stop before, as YYYY-MM-DD
+
+        Returns:
+            ``days`` as (day, cumulative settled amount) pairs in range, oldest
+            first; ``opening``, the cumulative amount before the first of them;
+            ``total``, the cumulative amount over all settled transactions;
+            ``last_day``, the latest day with a settled transaction, or None; and
+            ``held``, the sum of amounts still on hold
+        """
+        key = (account_type.value, account_id)
+        with self._lock:
+            days = self._conn.execute(
+                "SELECT day, cumulative_base_units FROM balance_history "
+                "WHERE account_type = ? AND account_id = ? AND day >= ? AND day < ? ORDER BY day",
+                (*key, since or "", until or "9999"),
+            ).fetchall()
+            opening = self._conn.execute(
+                "SELECT cumulative_base_units FROM balance_history "
+                "WHERE account_type = ? AND account_id = ? AND day < ? ORDER BY day DESC LIMIT 1",
+                (*key, since or ""),
+            ).fetchone()
+            latest = self._conn.execute(
+                "SELECT day, cumulative_base_units FROM balance_history "
+                "WHERE account_type = ? AND account_id = ? ORDER BY day DESC LIMIT 1",
+                key,
+            ).fetchone()
+            held = self._conn.execute(
+                "SELECT COALESCE(SUM(amount_base_units), 0) FROM transactions "
+                "WHERE account_type = ? AND account_id = ? AND status = 'HELD'",
+                key,
+            ).fetchone()[0]
+        return {
+            "days": days,
+            "opening": opening[0] if opening else 0,
+            "total": latest[1] if latest else 0,
+            "last_day": latest[0] if latest else None,
+            "held": held,
+        }
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.backfill import ShardedBackfill
+from app.services.transaction_store import TransactionStore, to_timestamp
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType, get_configured_account_types
+
+logger = logging.getLogger("up_bank_api")
+
+
+class TransactionSyncService:
+    """
+    Keeps the local transaction store up to date with Up Bank.
+
+    Each sync pulls only transactions created since the account type's
+    high-water mark, widened back to the oldest HELD transaction still in the
+    store so holds are re-read until Up reports them as SETTLED. Holds that
+    Up no longer returns are re-fetched individually and dropped if gone.
+
+    When several workers share the store, only the worker holding an
+    account type's sync lease runs its background loop; the others take over
+    if that worker stops renewing it.
+    """
+
+    def __init__(
+        self,
+        api_service: UpBankApiService,
+        store: TransactionStore,
+        interval_seconds: Optional[float] = None,
+        page_size: Optional[int] = None,
+    ):
+        self.api_service = api_service
+        self.store = store
+        self.interval_seconds = interval_seconds or settings.sync_interval_seconds
+        self.page_size = page_size or settings.sync_page_size
+        self._locks: Dict[AccountType, asyncio.Lock] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def sync_account_type(self, account_type: AccountType) -> Dict[str, int]:
+        """
+        Run one incremental sync for an account type.
+
+        Concurrent calls for the same account type are serialised.
+
+        Returns:
+            Counts of upserted and removed transactions
+        """
+        lock = self._locks.setdefault(account_type, asyncio.Lock())
+        async with lock:
+            return await self._sync(account_type)
+
+    async def backfill(
+        self, account_type: AccountType, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Pull every transaction in a date range using concurrent, date-sharded cursor chains.
+
+        Concurrent syncs and backfills for the same account type are serialised.
+
+        Args:
+            account_type: The account type to backfill
+            since: Start of the range; defaults to when the oldest account was opened
+            until: End of the range; defaults to now
+
+        Returns:
+            Counts of upserted and removed transactions
+        """
+        lock = self._locks.setdefault(account_type, asyncio.Lock())
+        async with lock:
+            return await self._backfill(account_type, since, until)
+
+    async def _backfill(
+        self, account_type: AccountType, since: Optional[datetime], until: Optional[datetime]
+    ) -> Dict[str, int]:
+        if since is None:
+            # Nothing can predate the oldest account, which bounds the history to walk
+            accounts = await self.api_service.get_accounts(account_type)
+            since = min((account.attributes.created_at for account in accounts.data), default=None)
+            if since is None:
+                return {"upserted": 0, "removed": 0}
+        since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        until = until if until is None or until.tzinfo else until.replace(tzinfo=timezone.utc)
+
+        state = await asyncio.to_thread(self.store.get_sync_state, account_type)
+        high_water_mark: Optional[float] = state["high_water_mark"]
+        upserted = 0
+
+        async def on_page(transactions: List[Dict[str, Any]]) -> None:
+            nonlocal upserted, high_water_mark
+            # Await before adding: other ranges update the count while this page is written
+            written = await asyncio.to_thread(self.store.upsert_transactions, account_type, transactions)
+            upserted += written
+            if until is None:
+                for txn in transactions:
+                    created_at = to_timestamp(datetime.fromisoformat(txn["attributes"]["createdAt"]))
+                    if high_water_mark is None or created_at > high_water_mark:
+                        high_water_mark = created_at
+
+        backfill = ShardedBackfill(
+            self.api_service,
+            account_type,
+            on_page,
+            max_concurrency=settings.sync_backfill_concurrency,
+            page_size=self.page_size,
+            min_shard=timedelta(hours=settings.sync_backfill_min_shard_hours),
+        )
+        await backfill.run(since, until, settings.sync_backfill_shards)
+
+        # Only a backfill reaching the present may move the high-water mark
+        if until is None:
+            await asyncio.to_thread(self.store.set_sync_state, account_type, high_water_mark)
+        await asyncio.to_thread(self.store.refresh_balance_history, account_type)
+        return {"upserted": upserted, "removed": 0}
+
+    async def _sync(self, account_type: AccountType) -> Dict[str, int]:
+        state = await asyncio.to_thread(self.store.get_sync_state, account_type)
+        high_water_mark: Optional[float] = state["high_water_mark"]
+        if high_water_mark is None and settings.sync_backfill_shards > 1:
+            return await self._backfill(account_type, None, None)
+
+        held = dict(await asyncio.to_thread(self.store.held_transactions, account_type))
+        since_ts = high_water_mark
+        if since_ts is not None and held:
+            since_ts = min(since_ts, min(held.values()))
+        since = datetime.fromtimestamp(since_ts, tz=timezone.utc) if since_ts is not None else None
+
+        upserted = 0
+        seen: Set[str] = set()
+        pages = self.api_service.iter_transaction_pages(
+            account_type, since=since, page_size=self.page_size, prefetch=True
+        )
+        async for page in pages:
+            transactions = page.get("data") or []
+            upserted += await asyncio.to_thread(self.store.upsert_transactions, account_type, transactions)
+            for txn in transactions:
+                seen.add(txn["id"])
+                created_at = to_timestamp(datetime.fromisoformat(txn["attributes"]["createdAt"]))
+                if high_water_mark is None or created_at > high_water_mark:
+                    high_water_mark = created_at
+
+        removed = 0
+        for transaction_id in held.keys() - seen:
+            try:
+                # Up's own resource: a model dump would drop fields the stored row already has
+                response = await self.api_service.get_raw_transaction(account_type, transaction_id)
+            except HTTPException as e:
+                if e.status_code != 404:
+                    raise
+                removed += await asyncio.to_thread(self.store.delete_transactions, account_type, [transaction_id])
+            else:
+                transaction = response["data"]
+                upserted += await asyncio.to_thread(self.store.upsert_transactions, account_type, [transaction])
+
+        await asyncio.to_thread(self.store.set_sync_state, account_type, high_water_mark)
+        # Keep the stored balance history current so chart requests only read it
+        await asyncio.to_thread(self.store.refresh_balance_history, account_type)
+        logger.info(f"Synced {account_type.value}: {upserted} upserted, {removed} removed")
+        return {"upserted": upserted, "removed": removed}
+
+    @staticmethod
+    def _lease_name(account_type: AccountType) -> str:
+        return f"sync:{account_type.value}"
+
+    async def _run_periodically(self, account_type: AccountType) -> None:
+        # Outlives one interval so a slow sync does not lose the lease to another worker
+        lease_seconds = self.interval_seconds * 2
+        while True:
+            try:
+                if await asyncio.to_thread(self.store.acquire_lease, self._lease_name(account_type), lease_seconds):
+                    await self.sync_account_type(account_type)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background sync for {account_type.value} failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start one background sync loop per configured account type."""
+        for account_type in get_configured_account_types():
+            self._tasks.append(asyncio.create_task(self._run_periodically(account_type)))
+
+    async def stop(self) -> None:
+        """Cancel the background sync loops and hand their leases to another worker."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks:
+            for account_type in get_configured_account_types():
+                await asyncio.to_thread(self.store.release_lease, self._lease_name(account_type))
+        self._tasks.clear()
@@ -1,11 +1,27 @@
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union
+from urllib.parse import urlsplit
 
 import httpx
 from fastapi import HTTPException
+from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.metrics import (
+    MODEL_VALIDATION_DURATION,
+    UPSTREAM_DECODE_DURATION,
+    UPSTREAM_REQUEST_DURATION,
+    UPSTREAM_REQUESTS_IN_FLIGHT,
+    UPSTREAM_RESPONSE_BYTES,
+    UPSTREAM_RESPONSES,
+    Counter,
+    Gauge,
+    Metric,
+)
 from app.models.up_models import (
     AccountResponse,
     AccountsResponse,
@@ -13,18 +29,99 @@ from app.models.up_models import (
     CategoryResponse,
     TransactionResponse,
     TransactionsResponse,
+    WebhookEventResponse,
+    WebhookResponse,
+    WebhooksResponse,
 )
-from app.utils.helpers import AccountType, format_headers, get_token_for_account
+from app.services.cache import ResponseCache, make_cache_key
+from app.services.http_client import UpBankClientPool
+from app.services.upstream_scheduler import UpstreamScheduler
+from app.utils.helpers import AccountType
+from app.utils.serialization import json_loads
 
 logger = logging.getLogger("up_bank_api")
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Path segments naming a collection; the segment after one is an ID
+_COLLECTIONS = {"accounts", "transactions", "categories", "webhooks", "tags", "logs"}
+# Transaction pages are walked once by sync, backfill, streams and exports, so keeping
+# their payloads for revalidation would hold whole histories in memory for no benefit
+_UNVALIDATED_ENDPOINTS = {"transactions", "accounts/{id}/transactions"}
+
+
+def _endpoint_label(endpoint: str) -> str:
+    """Turn an endpoint into a metrics label with IDs replaced, e.g. ``accounts/{id}/transactions``."""
+    if "://" in endpoint:
+        # Pagination links are absolute URLs
+        endpoint = urlsplit(endpoint).path.split("/api/v1/", 1)[-1]
+    segments = endpoint.strip("/").split("/")
+    for i in range(1, len(segments)):
+        if segments[i - 1] in _COLLECTIONS and segments[i] not in _COLLECTIONS:
+            segments[i] = "{id}"
+    return "/".join(segments)
+
+
+def _validate(model: Type[ModelT], response: Dict[str, Any]) -> ModelT:
+    """Validate a response into a model, recording how long validation took."""
+    with MODEL_VALIDATION_DURATION.time(model=model.__name__):
+        return model.model_validate(response)
+
+
+def _is_settled(response: Dict[str, Any]) -> bool:
+    """Only settled transactions are final enough to cache."""
+    return response["data"]["attributes"]["status"] == "SETTLED"
+
 
 class UpBankApiService:
     """Service for interacting with the Up Bank API."""
 
-    def __init__(self):
-        self.base_url = settings.up_api_base_url
+    def __init__(self, client_pool: Optional[UpBankClientPool] = None, cache: Optional[ResponseCache] = None):
+        self.client_pool = client_pool or UpBankClientPool()
+        self.cache = cache
+        self.base_url = self.client_pool.base_url
+        self.schedulers: Dict[AccountType, UpstreamScheduler] = {}
+        # Conditional request headers and payloads of GET responses that carried a validator
+        self.validators: "OrderedDict[str, Tuple[Dict[str, str], Dict[str, Any]]]" = OrderedDict()
+
+    async def aclose(self) -> None:
+        """Close the pooled upstream connections."""
+        await self.client_pool.aclose()
+
+    def get_scheduler(self, account_type: AccountType) -> UpstreamScheduler:
+        """Get the upstream scheduler for an account type's token, creating it on first use."""
+        scheduler = self.schedulers.get(account_type)
+        if scheduler is None:
+            scheduler = self.schedulers[account_type] = UpstreamScheduler()
+        return scheduler
+
+    def collect_metrics(self) -> List[Metric]:
+        """Scrape-time metrics for the response cache and upstream schedulers."""
+        metrics: List[Metric] = []
+        if self.cache is not None:
+            stats = self.cache.stats()
+            lookups = Counter("cache_lookups_total", "Response cache lookups by result", ["result"])
+            for result in ("hits", "misses", "coalesced"):
+                lookups.inc(stats[result], result=result)
+            entries = Gauge("cache_entries", "Responses currently cached")
+            entries.set(stats["entries"])
+            evictions = Counter("cache_evictions_total", "Responses evicted from the cache")
+            evictions.inc(stats["evictions"])
+            metrics.extend([lookups, entries, evictions])
 
+        queued = Gauge("upstream_queued", "Requests waiting for a rate limit token or slot", ["account_type"])
+        retries = Counter("upstream_retries_total", "Upstream request retries", ["account_type"])
+        rate_limited = Counter("upstream_rate_limited_total", "Upstream 429 responses", ["account_type"])
+        circuit_open = Gauge("upstream_circuit_open", "1 while the circuit breaker is not closed", ["account_type"])
+        for account_type, scheduler in self.schedulers.items():
+            stats = scheduler.stats()
+            queued.set(stats["queued"], account_type=account_type.value)
+            retries.inc(stats["retries"], account_type=account_type.value)
+            rate_limited.inc(stats["rate_limited"], account_type=account_type.value)
+            circuit_open.set(int(stats["circuit_state"] != "closed"), account_type=account_type.value)
+        metrics.extend([queued, retries, rate_limited, circuit_open])
+        return metrics
+    
     async def _make_request(
         self,
         account_type: AccountType,
@@ -36,6 +133,13 @@ class UpBankApiService:
         """
         Make a request to the Up Bank API.
         
+        Requests go through the account type's ``UpstreamScheduler``, which
+        rate-limits them and retries idempotent ones on transient failures.
+        GET responses that carried an ``ETag`` or ``Last-Modified`` header are
+        revalidated with a conditional request, and a 304 reuses the
+        previous payload. Transaction list pages are not, since their
+        payloads would otherwise be kept in memory.
+        
         Args:
             account_type: The account type to use for authentication
             endpoint: The API endpoint to call
@@ -49,26 +153,44 @@ class UpBankApiService:
         Raises:
             HTTPException: If the API request fails
         """
-        token = get_token_for_account(account_type)
-        headers = format_headers(token)
-        url = f"{self.base_url}/{endpoint}"
+        client = self.client_pool.get_client(account_type)
+        label = _endpoint_label(endpoint)
+        validator_key = None
+        validated = None
+        if method == "GET" and settings.upstream_conditional_requests and label not in _UNVALIDATED_ENDPOINTS:
+            validator_key = make_cache_key(account_type, endpoint, params)
+            validated = self.validators.get(validator_key)
+        headers = validated[0] if validated is not None else None
         
-        logger.debug(f"Making {method} request to {url}")
+        logger.debug("Making %s request to %s%s", method, self.base_url, endpoint)
         
+        UPSTREAM_REQUESTS_IN_FLIGHT.inc(account_type=account_type.value)
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=data,
-                    timeout=30.0,
-                )
-                
-                response.raise_for_status()
-                return response.json()
-                
+            response = await self.get_scheduler(account_type).execute(
+                lambda: client.request(method=method, url=endpoint, params=params, json=data, headers=headers),
+                idempotent=method in ("GET", "HEAD"),
+            )
+            UPSTREAM_REQUEST_DURATION.observe(
+                time.perf_counter() - started, account_type=account_type.value, endpoint=label
+            )
+            UPSTREAM_RESPONSES.inc(account_type=account_type.value, endpoint=label, status=response.status_code)
+            UPSTREAM_RESPONSE_BYTES.inc(response.num_bytes_downloaded, account_type=account_type.value, endpoint=label)
+            
+            if response.status_code == 304 and validated is not None:
+                self.validators.move_to_end(validator_key)
+                return validated[1]
+            
+            response.raise_for_status()
+            # DELETE responses are 204 No Content
+            if not response.content:
+                return {}
+            with UPSTREAM_DECODE_DURATION.time(endpoint=label):
+                payload = json_loads(response.content)
+            if validator_key is not None:
+                self._remember_validator(validator_key, response, payload)
+            return payload
+            
         except httpx.HTTPStatusError as e:
             error_detail = "Unknown error"
             status_code = e.response.status_code
@@ -84,18 +206,121 @@ class UpBankApiService:
             raise HTTPException(status_code=status_code, detail=error_detail)
             
         except httpx.RequestError as e:
+            UPSTREAM_RESPONSES.inc(account_type=account_type.value, endpoint=label, status="error")
             logger.error(f"Request error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error communicating with Up Bank API: {str(e)}")
+            
+        finally:
+            UPSTREAM_REQUESTS_IN_FLIGHT.dec(account_type=account_type.value)
+    
+    def _remember_validator(self, key: str, response: httpx.Response, payload: Dict[str, Any]) -> None:
+        """Keep a response's validators so the next request for it can be conditional."""
+        headers = {}
+        if "etag" in response.headers:
+            headers["If-None-Match"] = response.headers["etag"]
+        if "last-modified" in response.headers:
+            headers["If-Modified-Since"] = response.headers["last-modified"]
+        if not headers:
+            self.validators.pop(key, None)
+            return
+        self.validators[key] = (headers, payload)
+        self.validators.move_to_end(key)
+        while len(self.validators) > settings.cache_max_entries:
+            self.validators.popitem(last=False)
+    
+    async def _cached_request(
+        self,
+        account_type: AccountType,
+        endpoint: str,
+        ttl: float,
+        params: Optional[Dict[str, Any]] = None,
+        cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Make a GET request through the response cache.
+        
+        Falls back to an uncached request when caching is disabled or ``ttl`` is 0.
+        
+        Args:
+            account_type: The account type to use for authentication
+            endpoint: The API endpoint to call
+            ttl: Seconds to cache the response for
+            params: Query parameters
+            cacheable: Optional predicate deciding whether a response may be cached
+        """
+        if self.cache is None or ttl <= 0:
+            return await self._make_request(account_type, endpoint, params=params)
+        
+        return await self.cache.get_or_fetch(
+            make_cache_key(account_type, endpoint, params),
+            ttl,
+            lambda: self._make_request(account_type, endpoint, params=params),
+            cacheable,
+        )
+    
+    def prime_cache(self, account_type: AccountType, endpoint: str, response: Dict[str, Any], ttl: float) -> bool:
+        """
+        Seed the cache for an endpoint with a response obtained another way.
+        
+        Used to fill single-resource entries from list pages, so e.g.
+        ``accounts/{id}`` is cached after fetching ``accounts``.
+        
+        Returns:
+            True if the response was cached
+        """
+        if self.cache is None or ttl <= 0:
+            return False
+        self.cache.put(make_cache_key(account_type, endpoint), response, ttl)
+        return True
+    
+    def invalidate_transaction(self, account_type: AccountType, transaction_id: str) -> None:
+        """Drop the cached copy of a transaction."""
+        if self.cache is not None:
+            self.cache.invalidate(make_cache_key(account_type, f"transactions/{transaction_id}"))
+    
+    def invalidate_accounts(self, account_type: AccountType, account_id: Optional[str] = None) -> None:
+        """Drop cached account responses, e.g. after a transaction changed their balance."""
+        if self.cache is not None:
+            self.cache.invalidate(make_cache_key(account_type, "accounts"))
+            if account_id:
+                self.cache.invalidate(make_cache_key(account_type, f"accounts/{account_id}"))
+    
+    @staticmethod
+    def _transaction_params(
+        since: Optional[datetime],
+        until: Optional[datetime],
+        category: Optional[str],
+        status: Optional[str],
+        page_size: int,
+        page_cursor: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Build Up's query parameters for a transaction list request."""
+        params: Dict[str, Any] = {"page[size]": page_size}
+        
+        if page_cursor:
+            params["page[after]"] = page_cursor
+        if since:
+            params["filter[since]"] = since.isoformat()
+        if until:
+            params["filter[until]"] = until.isoformat()
+        if category:
+            params["filter[category]"] = category
+        if status:
+            params["filter[status]"] = status
+        if tag:
+            params["filter[tag]"] = tag
+        return params
     
     async def get_accounts(self, account_type: AccountType) -> AccountsResponse:
         """Get all accounts for the specified account type."""
-        response = await self._make_request(account_type, "accounts")
-        return AccountsResponse.model_validate(response)
+        response = await self._cached_request(account_type, "accounts", settings.cache_ttl_accounts)
+        return _validate(AccountsResponse, response)
     
     async def get_account(self, account_type: AccountType, account_id: str) -> AccountResponse:
         """Get a specific account by ID."""
-        response = await self._make_request(account_type, f"accounts/{account_id}")
-        return AccountResponse.model_validate(response)
+        response = await self._cached_request(account_type, f"accounts/{account_id}", settings.cache_ttl_accounts)
+        return _validate(AccountResponse, response)
     
     async def get_transactions(
         self,
@@ -106,28 +331,47 @@ class UpBankApiService:
         status: Optional[str] = None,
         page_size: int = 20,
         page_cursor: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> TransactionsResponse:
         """Get transactions with optional filters."""
-        params = {"page[size]": page_size}
+        response = await self.get_raw_transactions(
+            account_type, None, since, until, category, status, page_size, page_cursor, tag
+        )
+        return _validate(TransactionsResponse, response)
+    
+    async def get_raw_transactions(
+        self,
+        account_type: AccountType,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 20,
+        page_cursor: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of transactions as Up's JSON:API document, without model validation.
         
-        if page_cursor:
-            params["page[after]"] = page_cursor
-        if since:
-            params["filter[since]"] = since.isoformat()
-        if until:
-            params["filter[until]"] = until.isoformat()
-        if category:
-            params["filter[category]"] = category
-        if status:
-            params["filter[status]"] = status
-            
-        response = await self._make_request(account_type, "transactions", params=params)
-        return TransactionsResponse.model_validate(response)
+        Used by routes that only return some fields of each transaction.
+        """
+        endpoint = f"accounts/{account_id}/transactions" if account_id else "transactions"
+        params = self._transaction_params(since, until, category, status, page_size, page_cursor, tag)
+        return await self._make_request(account_type, endpoint, params=params)
     
     async def get_transaction(self, account_type: AccountType, transaction_id: str) -> TransactionResponse:
         """Get a specific transaction by ID."""
-        response = await self._make_request(account_type, f"transactions/{transaction_id}")
-        return TransactionResponse.model_validate(response)
+        return _validate(TransactionResponse, await self.get_raw_transaction(account_type, transaction_id))
+    
+    async def get_raw_transaction(self, account_type: AccountType, transaction_id: str) -> Dict[str, Any]:
+        """Get a specific transaction by ID as Up's JSON:API document, without model validation."""
+        return await self._cached_request(
+            account_type,
+            f"transactions/{transaction_id}",
+            settings.cache_ttl_transaction,
+            cacheable=_is_settled,
+        )
     
     async def get_account_transactions(
         self,
@@ -139,23 +383,13 @@ class UpBankApiService:
         status: Optional[str] = None,
         page_size: int = 20,
         page_cursor: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> TransactionsResponse:
         """Get transactions for a specific account."""
-        params = {"page[size]": page_size}
-        
-        if page_cursor:
-            params["page[after]"] = page_cursor
-        if since:
-            params["filter[since]"] = since.isoformat()
-        if until:
-            params["filter[until]"] = until.isoformat()
-        if category:
-            params["filter[category]"] = category
-        if status:
-            params["filter[status]"] = status
-            
-        response = await self._make_request(account_type, f"accounts/{account_id}/transactions", params=params)
-        return TransactionsResponse.model_validate(response)
+        response = await self.get_raw_transactions(
+            account_type, account_id, since, until, category, status, page_size, page_cursor, tag
+        )
+        return _validate(TransactionsResponse, response)
     
     async def get_categories(self, account_type: AccountType, parent: Optional[str] = None) -> CategoriesResponse:
         """Get categories with optional parent filter."""
@@ -163,10 +397,101 @@ class UpBankApiService:
         if parent:
             params["filter[parent]"] = parent
             
-        response = await self._make_request(account_type, "categories", params=params)
-        return CategoriesResponse.model_validate(response)
+        response = await self._cached_request(account_type, "categories", settings.cache_ttl_categories, params=params)
+        return _validate(CategoriesResponse, response)
     
     async def get_category(self, account_type: AccountType, category_id: str) -> CategoryResponse:
         """Get a specific category by ID."""
-        response = await self._make_request(account_type, f"categories/{category_id}")
-        return CategoryResponse.model_validate(response) 
\ No newline at end of file
+        response = await self._cached_request(account_type, f"categories/{category_id}", settings.cache_ttl_categories)
+        return _validate(CategoryResponse, response) 
+    
+    async def iter_transaction_pages(
+        self,
+        account_type: AccountType,
+        account_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        page_size: int = 100,
+        prefetch: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Walk every page of transactions by following Up's ``links.next``.
+        
+        Pages are yielded as raw JSON:API documents without model validation,
+        which keeps bulk consumers such as the local sync cheap.
+        
+        Args:
+            account_type: The account type to use for authentication
+            account_id: Only walk transactions for this account
+            since: Filter transactions since this date
+            until: Filter transactions until this date
+            category: Filter by category ID
+            status: Filter by transaction status
+            page_size: Number of transactions per upstream page
+            prefetch: Request the next page while the caller processes the
+                current one. At most two pages are held in memory.
+        """
+        endpoint = f"accounts/{account_id}/transactions" if account_id else "transactions"
+        params = self._transaction_params(since, until, category, status, page_size)
+        pending: Optional[asyncio.Future] = asyncio.ensure_future(
+            self._make_request(account_type, endpoint, params=params)
+        )
+        
+        try:
+            while pending is not None:
+                page = await pending
+                # links.next is an absolute URL that already carries every query parameter
+                next_url = (page.get("links") or {}).get("next")
+                pending = None
+                if next_url and prefetch:
+                    pending = asyncio.ensure_future(self._make_request(account_type, next_url))
+                yield page
+                if next_url and not prefetch:
+                    pending = asyncio.ensure_future(self._make_request(account_type, next_url))
+        finally:
+            if pending is not None:
+                if not pending.done():
+                    pending.cancel()
+                elif not pending.cancelled():
+                    # Mark a failed prefetch as retrieved when the caller stops early
+                    pending.exception()
+    
+    async def get_webhooks(
+        self, account_type: AccountType, page_size: int = 20, page_cursor: Optional[str] = None
+    ) -> WebhooksResponse:
+        """Get the webhooks registered for the specified account type."""
+        params: Dict[str, Any] = {"page[size]": page_size}
+        if page_cursor:
+            params["page[after]"] = page_cursor
+        
+        response = await self._make_request(account_type, "webhooks", params=params)
+        return _validate(WebhooksResponse, response)
+    
+    async def get_webhook(self, account_type: AccountType, webhook_id: str) -> WebhookResponse:
+        """Get a specific webhook by ID."""
+        response = await self._make_request(account_type, f"webhooks/{webhook_id}")
+        return _validate(WebhookResponse, response)
+    
+    async def create_webhook(
+        self, account_type: AccountType, url: str, description: Optional[str] = None
+    ) -> WebhookResponse:
+        """Register a webhook. Up only returns its secret key in this response."""
+        attributes: Dict[str, Any] = {"url": url}
+        if description:
+            attributes["description"] = description
+        
+        response = await self._make_request(
+            account_type, "webhooks", method="POST", data={"data": {"attributes": attributes}}
+        )
+        return _validate(WebhookResponse, response)
+    
+    async def delete_webhook(self, account_type: AccountType, webhook_id: str) -> None:
+        """Delete a webhook."""
+        await self._make_request(account_type, f"webhooks/{webhook_id}", method="DELETE")
+    
+    async def ping_webhook(self, account_type: AccountType, webhook_id: str) -> WebhookEventResponse:
+        """Ask Up to deliver a PING event to a webhook."""
+        response = await self._make_request(account_type, f"webhooks/{webhook_id}/ping", method="POST")
+        return _validate(WebhookEventResponse, response)
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger("up_bank_api")
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+CIRCUIT_FAILURE_STATUS_CODES = {500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` requests per second with bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it. A rate of 0 means unlimited."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated upstream failures.
+
+    Opens after ``failure_threshold`` consecutive failures, then lets a single
+    trial request through once ``reset_seconds`` have passed. A successful
+    trial closes the circuit again; a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == self.CLOSED or self.failure_threshold <= 0:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self._opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._trial_started_at = None
+        # A trial that never reported back (e.g. it was cancelled) is given up on after reset_seconds
+        if self.state == self.HALF_OPEN and (
+            self._trial_started_at is None or now - self._trial_started_at >= self.reset_seconds
+        ):
+            self._trial_started_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_started_at = None
+        if self.failure_threshold > 0 and (
+            self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker opened after {self.consecutive_failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class UpstreamScheduler:
+    """
+    Admission control and retries for requests made with one Up Bank token.
+
+    Requests pass a token bucket and a concurrency semaphore before being
+    sent. Idempotent requests are retried with jittered exponential backoff
+    on 429/502/503/504 and connection errors, honouring ``Retry-After``. A
+    circuit breaker rejects requests outright while Up appears to be down.
+    """
+
+    def __init__(
+        self,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        circuit_failure_threshold: Optional[int] = None,
+        circuit_reset_seconds: Optional[float] = None,
+    ):
+        self.bucket = TokenBucket(
+            settings.upstream_rate_limit if rate_limit is None else rate_limit,
+            settings.upstream_burst if burst is None else burst,
+        )
+        self.max_concurrency = max_concurrency or settings.upstream_max_concurrency
+        self.max_retries = settings.upstream_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.upstream_backoff_base if backoff_base is None else backoff_base
+        self.backoff_max = settings.upstream_backoff_max if backoff_max is None else backoff_max
+        self.breaker = CircuitBreaker(
+            settings.upstream_circuit_failure_threshold if circuit_failure_threshold is None else circuit_failure_threshold,
+            settings.upstream_circuit_reset_seconds if circuit_reset_seconds is None else circuit_reset_seconds,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._paused_until = 0.0
+
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.rate_limit_remaining: Optional[int] = None
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spread retries uniformly so clients don't retry in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def _send(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        self.queued += 1
+        try:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            return await send()
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _observe_rate_limit(self, response: httpx.Response) -> Optional[float]:
+        """Record rate-limit headers and return how long to back off, if at all."""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.rate_limit_remaining = int(remaining)
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code == 429:
+            self.rate_limited += 1
+            # Every request on this token would be rejected too, so pause them all
+            self._pause(retry_after if retry_after is not None else self.backoff_base)
+        elif self.rate_limit_remaining == 0:
+            self._pause(retry_after if retry_after is not None else self.backoff_base)
+        return retry_after
+
+    async def execute(self, send: Callable[[], Awaitable[httpx.Response]], idempotent: bool = True) -> httpx.Response:
+        """
+        Send a request under the scheduler's limits, retrying where safe.
+
+        Args:
+            send: Coroutine factory that performs the HTTP request
+            idempotent: Whether the request may be retried
+
+        Returns:
+            The final upstream response, which may still be an error response
+            once retries are exhausted
+
+        Raises:
+            HTTPException: 503 if the circuit breaker is open
+            httpx.RequestError: If the request could not be sent after all retries
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Up Bank API is unavailable (circuit breaker open); try again shortly",
+                )
+
+            try:
+                response = await self._send(send)
+            except httpx.RequestError as e:
+                self.breaker.record_failure()
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Upstream connection error ({e}); retrying in {delay:.2f}s")
+            else:
+                retry_after = self._observe_rate_limit(response)
+                if response.status_code in CIRCUIT_FAILURE_STATUS_CODES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if response.status_code not in RETRY_STATUS_CODES or not idempotent or attempt >= self.max_retries:
+                    return response
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                logger.warning(f"Upstream returned {response.status_code}; retrying in {delay:.2f}s")
+                await response.aclose()
+
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(min(delay, self.backoff_max))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue, in-flight and retry counters for diagnostics."""
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "circuit_state": self.breaker.state,
+        }
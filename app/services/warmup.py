@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.analytics import AnalyticsService
+from app.services.category_index import CategoryIndex
+from app.services.transaction_store import TransactionStore
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType, get_configured_account_types
+
+logger = logging.getLogger("up_bank_api")
+
+LEASE_NAME = "warmup"
+# Lease length when warming only at startup: long enough for one warm-up to finish
+STARTUP_LEASE_SECONDS = 600.0
+
+
+class CacheWarmer:
+    """
+    Prefetches what a dashboard asks for first so it is served from cache after a restart.
+
+    For every configured token it fetches accounts and categories (loading
+    the category tree), then the most recent transaction pages. Single accounts and settled transactions
+    from those lists are seeded into the response cache, pages are upserted
+    into the local store when it is enabled, and the analytics index is
+    built. Account types start ``stagger_seconds`` apart so warm-up does not
+    use a token's whole rate-limit burst at once.
+
+    When the response cache is shared between workers, only the worker
+    holding the warm-up lease in the store warms it; the rest report ready
+    straight away and read what that worker fetched.
+    """
+
+    def __init__(
+        self,
+        api_service: UpBankApiService,
+        store: Optional[TransactionStore] = None,
+        analytics_service: Optional[AnalyticsService] = None,
+        category_index: Optional[CategoryIndex] = None,
+        interval_seconds: Optional[float] = None,
+        transaction_pages: Optional[int] = None,
+        page_size: Optional[int] = None,
+        stagger_seconds: Optional[float] = None,
+    ):
+        self.api_service = api_service
+        self.store = store
+        self.analytics_service = analytics_service
+        self.category_index = category_index
+        self.interval_seconds = settings.warmup_interval_seconds if interval_seconds is None else interval_seconds
+        self.transaction_pages = settings.warmup_transaction_pages if transaction_pages is None else transaction_pages
+        self.page_size = page_size or settings.warmup_page_size
+        self.stagger_seconds = settings.warmup_stagger_seconds if stagger_seconds is None else stagger_seconds
+        self.ready = False
+        self.results: Dict[AccountType, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm_account_type(self, account_type: AccountType) -> Dict[str, Any]:
+        """
+        Warm the caches for one account type.
+
+        Returns:
+            Counts of what was fetched and how long it took
+        """
+        started = time.perf_counter()
+        if self.category_index is not None:
+            categories = self.category_index.tree(account_type)
+        else:
+            categories = self.api_service.get_categories(account_type)
+        accounts, _ = await asyncio.gather(self.api_service.get_accounts(account_type), categories)
+        for account in accounts.data:
+            self.api_service.prime_cache(
+                account_type,
+                f"accounts/{account.id}",
+                {"data": account.model_dump(mode="json", by_alias=True)},
+                settings.cache_ttl_accounts,
+            )
+
+        transactions = 0
+        if self.transaction_pages > 0:
+            pages = self.api_service.iter_transaction_pages(account_type, page_size=self.page_size, prefetch=True)
+            try:
+                fetched = 0
+                async for page in pages:
+                    transactions += await self._warm_transactions(account_type, page.get("data") or [])
+                    fetched += 1
+                    if fetched >= self.transaction_pages:
+                        break
+            finally:
+                await pages.aclose()
+
+        if self.analytics_service is not None:
+            await self.analytics_service.get_index(account_type)
+
+        return {
+            "accounts": len(accounts.data),
+            "transactions": transactions,
+            "duration_seconds": time.perf_counter() - started,
+        }
+
+    async def _warm_transactions(self, account_type: AccountType, transactions: List[Dict[str, Any]]) -> int:
+        for txn in transactions:
+            # Only settled transactions are cached by get_transaction, so only seed those
+            if txn["attributes"]["status"] == "SETTLED":
+                self.api_service.prime_cache(
+                    account_type, f"transactions/{txn['id']}", {"data": txn}, settings.cache_ttl_transaction
+                )
+        if self.store is not None:
+            await asyncio.to_thread(self.store.upsert_transactions, account_type, transactions)
+        return len(transactions)
+
+    async def warm(self) -> None:
+        """Warm every configured account type once, staggering their start."""
+        async def run(account_type: AccountType, delay: float) -> None:
+            await asyncio.sleep(delay)
+            try:
+                result = await self.warm_account_type(account_type)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Warm-up for {account_type.value} failed: {e}")
+                result = {"error": str(getattr(e, "detail", e))}
+            self.results[account_type] = {**result, "warmed_at": time.time()}
+
+        account_types = get_configured_account_types()
+        await asyncio.gather(*(
+            run(account_type, index * self.stagger_seconds) for index, account_type in enumerate(account_types)
+        ))
+        self.ready = True
+        logger.info(f"Warm-up finished for {', '.join(account_type.value for account_type in account_types)}")
+
+    def _shared(self) -> bool:
+        cache = self.api_service.cache
+        return self.store is not None and cache is not None and cache.backend.shared
+
+    async def _acquire_lease(self) -> bool:
+        if not self._shared():
+            return True
+        lease_seconds = self.interval_seconds * 2 if self.interval_seconds > 0 else STARTUP_LEASE_SECONDS
+        return await asyncio.to_thread(self.store.acquire_lease, LEASE_NAME, lease_seconds)
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.warm()
+                elif not self.ready:
+                    self.ready = True
+                    logger.info("Skipping warm-up; another worker is filling the shared cache")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A failed round must not end the loop, or /ready would stay 503 for good
+                logger.error(f"Warm-up round failed: {e}")
+                self.ready = True
+            if self.interval_seconds <= 0:
+                return
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Warm up in the background now and then every ``interval_seconds``."""
+        self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Cancel background warm-up and hand its lease to another worker."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            if self._shared():
+                await asyncio.to_thread(self.store.release_lease, LEASE_NAME)
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.up_models import WebhookEvent, WebhookEventType
+from app.services.live_feed import LiveFeed
+from app.services.transaction_store import TransactionStore
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+
+def sign_payload(secret_key: str, body: bytes) -> str:
+    """Compute the hex HMAC-SHA256 signature Up sends in ``X-Up-Authenticity-Signature``."""
+    return hmac.new(secret_key.encode(), body, hashlib.sha256).hexdigest()
+
+
+class WebhookProcessor:
+    """
+    Verifies Up webhook deliveries and applies them to the cache and local store.
+
+    The account type a delivery belongs to is whichever account type's secret
+    key produced its signature: secrets of webhooks registered through this
+    API are looked up in the store, and ``*_WEBHOOK_SECRET`` settings cover
+    webhooks registered elsewhere. Changes are also published to the live
+    transaction feed, so subscribers hear of them before the next poll.
+    """
+
+    def __init__(
+        self,
+        api_service: UpBankApiService,
+        store: Optional[TransactionStore] = None,
+        live_feed: Optional[LiveFeed] = None,
+    ):
+        self.api_service = api_service
+        self.store = store
+        self.live_feed = live_feed
+
+    async def _candidate_secrets(self, webhook_id: Optional[str]) -> List[Tuple[AccountType, str]]:
+        candidates = []
+        if self.store is not None and webhook_id:
+            stored = await asyncio.to_thread(self.store.get_webhook_secret, webhook_id)
+            if stored:
+                candidates.append(stored)
+        configured = {
+            AccountType.USER1: settings.user1_webhook_secret,
+            AccountType.USER2: settings.user2_webhook_secret,
+            AccountType.SHARED: settings.shared_webhook_secret,
+        }
+        candidates.extend((account_type, secret) for account_type, secret in configured.items() if secret)
+        return candidates
+
+    async def verify(self, body: bytes, signature: Optional[str], webhook_id: Optional[str]) -> AccountType:
+        """
+        Check a delivery's signature and work out which account type sent it.
+
+        Raises:
+            HTTPException: 401 if the signature is missing or matches no known secret
+        """
+        if not signature:
+            raise HTTPException(status_code=401, detail="Missing X-Up-Authenticity-Signature header")
+        for account_type, secret in await self._candidate_secrets(webhook_id):
+            if hmac.compare_digest(sign_payload(secret, body), signature):
+                return account_type
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    async def handle_event(self, account_type: AccountType, event: WebhookEvent) -> Tuple[Optional[str], str]:
+        """
+        Apply a verified webhook event.
+
+        Created and settled transactions are re-fetched from Up and upserted,
+        deleted ones are removed, and any cached copies are dropped.
+
+        Returns:
+            The transaction id (if any) and the action taken
+        """
+        event_type = event.attributes.event_type
+        transaction = (event.relationships.transaction or {}).get("data")
+        if event_type == WebhookEventType.PING or not transaction:
+            return None, "ignored"
+
+        transaction_id = transaction["id"]
+        if event_type == WebhookEventType.TRANSACTION_DELETED:
+            self.api_service.invalidate_transaction(account_type, transaction_id)
+            self.api_service.invalidate_accounts(account_type)
+            if self.store is not None:
+                await asyncio.to_thread(self.store.delete_transactions, account_type, [transaction_id])
+            if self.live_feed is not None:
+                self.live_feed.remove(account_type, transaction_id)
+            return transaction_id, "deleted"
+
+        self.api_service.invalidate_transaction(account_type, transaction_id)
+        # Up's own resource, so stored rows match those written by sync whichever path they took
+        payload = (await self.api_service.get_raw_transaction(account_type, transaction_id))["data"]
+        account = ((payload.get("relationships") or {}).get("account") or {}).get("data") or {}
+        self.api_service.invalidate_accounts(account_type, account.get("id"))
+        if self.store is not None:
+            await asyncio.to_thread(self.store.upsert_transactions, account_type, [payload])
+        if self.live_feed is not None:
+            self.live_feed.apply(account_type, [payload])
+        return transaction_id, "upserted"
@@ -0,0 +1,152 @@
+"""
+Sparse fieldsets and the flat shape for transaction responses.
+
+``fields[transactions]=description,amount,createdAt`` keeps only the named
+attributes and relationships of each transaction resource, as in JSON:API.
+``format=flat`` replaces each resource with one flat object using the
+export's columns (amounts in dollars and base units, relationships reduced
+to ids), and ``fields[transactions]`` then names those columns. Both work on
+Up's raw JSON, so nothing that was not asked for is validated or serialized.
+
+``expand=category`` inlines category names from the category tree: as
+``meta.name`` on the ``category`` and ``parentCategory`` relationship data,
+or as ``category_name`` and ``parent_category_name`` columns when flat.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Every attribute Up sends for a transaction, in Up's order
+TRANSACTION_ATTRIBUTES = (
+    "status", "rawText", "description", "message", "isCategorizable", "holdInfo", "roundUp", "cashback",
+    "amount", "foreignAmount", "cardPurchaseMethod", "settledAt", "createdAt", "transactionType", "note",
+    "performingCustomer", "deepLinkURL",
+)
+TRANSACTION_RELATIONSHIPS = ("account", "transferAccount", "category", "parentCategory", "tags", "attachment")
+CATEGORY_RELATIONSHIPS = ("category", "parentCategory")
+
+
+def _related_id(resource: Dict[str, Any], name: str) -> Optional[str]:
+    data = ((resource.get("relationships") or {}).get(name) or {}).get("data")
+    return data["id"] if data else None
+
+
+def _foreign_amount(resource: Dict[str, Any]) -> Dict[str, Any]:
+    return resource["attributes"].get("foreignAmount") or {}
+
+
+# Flat columns and how each is read from a transaction resource
+FLAT_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "id": lambda resource: resource["id"],
+    "account_id": lambda resource: _related_id(resource, "account"),
+    "transfer_account_id": lambda resource: _related_id(resource, "transferAccount"),
+    "status": lambda resource: resource["attributes"]["status"],
+    "description": lambda resource: resource["attributes"]["description"],
+    "amount": lambda resource: resource["attributes"]["amount"]["value"],
+    "amount_base_units": lambda resource: resource["attributes"]["amount"]["valueInBaseUnits"],
+    "currency_code": lambda resource: resource["attributes"]["amount"]["currencyCode"],
+    "foreign_amount_base_units": lambda resource: _foreign_amount(resource).get("valueInBaseUnits"),
+    "foreign_currency_code": lambda resource: _foreign_amount(resource).get("currencyCode"),
+    "category_id": lambda resource: _related_id(resource, "category"),
+    "parent_category_id": lambda resource: _related_id(resource, "parentCategory"),
+    "created_at": lambda resource: resource["attributes"]["createdAt"],
+    "settled_at": lambda resource: resource["attributes"].get("settledAt"),
+    "tags": lambda resource: [
+        tag["id"] for tag in ((resource.get("relationships") or {}).get("tags") or {}).get("data") or []
+    ],
+}
+
+
+def with_category_name(relationship: Optional[Dict[str, Any]], names: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+    """A copy of a category relationship with the category's name in ``data.meta``."""
+    data = (relationship or {}).get("data")
+    if not data or data["id"] not in names:
+        return relationship
+    # Copied rather than updated in place: the resource may be shared with the response cache
+    return {**relationship, "data": {**data, "meta": {"name": names[data["id"]]}}}
+
+
+def expand_categories(resource: Dict[str, Any], names: Mapping[str, str]) -> Dict[str, Any]:
+    """A copy of a transaction resource with category names inlined into its relationships."""
+    relationships = resource.get("relationships")
+    if not relationships:
+        return resource
+    expanded = dict(relationships)
+    for name in CATEGORY_RELATIONSHIPS:
+        if name in expanded:
+            expanded[name] = with_category_name(expanded[name], names)
+    return {**resource, "relationships": expanded}
+
+
+@dataclass(frozen=True)
+class TransactionFieldset:
+    """Which fields of each transaction a response carries, and whether it is flattened."""
+    attributes: Tuple[str, ...] = ()
+    relationships: Tuple[str, ...] = ()
+    columns: Tuple[str, ...] = ()
+    flat: bool = False
+
+    @classmethod
+    def parse(cls, fields: Optional[str], flat: bool = False) -> Optional["TransactionFieldset"]:
+        """
+        Parse a comma-separated ``fields[transactions]`` value.
+
+        Args:
+            fields: Field names; attributes and relationships, or flat columns when ``flat``
+            flat: Whether resources are replaced with flat objects
+
+        Returns:
+            The fieldset, or None when neither option was given and resources are returned in full
+
+        Raises:
+            ValueError: If a field name is unknown
+        """
+        names = [name.strip() for name in fields.split(",") if name.strip()] if fields is not None else None
+        if names is None and not flat:
+            return None
+
+        known = tuple(FLAT_FIELDS) if flat else TRANSACTION_ATTRIBUTES + TRANSACTION_RELATIONSHIPS
+        unknown = [name for name in names or () if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown transaction fields: {', '.join(unknown)}. Valid fields are: {', '.join(known)}")
+        if flat:
+            return cls(columns=tuple(dict.fromkeys(names)) if names is not None else tuple(FLAT_FIELDS), flat=True)
+        return cls(
+            attributes=tuple(name for name in TRANSACTION_ATTRIBUTES if name in names),
+            relationships=tuple(name for name in TRANSACTION_RELATIONSHIPS if name in names),
+        )
+
+    def project(self, resource: Dict[str, Any], category_names: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+        """
+        Shape one Up Bank transaction resource.
+
+        Args:
+            resource: The transaction resource
+            category_names: Category id to name, to inline names for ``expand=category``
+        """
+        if self.flat:
+            row = {name: FLAT_FIELDS[name](resource) for name in self.columns}
+            if category_names is not None:
+                row["category_name"] = category_names.get(_related_id(resource, "category"))
+                row["parent_category_name"] = category_names.get(_related_id(resource, "parentCategory"))
+            return row
+
+        if category_names is not None:
+            resource = expand_categories(resource, category_names)
+        projected: Dict[str, Any] = {"type": resource["type"], "id": resource["id"]}
+        if self.attributes:
+            attributes = resource.get("attributes") or {}
+            projected["attributes"] = {name: attributes.get(name) for name in self.attributes}
+        if self.relationships:
+            relationships = resource.get("relationships") or {}
+            projected["relationships"] = {
+                name: relationships[name] for name in self.relationships if name in relationships
+            }
+        if "links" in resource:
+            projected["links"] = resource["links"]
+        return projected
+
+    def project_all(
+        self, resources: Iterable[Dict[str, Any]], category_names: Optional[Mapping[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Shape a page (or any iterable) of transaction resources."""
+        return [self.project(resource, category_names) for resource in resources]
@@ -1,6 +1,6 @@
 import logging
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from app.core.config import settings
 
@@ -50,6 +50,23 @@ def get_token_for_account(account_type: AccountType) -> str:
     return token
 
 
+def get_configured_account_types() -> List[AccountType]:
+    """
+    Get the account types that have an API token configured.
+    
+    Returns:
+        The configured account types, in enum order
+    """
+    configured = []
+    for account_type in AccountType:
+        try:
+            get_token_for_account(account_type)
+        except ValueError:
+            continue
+        configured.append(account_type)
+    return configured
+
+
 def format_headers(token: str) -> Dict[str, str]:
     """
     Format headers for Up Bank API requests.
@@ -0,0 +1,116 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+import pydantic_core
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def json_loads(data: bytes) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def compute_etag(body: bytes) -> str:
+    """A weak ETag for a response body; weak so it survives response compression."""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an ``If-None-Match`` header matches an ETag, using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def cache_control(max_age: float) -> str:
+    """A ``Cache-Control`` value for account data, which shared caches must not store."""
+    if max_age <= 0:
+        return "private, no-cache"
+    return f"private, max-age={int(max_age)}"
+
+
+def model_response(
+    model: BaseModel,
+    status_code: int = 200,
+    request: Optional[Request] = None,
+    max_age: Optional[float] = None,
+) -> Response:
+    """
+    Return an already validated model from a route without re-validating it.
+
+    FastAPI validates a returned model against ``response_model`` again and
+    encodes it with the standard JSON encoder. Returning a ``Response``
+    skips the validation. With ``FAST_SERIALIZATION=true`` (opt-in) the model
+    is serialized once by pydantic-core with the same aliases FastAPI would
+    use; otherwise it is encoded with FastAPI's standard ``jsonable_encoder``.
+
+    When ``request`` is given and ``ETAG_ENABLED`` is on, the response gets an
+    ETag computed from the serialized body, and a request whose
+    ``If-None-Match`` matches it gets an empty 304 instead. ``max_age`` sets
+    ``Cache-Control``.
+    """
+    if settings.fast_serialization:
+        body = pydantic_core.to_json(model, by_alias=True)
+    else:
+        body = json.dumps(jsonable_encoder(model, by_alias=True), separators=(",", ":"), ensure_ascii=False).encode()
+    return _json_body_response(body, status_code, request, max_age)
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    request: Optional[Request] = None,
+    max_age: Optional[float] = None,
+) -> Response:
+    """
+    Return plain JSON-compatible data, e.g. raw Up Bank resources, as a response.
+
+    Nothing is validated; the content is encoded once with ``json_dumps``.
+    ``request`` and ``max_age`` add an ETag and ``Cache-Control`` as in
+    ``model_response``.
+    """
+    return _json_body_response(json_dumps(content), status_code, request, max_age)
+
+
+def _json_body_response(
+    body: bytes,
+    status_code: int,
+    request: Optional[Request],
+    max_age: Optional[float],
+) -> Response:
+    headers = {}
+    if max_age is not None:
+        headers["Cache-Control"] = cache_control(max_age)
+    if request is not None and settings.etag_enabled and status_code == 200:
+        etag = headers["ETag"] = compute_etag(body)
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers or None,
+    )
@@ -0,0 +1 @@
+"""Benchmarks for the Up Bank Local API, run against a local fake Up Bank server."""
@@ -0,0 +1,81 @@
+"""
+Initial sync time with one cursor chain vs concurrent date shards.
+
+Usage:
+    python -m benchmarks.bench_backfill [--transactions 2000] [--latency 0.05] [--shards 1,4,8,16]
+        [--concurrency 4]
+
+Runs the first sync of a token into an empty local store against the fake
+Up Bank server, which delays every request by ``--latency`` seconds, once
+per shard count. With one shard the history is walked as a single
+sequential cursor chain; with more it is split into date ranges walked
+``--concurrency`` at a time. Reports the wall time, upstream requests and
+stored transactions, and checks every transaction was stored exactly once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.http_client import UpBankClientPool
+from app.services.transaction_store import TransactionStore
+from app.services.transaction_sync import TransactionSyncService
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+from benchmarks.fake_up_server import BackgroundServer, CountingApp, create_fake_up_app
+
+
+async def first_sync(path: str) -> int:
+    api_service = UpBankApiService(UpBankClientPool())
+    store = TransactionStore(path)
+    try:
+        result = await TransactionSyncService(api_service, store).sync_account_type(AccountType.USER1)
+        state = store.get_sync_state(AccountType.USER1)
+        assert state["transaction_count"] == result["upserted"], "a transaction was stored twice"
+        assert state["high_water_mark"] is not None
+        return state["transaction_count"]
+    finally:
+        store.close()
+        await api_service.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=2000, help="Fake transactions per account")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every upstream request")
+    parser.add_argument("--shards", default="1,4,8,16", help="Comma-separated initial shard counts")
+    parser.add_argument("--concurrency", type=int, default=4, help="Date ranges walked at once")
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    settings.user1_up_token = "bench-user1-token"
+    settings.upstream_rate_limit = 0
+    settings.sync_page_size = args.page_size
+    settings.sync_backfill_concurrency = args.concurrency
+    logging.getLogger("up_bank_api").setLevel(logging.WARNING)
+
+    upstream = CountingApp(create_fake_up_app(transactions_per_account=args.transactions, latency=args.latency))
+    print(
+        f"{args.transactions * 2} transactions, {args.page_size} per page, "
+        f"{args.latency * 1e3:g} ms upstream latency, {args.concurrency} concurrent ranges\n"
+    )
+    print(f"{'shards':>6} {'seconds':>9} {'upstream':>9} {'stored':>8} {'speed-up':>9}")
+    baseline = None
+    with BackgroundServer(upstream) as server, tempfile.TemporaryDirectory() as directory:
+        settings.up_api_base_url = f"{server.url}/api/v1"
+        for shards in (int(value) for value in args.shards.split(",")):
+            settings.sync_backfill_shards = shards
+            before = upstream.requests
+            started = time.perf_counter()
+            stored = asyncio.run(first_sync(os.path.join(directory, f"store-{shards}.db")))
+            elapsed = time.perf_counter() - started
+            assert stored == args.transactions * 2, f"stored {stored} of {args.transactions * 2} transactions"
+            baseline = baseline or elapsed
+            print(f"{shards:>6} {elapsed:>9.2f} {upstream.requests - before:>9} {stored:>8} {baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Time to render a transaction list with category names: client-side join vs ``expand=category``.
+
+Usage:
+    python -m benchmarks.bench_categories [--views 50] [--page-size 100] [--rtt-ms 50]
+
+Runs the API and the fake Up Bank server on background threads. A "view"
+is what a client needs to show a page of transactions with category and
+parent category names. Without expansion it requests the page and
+``/categories`` (one after the other, or concurrently) and joins them;
+with ``expand=category`` it makes one request. Every request to the API
+waits ``--rtt-ms`` first to stand in for a mobile network's round trip.
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.fake_up_server import BackgroundServer, create_fake_up_app
+
+TOKEN = "bench-user1-token"
+
+
+async def get(client: httpx.AsyncClient, url: str, rtt: float, params: Dict[str, Any]) -> Tuple[Any, int]:
+    await asyncio.sleep(rtt)
+    response = await client.get(url, params=params)
+    response.raise_for_status()
+    return response.json(), len(response.content)
+
+
+def _name(names: Dict[str, str], txn: Dict[str, Any], relationship: str) -> Optional[str]:
+    data = txn["relationships"][relationship]["data"]
+    return names.get(data["id"]) if data else None
+
+
+async def joined_view(
+    client: httpx.AsyncClient, rtt: float, page_size: int, concurrent: bool
+) -> Tuple[List[Tuple[str, Optional[str], Optional[str]]], int]:
+    requests = (
+        get(client, "/api/v1/transactions/", rtt, {"account_type": "user1", "page_size": page_size}),
+        get(client, "/api/v1/categories/", rtt, {"account_type": "user1"}),
+    )
+    if concurrent:
+        (page, page_bytes), (categories, category_bytes) = await asyncio.gather(*requests)
+    else:
+        page, page_bytes = await requests[0]
+        categories, category_bytes = await requests[1]
+    names = {category["id"]: category["attributes"]["name"] for category in categories["data"]}
+    rows = [
+        (txn["attributes"]["description"], _name(names, txn, "category"), _name(names, txn, "parentCategory"))
+        for txn in page["data"]
+    ]
+    return rows, page_bytes + category_bytes
+
+
+async def expanded_view(
+    client: httpx.AsyncClient, rtt: float, page_size: int, concurrent: bool
+) -> Tuple[List[Tuple[str, Optional[str], Optional[str]]], int]:
+    page, page_bytes = await get(
+        client, "/api/v1/transactions/", rtt, {"account_type": "user1", "page_size": page_size, "expand": "category"}
+    )
+
+    def name(txn: Dict[str, Any], relationship: str) -> Optional[str]:
+        data = txn["relationships"][relationship]["data"]
+        return data["meta"]["name"] if data else None
+
+    rows = [(txn["attributes"]["description"], name(txn, "category"), name(txn, "parentCategory")) for txn in page["data"]]
+    return rows, page_bytes
+
+
+async def run(api_url: str, args: argparse.Namespace) -> None:
+    rtt = args.rtt_ms / 1000
+    async with httpx.AsyncClient(base_url=api_url, timeout=None) as client:
+        print(f"{'view':<36} {'requests':>8} {'KB/view':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, view, concurrent, requests in (
+            ("page, then /categories, join", joined_view, False, 2),
+            ("page and /categories at once, join", joined_view, True, 2),
+            ("expand=category", expanded_view, False, 1),
+        ):
+            await view(client, rtt, args.page_size, concurrent)
+            durations = []
+            for _ in range(args.views):
+                started = time.perf_counter()
+                rows, size = await view(client, rtt, args.page_size, concurrent)
+                durations.append(time.perf_counter() - started)
+            p95 = statistics.quantiles(durations, n=20)[-1]
+            print(
+                f"{label:<36} {requests:>8} {size / 1024:>8.1f} "
+                f"{statistics.median(durations) * 1e3:>8.1f} {p95 * 1e3:>8.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--views", type=int, default=50, help="Views rendered per approach")
+    parser.add_argument("--page-size", type=int, default=100, help="Transactions per view")
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="Simulated client round-trip time")
+    args = parser.parse_args()
+
+    settings.user1_up_token = TOKEN
+    settings.upstream_rate_limit = 0
+    settings.warmup_enabled = False
+    settings.store_path = None
+    settings.compression_enabled = False
+    logging.getLogger("up_bank_api").setLevel(logging.WARNING)
+
+    from main import create_application
+
+    print(f"{args.page_size} transactions per view, {args.rtt_ms:g} ms client round trip\n")
+    with BackgroundServer(create_fake_up_app()) as upstream_server:
+        settings.up_api_base_url = f"{upstream_server.url}/api/v1"
+        with BackgroundServer(create_application()) as api_server:
+            asyncio.run(run(api_server.url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare a fresh httpx client per request with the shared client pool.
+
+Usage:
+    python -m benchmarks.bench_client_pool [--requests 2000] [--concurrency 20]
+
+Both modes call GET /accounts on the local fake Up Bank server. Against the
+real API the per-request mode also pays DNS and TLS handshakes, so the gap
+there is considerably larger than on loopback HTTP.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_client import UpBankClientPool
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType, format_headers
+from benchmarks.fake_up_server import BackgroundServer, create_fake_up_app
+
+
+async def _run(label: str, call, total: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {total / elapsed:>10.1f} req/s  ({elapsed:.2f}s for {total} requests)")
+
+
+async def benchmark(base_url: str, total: int, concurrency: int) -> None:
+    headers = format_headers(settings.user1_up_token)
+
+    async def per_request_client() -> None:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url}/accounts", headers=headers, timeout=30.0)
+            response.raise_for_status()
+            response.json()
+
+    service = UpBankApiService(UpBankClientPool(base_url=base_url))
+
+    async def pooled_client() -> None:
+        await service._make_request(AccountType.USER1, "accounts")
+
+    await _run("per-request client", per_request_client, total, concurrency)
+    await _run("pooled client", pooled_client, total, concurrency)
+    await service.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.user1_up_token = settings.user1_up_token or "bench-user1-token"
+    # Measure the connection handling, not the upstream rate limiter
+    settings.upstream_rate_limit = 0
+    with BackgroundServer(create_fake_up_app()) as server:
+        asyncio.run(benchmark(f"{server.url}/api/v1", args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
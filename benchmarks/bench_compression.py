@@ -0,0 +1,115 @@
+"""
+Benchmark of response compression on a realistic 100-transaction page.
+
+Usage:
+    python -m benchmarks.bench_compression [--iterations 200] [--bandwidth 2,10,50]
+
+For each available content coding, reports the compressed size, the time
+to compress and decompress the page, and the resulting end-to-end time to
+deliver it over links of the given bandwidths (in Mbit/s). It then times
+whole requests through ``CompressionMiddleware`` in-process to show the
+middleware's CPU cost.
+"""
+import argparse
+import asyncio
+import time
+import zlib
+from typing import Any, Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.compression import CompressionMiddleware, available_encodings, brotli, create_encoder, zstandard
+from app.core.config import settings
+from app.models.up_models import TransactionsResponse
+from app.utils.serialization import json_loads, model_response
+from benchmarks.bench_serialization import build_fixture
+
+DECOMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "identity": lambda data: data,
+    "gzip": lambda data: zlib.decompress(data, 47),
+}
+if brotli is not None:
+    DECOMPRESSORS["br"] = brotli.decompress
+if zstandard is not None:
+    DECOMPRESSORS["zstd"] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _per_call(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "identity":
+        return body
+    encoder = create_encoder(encoding)
+    return encoder.compress(body) + encoder.finish()
+
+
+def benchmark_codings(body: bytes, encodings: List[str], bandwidths: List[float], iterations: int) -> None:
+    link_headers = "".join(f"{f'@{mbit:g} Mbit/s':>14}" for mbit in bandwidths)
+    print(f"{'coding':<10}{'bytes':>10}{'ratio':>8}{'compress':>12}{'decompress':>12}{link_headers}")
+    for encoding in ["identity", *encodings]:
+        compressed = compress(encoding, body)
+        assert DECOMPRESSORS[encoding](compressed) == body
+        compress_time = _per_call(lambda: compress(encoding, body), iterations) if encoding != "identity" else 0.0
+        decompress_time = _per_call(lambda: DECOMPRESSORS[encoding](compressed), iterations)
+        transfer = "".join(
+            f"{(compress_time + len(compressed) * 8 / (mbit * 1e6) + decompress_time) * 1e3:>11.2f} ms"
+            for mbit in bandwidths
+        )
+        print(
+            f"{encoding:<10}{len(compressed):>10,}{len(body) / len(compressed):>7.1f}x"
+            f"{compress_time * 1e6:>9.0f} us{decompress_time * 1e6:>9.0f} us{transfer}"
+        )
+
+
+def build_app(body: bytes) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/transactions", response_model=TransactionsResponse)
+    async def transactions() -> Any:
+        return model_response(TransactionsResponse.model_validate(json_loads(body)))
+
+    return app
+
+
+async def benchmark_middleware(body: bytes, encodings: List[str], iterations: int) -> None:
+    transport = httpx.ASGITransport(app=build_app(body))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for encoding in ["identity", *encodings]:
+            headers = {"Accept-Encoding": encoding}
+            await client.get("/transactions", headers=headers)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                response = await client.get("/transactions", headers=headers)
+                response.raise_for_status()
+            per_request = (time.perf_counter() - started) / iterations * 1e6
+            print(f"{'route: ' + encoding:<30} {per_request:>10.1f} us/request {response.num_bytes_downloaded:>10,} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--bandwidth", default="2,10,50", help="Comma-separated link speeds in Mbit/s")
+    args = parser.parse_args()
+
+    settings.fast_serialization = True
+    settings.etag_enabled = False
+    body = build_fixture()
+    encodings = available_encodings()
+    bandwidths = [float(value) for value in args.bandwidth.split(",")]
+    print(f"fixture: 100 transactions, {len(body):,} bytes; codings available: {', '.join(encodings)}\n")
+
+    benchmark_codings(body, encodings, bandwidths, args.iterations)
+    print()
+    asyncio.run(benchmark_middleware(body, encodings, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
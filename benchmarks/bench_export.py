@@ -0,0 +1,109 @@
+"""
+Memory and load time of flat transaction exports.
+
+Usage:
+    python -m benchmarks.bench_export [--transactions 5000,20000] [--batch-size 1000]
+
+Feeds a fake Up Bank history, as 100-transaction pages of JSON, through the
+same encoder pipeline as ``/transactions/export`` in each available format,
+and reports the file size, export time and peak Python heap. Once the
+history is longer than a batch the peak stays flat however long it grows.
+It then compares loading the data back: parsing the JSON:API pages and
+flattening them in Python, against reading the export (CSV with the csv
+module, Parquet and Arrow with pyarrow).
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from app.models.api_models import ExportFormat
+from app.services import export
+from app.utils.serialization import json_loads
+from benchmarks.fake_up_server import FakeUpDataset
+
+BASE_URL = "https://api.up.com.au/api/v1"
+
+
+async def _pages(bodies: List[bytes]) -> AsyncIterator[List[Dict[str, Any]]]:
+    for body in bodies:
+        yield json_loads(body)
+
+
+async def run_export(bodies: List[bytes], export_format: ExportFormat, batch_size: int) -> Tuple[bytes, float, int]:
+    """Export the pages, returning the file, the time taken and the peak heap."""
+    # Written to a file so the output does not count towards the heap held while exporting
+    with tempfile.TemporaryFile() as output:
+        tracemalloc.start()
+        started = time.perf_counter()
+        async for chunk in export.encode_export(_pages(bodies), export_format, batch_size):
+            output.write(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        output.seek(0)
+        return output.read(), elapsed, peak
+
+
+def _time(load: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    load()
+    return time.perf_counter() - started
+
+
+def load_times(files: Dict[ExportFormat, bytes], bodies: List[bytes]) -> Dict[str, float]:
+    def from_json() -> None:
+        for body in bodies:
+            for resource in json.loads(body):
+                attributes = resource["attributes"]
+                relationships = resource["relationships"]
+                (resource["id"], attributes["amount"]["valueInBaseUnits"], attributes["createdAt"],
+                 (relationships["category"]["data"] or {}).get("id"))
+
+    times = {"JSON:API pages (json + Python)": _time(from_json)}
+    times["CSV (csv module)"] = _time(lambda: list(csv.reader(io.StringIO(files[ExportFormat.CSV].decode()))))
+    if ExportFormat.PARQUET in files:
+        times["Parquet (pyarrow)"] = _time(lambda: export.pq.read_table(export.pa.BufferReader(files[ExportFormat.PARQUET])))
+        times["Arrow IPC (pyarrow)"] = _time(lambda: export.pa.ipc.open_stream(files[ExportFormat.ARROW]).read_all())
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", default="5000,20000", help="Comma-separated history lengths")
+    parser.add_argument("--batch-size", type=int, default=1000, help="EXPORT_BATCH_SIZE")
+    args = parser.parse_args()
+
+    formats = [ExportFormat.CSV]
+    if export._load_pyarrow() is not None:
+        formats += [ExportFormat.PARQUET, ExportFormat.ARROW]
+    else:
+        print("pyarrow is not installed; only CSV is measured\n")
+
+    print(f"batches of {args.batch_size} rows\n")
+    print(f"{'transactions':>12} {'format':<8} {'size':>10} {'export s':>9} {'peak heap':>11}")
+    for count in (int(value) for value in args.transactions.split(",")):
+        transactions = FakeUpDataset(BASE_URL, "bench-export", count // 2).transactions
+        bodies = [json.dumps(transactions[start:start + 100]).encode() for start in range(0, len(transactions), 100)]
+        del transactions
+        files: Dict[ExportFormat, bytes] = {}
+        for export_format in formats:
+            data, elapsed, peak = asyncio.run(run_export(bodies, export_format, args.batch_size))
+            files[export_format] = data
+            print(
+                f"{count:>12} {export_format.value:<8} {len(data) / 2**20:>6.1f} MiB "
+                f"{elapsed:>9.2f} {peak / 2**20:>7.1f} MiB"
+            )
+
+    print(f"\nloading {count} transactions back")
+    for label, seconds in load_times(files, bodies).items():
+        print(f"{label:<32} {seconds * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Payload size and server CPU of full, sparse and flat transaction pages.
+
+Usage:
+    python -m benchmarks.bench_fieldsets [--iterations 300] [--page-size 100]
+
+Times the work a transaction list route does between receiving Up's page
+and sending its response: parsing, then either validating the full models
+and serializing them with ``model_response``, or projecting the raw
+resources with ``fields[transactions]`` and ``format=flat`` and encoding
+only what was asked for.
+"""
+import argparse
+import time
+from typing import Any, Callable, Optional
+
+import pydantic_core
+
+from app.models.up_models import TransactionsResponse
+from app.utils.fieldsets import TransactionFieldset
+from app.utils.serialization import json_dumps, json_loads
+from benchmarks.bench_serialization import build_fixture
+
+SHAPES = [
+    ("full resources", None, False),
+    ("fields=description,amount,createdAt", "description,amount,createdAt", False),
+    ("format=flat", None, True),
+    ("format=flat, 4 columns", "id,description,amount,created_at", True),
+]
+
+
+def render(body: bytes, fieldset: Optional[TransactionFieldset]) -> Callable[[], bytes]:
+    def full() -> bytes:
+        return pydantic_core.to_json(TransactionsResponse.model_validate(json_loads(body)), by_alias=True)
+
+    def projected() -> bytes:
+        page = json_loads(body)
+        return json_dumps({"data": fieldset.project_all(page["data"]), "links": page["links"]})
+
+    return full if fieldset is None else projected
+
+
+def per_call_us(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    body = build_fixture(args.page_size)
+    print(f"{args.page_size}-transaction page, {len(body):,} bytes from Up\n")
+    print(f"{'shape':<38} {'bytes':>9} {'us/page':>9} {'smaller':>8} {'less CPU':>9}")
+    baseline: Optional[Any] = None
+    for label, fields, flat in SHAPES:
+        encode = render(body, TransactionFieldset.parse(fields, flat))
+        size = len(encode())
+        per_call = per_call_us(encode, args.iterations)
+        baseline = baseline or (size, per_call)
+        print(f"{label:<38} {size:>9,} {per_call:>9.0f} {baseline[0] / size:>7.1f}x {baseline[1] / per_call:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Upstream load and delivery latency of the live transaction feed as clients are added.
+
+Usage:
+    python -m benchmarks.bench_live [--clients 1,10,100] [--duration 10] [--poll-interval 1.0]
+
+Runs the API and the fake Up Bank server on background threads. For each
+client count, opens that many ``/transactions/live`` streams, then adds a
+new HELD transaction upstream every ``--change-interval`` seconds and
+settles the previous one. Reports the upstream requests per second (which
+should not depend on the number of clients), the events each client
+received and the median and maximum time from an upstream change to its
+delivery.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.fake_up_server import BackgroundServer, CountingApp, FakeUpDataset, create_fake_up_app
+
+TOKEN = "bench-user1-token"
+
+
+async def listen(client: httpx.AsyncClient, changed_at: Dict[str, float], delays: List[float], counts: List[int]) -> None:
+    received = 0
+    try:
+        async with client.stream("GET", "/api/v1/transactions/live?account_type=user1") as response:
+            response.raise_for_status()
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: ") and event in ("created", "settled"):
+                    transaction_id = json.loads(line[len("data: "):])["data"]["id"]
+                    delays.append(time.perf_counter() - changed_at[f"{event}:{transaction_id}"])
+                    received += 1
+    finally:
+        # Listeners run until cancelled
+        counts.append(received)
+
+
+async def run(api_url: str, dataset: FakeUpDataset, upstream: CountingApp, clients: int, args: argparse.Namespace) -> None:
+    changed_at: Dict[str, float] = {}
+    delays: List[float] = []
+    counts: List[int] = []
+    limits = httpx.Limits(max_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=None) as client:
+        listeners = [asyncio.create_task(listen(client, changed_at, delays, counts)) for _ in range(clients)]
+        # Let every stream connect and the first poll record the current transactions
+        await asyncio.sleep(args.poll_interval * 2)
+        before = upstream.requests
+        started = time.perf_counter()
+        held = None
+        changes = 0
+        while time.perf_counter() - started < args.duration:
+            if held is not None:
+                dataset.settle(held)
+                changed_at[f"settled:{held}"] = time.perf_counter()
+                changes += 1
+            held = dataset.add_transaction()["id"]
+            changed_at[f"created:{held}"] = time.perf_counter()
+            changes += 1
+            await asyncio.sleep(args.change_interval)
+        # Allow the last change to be polled before disconnecting
+        await asyncio.sleep(args.poll_interval * 2)
+        elapsed = time.perf_counter() - started
+        upstream_requests = upstream.requests - before
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    print(
+        f"{clients:>7} {upstream_requests / elapsed:>12.2f} {changes:>8} {statistics.mean(counts or [0]):>10.1f} "
+        f"{statistics.median(delays or [0]) * 1e3:>9.0f} {max(delays or [0]) * 1e3:>9.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", default="1,10,100", help="Comma-separated numbers of connected clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of upstream changes per client count")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="LIVE_POLL_INTERVAL_SECONDS")
+    parser.add_argument("--change-interval", type=float, default=1.0, help="Seconds between upstream changes")
+    args = parser.parse_args()
+
+    settings.user1_up_token = TOKEN
+    settings.upstream_rate_limit = 0
+    settings.warmup_enabled = False
+    settings.store_path = None
+    settings.compression_enabled = False
+    settings.live_poll_interval_seconds = args.poll_interval
+    logging.getLogger("up_bank_api").setLevel(logging.WARNING)
+
+    from main import create_application
+
+    fake_app = create_fake_up_app()
+    upstream = CountingApp(fake_app)
+    print(f"poll every {args.poll_interval:g} s, an upstream change every {args.change_interval:g} s\n")
+    print(f"{'clients':>7} {'upstream/s':>12} {'changes':>8} {'events':>10} {'p50 ms':>9} {'max ms':>9}")
+    with BackgroundServer(upstream) as upstream_server:
+        settings.up_api_base_url = f"{upstream_server.url}/api/v1"
+        httpx.get(f"{settings.up_api_base_url}/accounts", headers={"Authorization": f"Bearer {TOKEN}"})
+        dataset = fake_app.state.datasets[TOKEN]
+        with BackgroundServer(create_application()) as api_server:
+            for clients in (int(value) for value in args.clients.split(",")):
+                asyncio.run(run(api_server.url, dataset, upstream, clients, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Memory and parsing cost of the full pydantic transaction model vs the lean one.
+
+Usage:
+    python -m benchmarks.bench_models [--transactions 20000]
+
+Holds ``--transactions`` fake Up transactions in memory as parsed JSON
+dicts, validated ``Transaction`` models and ``LeanTransaction`` objects,
+and reports the heap each representation retains (measured with
+tracemalloc), the time to build it from raw JSON and the time to convert
+lean objects back to JSON:API resources. Conversions are checked to
+round-trip exactly.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+from app.models.lean_models import LeanTransaction, lean_transactions
+from app.models.up_models import Transaction
+from app.utils.serialization import json_loads
+from benchmarks.fake_up_server import FakeUpDataset
+
+BASE_URL = "https://api.up.com.au/api/v1"
+
+
+def _measure(build: Callable[[], Any]) -> Tuple[Any, int, float]:
+    """Build a value, returning it with the heap it retains and the build time."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    value = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    build()
+    return value, after - before, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=20_000)
+    args = parser.parse_args()
+
+    dataset = FakeUpDataset(BASE_URL, "bench-models", args.transactions // 2)
+    body = json.dumps(dataset.transactions).encode()
+    count = len(dataset.transactions)
+    print(f"{count:,} transactions, {len(body):,} bytes of JSON\n")
+    print(f"{'representation':<22}{'retained':>12}{'per object':>12}{'build':>12}")
+
+    resources, dict_bytes, dict_time = _measure(lambda: json_loads(body))
+    rows = [
+        ("dicts (json_loads)", dict_bytes, dict_time),
+    ]
+    _, model_bytes, model_time = _measure(lambda: [Transaction.model_validate(txn) for txn in json_loads(body)])
+    rows.append(("Transaction models", model_bytes, model_time))
+    lean, lean_bytes, lean_time = _measure(lambda: lean_transactions(json_loads(body)))
+    rows.append(("LeanTransaction", lean_bytes, lean_time))
+    for label, retained, elapsed in rows:
+        print(f"{label:<22}{retained / 2**20:>9.1f} MiB{retained / count:>10.0f} B{elapsed * 1e3:>9.0f} ms")
+
+    assert all(txn.to_jsonapi(BASE_URL) == resource for txn, resource in zip(lean, resources))
+    started = time.perf_counter()
+    for txn in lean:
+        txn.to_jsonapi(BASE_URL)
+    elapsed = time.perf_counter() - started
+    print(f"\nLeanTransaction.to_jsonapi: {elapsed / count * 1e6:.1f} us per transaction (round-trip verified)")
+    started = time.perf_counter()
+    for resource in resources:
+        LeanTransaction.from_jsonapi(resource)
+    elapsed = time.perf_counter() - started
+    print(f"LeanTransaction.from_jsonapi: {elapsed / count * 1e6:.1f} us per transaction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Scripted load scenarios against the API routes, backed by the fake Up Bank server.
+
+Usage:
+    python -m benchmarks.bench_scenarios [--requests 200] [--concurrency 10] [--scenario NAME ...]
+        [--latency 0.02] [--error-rate 0.01] [--rate-limit-rate 0.01]
+        [--save results.json] [--compare results.json] [--tolerance 0.2]
+
+Each scenario drives the full application in-process (middleware, routes,
+``UpBankApiService``, cache and scheduler) while upstream calls go over
+loopback HTTP to the fake server, which can add latency, 503s and 429s.
+For every scenario it reports throughput, p50/p95/p99 latency, upstream
+requests per operation and the peak Python heap allocated during a traced
+pass. ``--save`` writes the results as JSON and ``--compare`` exits with
+status 1 if throughput drops or p95 latency rises by more than
+``--tolerance`` against a saved run, so it can gate performance changes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from benchmarks.fake_up_server import BackgroundServer, CountingApp, create_fake_up_app
+
+Operation = Callable[[httpx.AsyncClient, FastAPI], Awaitable[None]]
+
+
+async def _get(client: httpx.AsyncClient, path: str) -> httpx.Response:
+    response = await client.get(path)
+    response.raise_for_status()
+    return response
+
+
+async def single_page(client: httpx.AsyncClient, app: FastAPI) -> None:
+    await _get(client, "/api/v1/transactions/?account_type=user1&page_size=100")
+
+
+async def deep_pagination(client: httpx.AsyncClient, app: FastAPI) -> None:
+    # Follows every upstream page server-side and streams the whole history
+    async with client.stream("GET", "/api/v1/transactions/stream?account_type=user1") as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            pass
+
+
+async def multi_account(client: httpx.AsyncClient, app: FastAPI) -> None:
+    await _get(client, "/api/v1/transactions/all?page_size=50")
+
+
+async def cache_hit(client: httpx.AsyncClient, app: FastAPI) -> None:
+    await _get(client, "/api/v1/accounts/?account_type=user1")
+
+
+async def cache_miss(client: httpx.AsyncClient, app: FastAPI) -> None:
+    # A different transaction every time; concurrent misses for one key would be coalesced
+    state = app.state.bench
+    if state["next"] >= len(state["transaction_ids"]):
+        state["next"] = 0
+        app.state.up_api_service.cache.clear()
+    transaction_id = state["transaction_ids"][state["next"]]
+    state["next"] += 1
+    await _get(client, f"/api/v1/transactions/{transaction_id}?account_type=user1")
+
+
+async def collect_transaction_ids(client: httpx.AsyncClient, app: FastAPI) -> None:
+    transaction_ids = []
+    async with client.stream("GET", "/api/v1/transactions/stream?account_type=user1") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                transaction_ids.append(json.loads(line)["id"])
+    app.state.bench = {"transaction_ids": transaction_ids, "next": 0}
+    app.state.up_api_service.cache.clear()
+
+
+SCENARIOS: Dict[str, Operation] = {
+    "single_page": single_page,
+    "deep_pagination": deep_pagination,
+    "multi_account": multi_account,
+    "cache_hit": cache_hit,
+    "cache_miss": cache_miss,
+}
+
+# Run once before a scenario's timed operations
+SETUP: Dict[str, Operation] = {
+    "cache_miss": collect_transaction_ids,
+}
+
+
+async def _run(client: httpx.AsyncClient, app: FastAPI, operation: Operation, total: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await operation(client, app)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, app: FastAPI, upstream: CountingApp, name: str, args: argparse.Namespace
+) -> Dict[str, float]:
+    operation = SCENARIOS[name]
+    if name in SETUP:
+        await SETUP[name](client, app)
+    await operation(client, app)
+
+    before = upstream.requests
+    started = time.perf_counter()
+    latencies = await _run(client, app, operation, args.requests, args.concurrency)
+    elapsed = time.perf_counter() - started
+    upstream_requests = upstream.requests - before
+
+    # Tracing slows everything down, so memory is measured in a separate, shorter pass
+    tracemalloc.start()
+    await _run(client, app, operation, args.memory_requests, args.concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1e3,
+        "p95_ms": quantiles[94] * 1e3,
+        "p99_ms": quantiles[98] * 1e3,
+        "upstream_per_op": upstream_requests / len(latencies),
+        "peak_heap_kib": peak / 1024,
+    }
+
+
+async def benchmark(names: List[str], upstream: CountingApp, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    # Imported here so the settings chosen in main() apply to the application
+    from main import create_application, lifespan
+
+    app = create_application()
+    results: Dict[str, Dict[str, float]] = {}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            for name in names:
+                result = await run_scenario(client, app, upstream, name, args)
+                results[name] = result
+                print(
+                    f"{name:<16} {result['throughput']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f} {result['upstream_per_op']:>9.2f} {result['peak_heap_kib']:>10.0f}"
+                )
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> bool:
+    """Print regressions against a saved run and return True if there were none."""
+    ok = True
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["throughput"] < previous["throughput"] * (1 - tolerance):
+            print(f"REGRESSION {name}: throughput {previous['throughput']:.1f} -> {result['throughput']:.1f} req/s")
+            ok = False
+        if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            print(f"REGRESSION {name}: p95 {previous['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+            ok = False
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--memory-requests", type=int, default=20, help="Operations in the traced memory pass")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--transactions", type=int, default=500, help="Fake transactions per account")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every upstream request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of upstream requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression for --compare")
+    args = parser.parse_args()
+
+    settings.user1_up_token = settings.user1_up_token or "bench-user1-token"
+    settings.user2_up_token = settings.user2_up_token or "bench-user2-token"
+    settings.shared_up_token = settings.shared_up_token or "bench-shared-token"
+    # Measure the service, not Up's rate limit, and keep background work out of the timings
+    settings.upstream_rate_limit = 0
+    settings.warmup_enabled = False
+    settings.sync_enabled = False
+    settings.store_path = None
+    settings.log_level = "ERROR"
+    logging.getLogger("up_bank_api").setLevel(logging.ERROR)
+
+    upstream = CountingApp(create_fake_up_app(
+        transactions_per_account=args.transactions,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=0,
+    ))
+    names = args.scenario or list(SCENARIOS)
+    print(
+        f"{args.requests} operations x {args.concurrency} concurrent; upstream latency {args.latency * 1e3:g} ms, "
+        f"errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%}\n"
+    )
+    print(f"{'scenario':<16} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'upstream':>9} {'heap KiB':>10}")
+    with BackgroundServer(upstream) as server:
+        settings.up_api_base_url = f"{server.url}/api/v1"
+        results = asyncio.run(benchmark(names, upstream, args))
+    print(f"\nmax RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
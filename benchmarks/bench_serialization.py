@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of per-request JSON work on a realistic 100-transaction page.
+
+Usage:
+    python -m benchmarks.bench_serialization [--iterations 300]
+
+Compares parsing upstream bytes with the standard library and orjson, and
+the response path with FastAPI's default re-validation and encoding
+against ``model_response``. Each route parses and validates the upstream
+page once, like the service does.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.models.up_models import TransactionsResponse
+from app.utils.serialization import json_loads, model_response, orjson
+from benchmarks.fake_up_server import FakeUpDataset
+
+
+def build_fixture(page_size: int = 100) -> bytes:
+    """Encode one page of fake Up transactions exactly as Up would send it."""
+    dataset = FakeUpDataset("https://api.up.com.au/api/v1", "bench-serialization", page_size)
+    page = {
+        "data": dataset.transactions[:page_size],
+        "links": {"prev": None, "next": "https://api.up.com.au/api/v1/transactions?page%5Bafter%5D=abc"},
+    }
+    return json.dumps(page).encode()
+
+
+def _time(label: str, func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<40} {per_call:>10.1f} us/op")
+    return per_call
+
+
+def build_app(body: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=TransactionsResponse)
+    async def default() -> Any:
+        return TransactionsResponse.model_validate(json.loads(body))
+
+    @app.get("/fast", response_model=TransactionsResponse)
+    async def fast() -> Any:
+        return model_response(TransactionsResponse.model_validate(json_loads(body)))
+
+    return app
+
+
+async def _time_route(client: httpx.AsyncClient, label: str, path: str, iterations: int) -> float:
+    await client.get(path)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        response = await client.get(path)
+        response.raise_for_status()
+    per_call = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<40} {per_call:>10.1f} us/request")
+    return per_call
+
+
+async def benchmark_routes(body: bytes, iterations: int) -> None:
+    transport = httpx.ASGITransport(app=build_app(body))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        default = await _time_route(client, "route: FastAPI default", "/default", iterations)
+        fast = await _time_route(client, "route: model_response", "/fast", iterations)
+    print(f"{'route speed-up':<40} {default / fast:>10.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    settings.fast_serialization = True
+    body = build_fixture()
+    print(f"fixture: 100 transactions, {len(body):,} bytes; orjson {'installed' if orjson else 'not installed'}\n")
+
+    _time("parse: json.loads", lambda: json.loads(body), args.iterations)
+    if orjson is not None:
+        _time("parse: orjson.loads", lambda: orjson.loads(body), args.iterations)
+    model = TransactionsResponse.model_validate(json.loads(body))
+    _time("validate: model_validate", lambda: TransactionsResponse.model_validate(json.loads(body)), args.iterations)
+    _time("encode: model_dump_json", lambda: model.model_dump_json(by_alias=True), args.iterations)
+    print()
+    asyncio.run(benchmark_routes(body, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
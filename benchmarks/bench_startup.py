@@ -0,0 +1,146 @@
+"""
+Startup cost of the API: import time and time to first response.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--top 15] [--budget-ms 1500]
+
+Runs ``python -X importtime -c "import main"`` and reports the import time
+spent in each top-level package and in each of the app's own modules. It
+then starts the production server (``python main.py --production``) against
+the fake Up Bank server several times and reports the median time from
+process start to the first successful response, to /ready, and the cost of
+the first /openapi.json request, with the docs enabled and disabled.
+``--budget-ms`` makes the command exit with status 1 when the median time
+to first response exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_up_server import BackgroundServer, create_fake_up_app, find_free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module imported by ``import main``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def report_imports(top: int) -> None:
+    modules = import_times()
+    total = next(cumulative for name, _, cumulative in modules if name == "main")
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    print(f"import main: {total / 1e3:.0f} ms\n")
+    print(f"{'package':<32}{'self ms':>10}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<32}{self_us / 1e3:>10.1f}")
+    print(f"\n{'app module':<40}{'self ms':>10}{'cumulative ms':>15}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda item: -item[1]):
+        if name == "main" or name.startswith("app."):
+            print(f"{name:<40}{self_us / 1e3:>10.1f}{cumulative_us / 1e3:>15.1f}")
+
+
+def _wait_for(client: httpx.Client, url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode}")
+        try:
+            if client.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{url} did not respond in time")
+
+
+def start_once(upstream_url: str, docs: bool) -> Dict[str, Optional[float]]:
+    """Start the server once and time its first responses, in milliseconds."""
+    port = find_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "UP_API_BASE_URL": upstream_url,
+            "USER1_UP_TOKEN": "bench-user1-token",
+            "USER2_UP_TOKEN": "bench-user2-token",
+            "API_HOST": "127.0.0.1",
+            "API_PORT": str(port),
+            "LOG_LEVEL": "WARNING",
+            "STORE_PATH": os.path.join(directory, "store.db"),
+            "DOCS_ENABLED": str(docs).lower(),
+            "UPSTREAM_RATE_LIMIT": "0",
+            "WARMUP_STAGGER_SECONDS": "0",
+        }
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "main.py", "--production", "--workers", "1"], cwd=ROOT, env=env)
+        try:
+            with httpx.Client(base_url=base_url, timeout=5.0) as client:
+                _wait_for(client, "/", process)
+                first_response = time.perf_counter() - started
+                _wait_for(client, "/ready", process)
+                ready = time.perf_counter() - started
+                openapi = None
+                if docs:
+                    openapi_started = time.perf_counter()
+                    client.get("/openapi.json").raise_for_status()
+                    openapi = time.perf_counter() - openapi_started
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return {
+        "first_response": first_response * 1e3,
+        "ready": ready * 1e3,
+        "openapi": openapi * 1e3 if openapi is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Server starts per configuration")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list in the import report")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the median time to first response exceeds this")
+    args = parser.parse_args()
+
+    report_imports(args.top)
+
+    print(f"\n{'server start (median of ' + str(args.runs) + ')':<32}{'first ms':>10}{'ready ms':>10}{'openapi ms':>12}")
+    first_responses = []
+    with BackgroundServer(create_fake_up_app()) as server:
+        for docs in (True, False):
+            runs = [start_once(f"{server.url}/api/v1", docs) for _ in range(args.runs)]
+            first = statistics.median(run["first_response"] for run in runs)
+            ready = statistics.median(run["ready"] for run in runs)
+            openapi = f"{statistics.median(run['openapi'] for run in runs):>12.1f}" if docs else f"{'-':>12}"
+            print(f"{'DOCS_ENABLED=' + str(docs).lower():<32}{first:>10.0f}{ready:>10.0f}{openapi}")
+            first_responses.append(first)
+
+    if args.budget_ms is not None and min(first_responses) > args.budget_ms:
+        print(f"\nOVER BUDGET: {min(first_responses):.0f} ms to first response > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Load test of the production run mode with one or more worker processes.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--duration 10] [--clients 4] [--concurrency 16]
+
+For each worker count, starts ``python main.py --production`` against the
+local fake Up Bank server with the shared SQLite cache backend, waits for
+/ready and drives cached account, category and transaction routes from
+``--clients`` load-generator processes. Reports throughput, latency
+percentiles and how many requests reached the fake upstream, which stays
+roughly flat as workers are added because they share one cache.
+
+Throughput only scales while there are idle CPU cores: the load generators
+run on the same machine, so leave cores free for them.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from benchmarks.fake_up_server import BackgroundServer, CountingApp, create_fake_up_app, find_free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def start_api(upstream_url: str, port: int, workers: int, directory: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "UP_API_BASE_URL": upstream_url,
+        "USER1_UP_TOKEN": "bench-user1-token",
+        "USER2_UP_TOKEN": "bench-user2-token",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(port),
+        "API_WORKERS": str(workers),
+        "LOG_LEVEL": "WARNING",
+        "CACHE_BACKEND": "sqlite",
+        "CACHE_PATH": os.path.join(directory, "cache.db"),
+        "STORE_PATH": os.path.join(directory, "store.db"),
+        "UPSTREAM_RATE_LIMIT": "0",
+        "WARMUP_STAGGER_SECONDS": "0",
+    }
+    return subprocess.Popen([sys.executable, "main.py", "--production"], cwd=ROOT, env=env)
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not become ready in time")
+
+
+def discover_paths(base_url: str) -> List[str]:
+    """Routes served from the shared cache: accounts, categories and settled transactions."""
+    paths = ["/api/v1/accounts/?account_type=user1", "/api/v1/categories/?account_type=user1"]
+    response = httpx.get(f"{base_url}/api/v1/transactions/?account_type=user1&page_size=50", timeout=30.0)
+    response.raise_for_status()
+    for txn in response.json()["data"]:
+        if txn["attributes"]["status"] == "SETTLED":
+            paths.append(f"/api/v1/transactions/{txn['id']}?account_type=user1")
+    return paths
+
+
+async def _generate_load(base_url: str, paths: List[str], duration: float, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def worker(offset: int) -> None:
+            index = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(paths[index % len(paths)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+                index += concurrency
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return latencies
+
+
+def load_client(base_url: str, paths: List[str], duration: float, concurrency: int) -> List[float]:
+    return asyncio.run(_generate_load(base_url, paths, duration, concurrency))
+
+
+def benchmark(upstream: CountingApp, upstream_url: str, workers: int, args: argparse.Namespace) -> None:
+    port = find_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as directory:
+        process = start_api(upstream_url, port, workers, directory)
+        try:
+            wait_until_ready(base_url, process)
+            paths = discover_paths(base_url)
+            # One pass so every worker process has its connections and caches in place
+            load_client(base_url, paths, 1.0, args.concurrency)
+            before = upstream.requests
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.starmap(
+                    load_client, [(base_url, paths, args.duration, args.concurrency)] * args.clients
+                )
+            upstream_requests = upstream.requests - before
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    latencies = sorted(latency for result in results for latency in result)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{workers:>7} {len(latencies) / args.duration:>10.0f} "
+        f"{quantiles[49] * 1e3:>8.2f} {quantiles[94] * 1e3:>8.2f} {quantiles[98] * 1e3:>8.2f} "
+        f"{upstream_requests:>9}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=4, help="Load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per load generator")
+    args = parser.parse_args()
+
+    upstream = CountingApp(create_fake_up_app())
+    print(f"{os.cpu_count()} CPU(s); {args.clients} load generators x {args.concurrency} concurrent requests\n")
+    print(f"{'workers':>7} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'upstream':>9}")
+    with BackgroundServer(upstream) as server:
+        for workers in (int(value) for value in args.workers.split(",")):
+            benchmark(upstream, f"{server.url}/api/v1", workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+"""
+A fake Up Bank API server for benchmarks.
+
+Serves realistic JSON:API payloads for accounts, categories and cursor
+paginated transactions so the service can be exercised without touching
+api.up.com.au. Every bearer token gets its own deterministic dataset.
+Latency, server errors and 429 rate limiting can be injected to exercise
+the upstream scheduler under realistic conditions.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+
+CATEGORY_TREE = {
+    "good-life": ["restaurants-and-cafes", "takeaway", "pubs-and-bars", "hobbies"],
+    "home": ["groceries", "rent-and-mortgage", "utilities", "home-maintenance-and-improvements"],
+    "personal": ["health-and-medical", "clothing-and-accessories", "gifts-and-charity"],
+    "transport": ["fuel", "public-transport", "parking", "car-insurance-and-maintenance"],
+}
+
+MERCHANTS = [
+    "Woolworths", "Coles", "Aldi", "Bakers Delight", "Uber Eats", "Menulog", "Transport for NSW",
+    "Ampol", "BP", "Chemist Warehouse", "JB Hi-Fi", "Bunnings", "Kmart", "Spotify", "Netflix",
+    "The Local Pub", "Cafe Sydney", "Officeworks", "AGL Energy", "Telstra",
+]
+
+
+def _category_name(category_id: str) -> str:
+    return category_id.replace("-and-", " & ").replace("-", " ").title()
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat(timespec="seconds")
+
+
+def _money(value_in_base_units: int, currency_code: str = "AUD") -> Dict[str, Any]:
+    return {
+        "currencyCode": currency_code,
+        "value": f"{value_in_base_units / 100:.2f}",
+        "valueInBaseUnits": value_in_base_units,
+    }
+
+
+class FakeUpDataset:
+    """Deterministic accounts and transactions for a single token."""
+
+    def __init__(self, base_url: str, token: str, transactions_per_account: int = 500, seed: Optional[int] = None):
+        self.base_url = base_url
+        rng = random.Random(seed if seed is not None else token)
+        now = datetime(2026, 1, 1, tzinfo=timezone(timedelta(hours=10)))
+
+        self.accounts: List[Dict[str, Any]] = []
+        self.transactions: List[Dict[str, Any]] = []
+        for index, (name, kind) in enumerate([("Spending", "TRANSACTIONAL"), ("Savings", "SAVER")]):
+            account_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            balance = rng.randint(10_000, 5_000_000)
+            self.accounts.append(self._account(account_id, name, kind, balance))
+            for n in range(transactions_per_account):
+                created_at = now - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60))
+                transaction_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                self.transactions.append(self._transaction(rng, transaction_id, account_id, created_at, n < 3))
+
+        self.transactions.sort(key=lambda txn: (txn["attributes"]["createdAt"], txn["id"]), reverse=True)
+        self.by_id = {txn["id"]: txn for txn in self.transactions}
+        self.webhooks: Dict[str, Dict[str, Any]] = {}
+        self.rng = rng
+
+    def add_transaction(self) -> Dict[str, Any]:
+        """Add a new HELD transaction, a minute newer than any other, to the first account."""
+        newest = datetime.fromisoformat(self.transactions[0]["attributes"]["createdAt"])
+        transaction_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+        txn = self._transaction(self.rng, transaction_id, self.accounts[0]["id"], newest + timedelta(minutes=1), True)
+        self.transactions.insert(0, txn)
+        self.by_id[transaction_id] = txn
+        return txn
+
+    def settle(self, transaction_id: str) -> None:
+        """Settle a HELD transaction a day after it was created."""
+        attributes = self.by_id[transaction_id]["attributes"]
+        attributes["status"] = "SETTLED"
+        attributes["holdInfo"] = None
+        attributes["settledAt"] = _iso(datetime.fromisoformat(attributes["createdAt"]) + timedelta(days=1))
+
+    def _account(self, account_id: str, name: str, kind: str, balance: int) -> Dict[str, Any]:
+        return {
+            "type": "accounts",
+            "id": account_id,
+            "attributes": {
+                "displayName": name,
+                "accountType": kind,
+                "ownershipType": "INDIVIDUAL",
+                "balance": _money(balance),
+                "createdAt": "2020-01-01T09:00:00+10:00",
+            },
+            "relationships": {
+                "transactions": {"links": {"related": f"{self.base_url}/accounts/{account_id}/transactions"}},
+            },
+            "links": {"self": f"{self.base_url}/accounts/{account_id}"},
+        }
+
+    def _transaction(
+        self, rng: random.Random, transaction_id: str, account_id: str, created_at: datetime, held: bool
+    ) -> Dict[str, Any]:
+        parent = rng.choice(list(CATEGORY_TREE))
+        category = rng.choice(CATEGORY_TREE[parent])
+        merchant = rng.choice(MERCHANTS)
+        amount = -rng.randint(100, 25_000) if rng.random() < 0.9 else rng.randint(1_000, 500_000)
+        foreign = _money(round(amount / 1.6), "USD") if rng.random() < 0.05 else None
+        round_up = {"amount": _money(-rng.randint(1, 99)), "boostPortion": None} if amount < 0 and rng.random() < 0.3 else None
+        tags = [{"type": "tags", "id": tag} for tag in rng.sample(["Holiday", "Work", "Shared", "Reimbursable"], rng.randint(0, 2))]
+        return {
+            "type": "transactions",
+            "id": transaction_id,
+            "attributes": {
+                "status": "HELD" if held else "SETTLED",
+                "rawText": f"{merchant.upper()} SYDNEY NSW",
+                "description": merchant,
+                "message": None,
+                "isCategorizable": True,
+                "holdInfo": {"amount": _money(amount), "foreignAmount": foreign} if held else None,
+                "roundUp": round_up,
+                "cashback": None,
+                "amount": _money(amount),
+                "foreignAmount": foreign,
+                "cardPurchaseMethod": {"method": "CARD_ON_FILE", "cardNumberSuffix": "0001"},
+                "settledAt": None if held else _iso(created_at + timedelta(days=1)),
+                "createdAt": _iso(created_at),
+                "transactionType": "Purchase",
+                "note": None,
+                "performingCustomer": {"displayName": "Bobby"},
+                "deepLinkURL": f"up://transaction/{transaction_id}",
+            },
+            "relationships": {
+                "account": {
+                    "data": {"type": "accounts", "id": account_id},
+                    "links": {"related": f"{self.base_url}/accounts/{account_id}"},
+                },
+                "transferAccount": {"data": None},
+                "category": {
+                    "data": {"type": "categories", "id": category},
+                    "links": {
+                        "self": f"{self.base_url}/transactions/{transaction_id}/relationships/category",
+                        "related": f"{self.base_url}/categories/{category}",
+                    },
+                },
+                "parentCategory": {
+                    "data": {"type": "categories", "id": parent},
+                    "links": {"related": f"{self.base_url}/categories/{parent}"},
+                },
+                "tags": {
+                    "data": tags,
+                    "links": {"self": f"{self.base_url}/transactions/{transaction_id}/relationships/tags"},
+                },
+                "attachment": {"data": None},
+            },
+            "links": {"self": f"{self.base_url}/transactions/{transaction_id}"},
+        }
+
+
+def _category(base_url: str, category_id: str, parent: Optional[str]) -> Dict[str, Any]:
+    children = CATEGORY_TREE.get(category_id, [])
+    return {
+        "type": "categories",
+        "id": category_id,
+        "attributes": {"name": _category_name(category_id)},
+        "relationships": {
+            "parent": {
+                "data": {"type": "categories", "id": parent} if parent else None,
+                "links": {"related": f"{base_url}/categories/{parent}"} if parent else None,
+            },
+            "children": {
+                "data": [{"type": "categories", "id": child} for child in children],
+                "links": {"related": f"{base_url}/categories?filter[parent]={category_id}"},
+            },
+        },
+        "links": {"self": f"{base_url}/categories/{category_id}"},
+    }
+
+
+def _error(status_code: int, title: str, detail: str) -> JSONResponse:
+    return JSONResponse(
+        {"errors": [{"status": str(status_code), "title": title, "detail": detail}]},
+        status_code=status_code,
+    )
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int:
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
+def create_fake_up_app(
+    transactions_per_account: int = 500,
+    etags: bool = False,
+    gzip: bool = True,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float = 1.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Create a FastAPI app that mimics the subset of the Up Bank API used by the service.
+
+    With ``etags`` the app also sends ETags on GET responses and answers a
+    matching ``If-None-Match`` with 304, to exercise conditional requests.
+    With ``gzip`` responses are gzip-compressed for clients that accept it.
+
+    Every request is delayed by ``latency`` seconds. A ``error_rate``
+    fraction of requests fails with 503 and a ``rate_limit_rate`` fraction
+    with 429 and ``Retry-After: retry_after``; ``seed`` makes the choice
+    repeatable.
+    """
+    app = FastAPI(title="Fake Up Bank API")
+    if gzip:
+        app.add_middleware(GZipMiddleware, minimum_size=1024)
+    datasets: Dict[str, FakeUpDataset] = {}
+    # Exposed so benchmarks can change a token's data while the server runs
+    app.state.datasets = datasets
+    faults = random.Random(seed)
+
+    def dataset_for(request: Request) -> Optional[FakeUpDataset]:
+        authorization = request.headers.get("authorization", "")
+        if not authorization.startswith("Bearer "):
+            return None
+        token = authorization[len("Bearer "):]
+        if token not in datasets:
+            base_url = str(request.base_url).rstrip("/") + "/api/v1"
+            datasets[token] = FakeUpDataset(base_url, token, transactions_per_account)
+        return datasets[token]
+
+    def paginate(request: Request, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        page_size = int(request.query_params.get("page[size]", 20))
+        offset = _decode_cursor(request.query_params["page[after]"]) if "page[after]" in request.query_params else 0
+        page = rows[offset:offset + page_size]
+        links: Dict[str, Any] = {"prev": None, "next": None}
+        if offset + page_size < len(rows):
+            links["next"] = str(request.url.include_query_params(**{"page[after]": _encode_cursor(offset + page_size)}))
+        return {"data": page, "links": links}
+
+    def filter_transactions(request: Request, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        query = request.query_params
+        since = datetime.fromisoformat(query["filter[since]"]) if "filter[since]" in query else None
+        until = datetime.fromisoformat(query["filter[until]"]) if "filter[until]" in query else None
+        if since or until or any(name in query for name in ("filter[status]", "filter[category]", "filter[tag]")):
+            filtered = []
+            for txn in rows:
+                created_at = datetime.fromisoformat(txn["attributes"]["createdAt"])
+                if since and created_at < since:
+                    continue
+                if until and created_at >= until:
+                    continue
+                if "filter[status]" in query and txn["attributes"]["status"] != query["filter[status]"]:
+                    continue
+                category = txn["relationships"]["category"]["data"]
+                if "filter[category]" in query and (category or {}).get("id") != query["filter[category]"]:
+                    continue
+                tags = {tag["id"] for tag in txn["relationships"]["tags"]["data"]}
+                if "filter[tag]" in query and query["filter[tag]"] not in tags:
+                    continue
+                filtered.append(txn)
+            rows = filtered
+        return rows
+
+    @app.middleware("http")
+    async def require_token(request: Request, call_next):
+        if dataset_for(request) is None:
+            return _error(401, "Not Authorized", "The request was not authenticated because no valid credential was found.")
+        return await call_next(request)
+
+    if latency > 0 or error_rate > 0 or rate_limit_rate > 0:
+        @app.middleware("http")
+        async def inject_faults(request: Request, call_next):
+            if latency > 0:
+                await asyncio.sleep(latency)
+            roll = faults.random()
+            if roll < rate_limit_rate:
+                response = _error(429, "Too Many Requests", "You have exceeded the rate limit.")
+                response.headers["Retry-After"] = f"{retry_after:g}"
+                response.headers["X-RateLimit-Remaining"] = "0"
+                return response
+            if roll < rate_limit_rate + error_rate:
+                return _error(503, "Service Unavailable", "The service is temporarily unavailable.")
+            return await call_next(request)
+
+    if etags:
+        @app.middleware("http")
+        async def conditional_get(request: Request, call_next):
+            response = await call_next(request)
+            if request.method != "GET" or response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(body, media_type=response.media_type, headers={"ETag": etag})
+
+    @app.get("/api/v1/accounts")
+    async def accounts(request: Request):
+        return paginate(request, dataset_for(request).accounts)
+
+    @app.get("/api/v1/accounts/{account_id}")
+    async def account(request: Request, account_id: str):
+        for item in dataset_for(request).accounts:
+            if item["id"] == account_id:
+                return {"data": item}
+        return _error(404, "Not Found", "The resource could not be found.")
+
+    @app.get("/api/v1/accounts/{account_id}/transactions")
+    async def account_transactions(request: Request, account_id: str):
+        rows = [
+            txn for txn in dataset_for(request).transactions
+            if txn["relationships"]["account"]["data"]["id"] == account_id
+        ]
+        return paginate(request, filter_transactions(request, rows))
+
+    @app.get("/api/v1/transactions")
+    async def transactions(request: Request):
+        return paginate(request, filter_transactions(request, dataset_for(request).transactions))
+
+    @app.get("/api/v1/transactions/{transaction_id}")
+    async def transaction(request: Request, transaction_id: str):
+        txn = dataset_for(request).by_id.get(transaction_id)
+        if txn is None:
+            return _error(404, "Not Found", "The resource could not be found.")
+        return {"data": txn}
+
+    @app.get("/api/v1/categories")
+    async def categories(request: Request):
+        base_url = str(request.base_url).rstrip("/") + "/api/v1"
+        parent_filter = request.query_params.get("filter[parent]")
+        items = []
+        for parent, children in CATEGORY_TREE.items():
+            if parent_filter is None:
+                items.append(_category(base_url, parent, None))
+            if parent_filter in (None, parent):
+                items.extend(_category(base_url, child, parent) for child in children)
+        return {"data": items}
+
+    @app.get("/api/v1/categories/{category_id}")
+    async def category(request: Request, category_id: str):
+        base_url = str(request.base_url).rstrip("/") + "/api/v1"
+        for parent, children in CATEGORY_TREE.items():
+            if category_id == parent:
+                return {"data": _category(base_url, parent, None)}
+            if category_id in children:
+                return {"data": _category(base_url, category_id, parent)}
+        return _error(404, "Not Found", "The resource could not be found.")
+
+    @app.get("/api/v1/webhooks")
+    async def webhooks(request: Request):
+        return paginate(request, list(dataset_for(request).webhooks.values()))
+
+    @app.post("/api/v1/webhooks")
+    async def create_webhook(request: Request):
+        attributes = (await request.json())["data"]["attributes"]
+        webhook_id = str(uuid.uuid4())
+        webhook = {
+            "type": "webhooks",
+            "id": webhook_id,
+            "attributes": {
+                "url": attributes["url"],
+                "description": attributes.get("description"),
+                "secretKey": secrets.token_hex(32),
+                "createdAt": _iso(datetime.now(timezone.utc)),
+            },
+            "relationships": {"logs": {"links": {"related": f"{request.url}/{webhook_id}/logs"}}},
+            "links": {"self": f"{request.url}/{webhook_id}"},
+        }
+        dataset_for(request).webhooks[webhook_id] = webhook
+        return JSONResponse({"data": webhook}, status_code=201)
+
+    @app.get("/api/v1/webhooks/{webhook_id}")
+    async def webhook(request: Request, webhook_id: str):
+        webhook = dataset_for(request).webhooks.get(webhook_id)
+        if webhook is None:
+            return _error(404, "Not Found", "The resource could not be found.")
+        # Up only reveals the secret key when the webhook is created
+        return {"data": {**webhook, "attributes": {**webhook["attributes"], "secretKey": None}}}
+
+    @app.delete("/api/v1/webhooks/{webhook_id}")
+    async def delete_webhook(request: Request, webhook_id: str):
+        if dataset_for(request).webhooks.pop(webhook_id, None) is None:
+            return _error(404, "Not Found", "The resource could not be found.")
+        return Response(status_code=204)
+
+    @app.post("/api/v1/webhooks/{webhook_id}/ping")
+    async def ping_webhook(request: Request, webhook_id: str):
+        webhook = dataset_for(request).webhooks.get(webhook_id)
+        if webhook is None:
+            return _error(404, "Not Found", "The resource could not be found.")
+        event = build_webhook_event("PING", webhook_id)
+        await deliver_webhook_event(webhook["attributes"]["url"], webhook["attributes"]["secretKey"], event)
+        return JSONResponse(event, status_code=201)
+
+    return app
+
+
+def build_webhook_event(event_type: str, webhook_id: str, transaction_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build a webhook event document shaped like the ones Up delivers."""
+    relationships: Dict[str, Any] = {"webhook": {"data": {"type": "webhooks", "id": webhook_id}}}
+    if transaction_id:
+        relationships["transaction"] = {"data": {"type": "transactions", "id": transaction_id}}
+    return {
+        "data": {
+            "type": "webhook-events",
+            "id": str(uuid.uuid4()),
+            "attributes": {"eventType": event_type, "createdAt": _iso(datetime.now(timezone.utc))},
+            "relationships": relationships,
+        }
+    }
+
+
+async def deliver_webhook_event(url: str, secret_key: str, event: Dict[str, Any]) -> httpx.Response:
+    """
+    Act as a fake webhook sender: sign an event like Up does and POST it to ``url``.
+
+    The signature is the hex HMAC-SHA256 of the raw body keyed by the
+    webhook's secret key, sent in ``X-Up-Authenticity-Signature``.
+    """
+    body = json.dumps(event).encode()
+    signature = hmac.new(secret_key.encode(), body, hashlib.sha256).hexdigest()
+    async with httpx.AsyncClient() as client:
+        return await client.post(
+            url,
+            content=body,
+            headers={"Content-Type": "application/json", "X-Up-Authenticity-Signature": signature},
+        )
+
+
+class CountingApp:
+    """ASGI wrapper counting the requests that reach the wrapped app."""
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.requests = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            self.requests += 1
+        await self.app(scope, receive, send)
+
+
+def find_free_port() -> int:
+    """Ask the OS for an unused TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a background thread."""
+
+    def __init__(self, app: Any, port: Optional[int] = None):
+        self.port = port or find_free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "BackgroundServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.server.should_exit = True
+        self.thread.join()
@@ -0,0 +1,85 @@
+"""
+Export transactions to a flat CSV, Parquet or Arrow IPC file.
+
+Usage:
+    python export.py user1 [--format parquet] [--output history.parquet] [--since 2024-01-01]
+        [--until 2025-01-01] [--account-id ID] [--source local] [--batch-size 10000]
+
+Reads from Up Bank with the account type's token, or from the local store
+(``STORE_PATH``) with ``--source local``, and writes the file in batches so
+memory use does not grow with the length of the history. ``--output -``
+writes to standard output.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import BinaryIO
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.api_models import ExportFormat, TransactionSource
+from app.services import export
+from app.services.http_client import UpBankClientPool
+from app.services.transaction_store import TransactionStore
+from app.services.up_api_service import UpBankApiService
+from app.utils.helpers import AccountType
+
+logger = logging.getLogger("up_bank_api")
+
+
+async def run(args: argparse.Namespace, output: BinaryIO) -> int:
+    """Write the export to ``output``, returning how many bytes were written."""
+    api_service = UpBankApiService(UpBankClientPool())
+    store = None
+    try:
+        encoder = export.create_encoder(args.format)
+        if args.source == TransactionSource.LOCAL:
+            if not settings.store_path:
+                raise HTTPException(status_code=503, detail="The local transaction store is disabled. Set STORE_PATH to enable it.")
+            store = TransactionStore(settings.store_path)
+            pages = export.local_pages(store, args.account_type, args.account_id, args.since, args.until)
+        else:
+            pages = export.upstream_pages(api_service, args.account_type, args.account_id, args.since, args.until)
+        written = 0
+        async for chunk in export.encode_export(pages, args.format, args.batch_size, encoder):
+            output.write(chunk)
+            written += len(chunk)
+        return written
+    finally:
+        if store is not None:
+            store.close()
+        await api_service.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("account_type", type=AccountType, metavar="{user1,user2,shared}", help="Account type to export")
+    parser.add_argument("--format", type=ExportFormat, metavar="{csv,parquet,arrow}", default=ExportFormat.CSV)
+    parser.add_argument("--output", help="File to write, or - for standard output (default: transactions-<account type>.<ext>)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only transactions created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only transactions created before this time")
+    parser.add_argument("--account-id", help="Only transactions for this account")
+    parser.add_argument("--source", type=TransactionSource, metavar="{upstream,local}", default=TransactionSource.UPSTREAM)
+    parser.add_argument("--batch-size", type=int, help="Rows per row group or record batch (default: EXPORT_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    output_path = args.output or f"transactions-{args.account_type.value}.{export.FILE_EXTENSIONS[args.format]}"
+    try:
+        if output_path == "-":
+            written = asyncio.run(run(args, sys.stdout.buffer))
+        else:
+            with open(output_path, "wb") as output:
+                written = asyncio.run(run(args, output))
+    except (HTTPException, ValueError) as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"Export failed: {detail}", file=sys.stderr)
+        sys.exit(1)
+    if output_path != "-":
+        print(f"Wrote {written:,} bytes to {output_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
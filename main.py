@@ -1,13 +1,28 @@
+import argparse
+import importlib.util
 import logging
 import os
 from contextlib import asynccontextmanager
+from typing import Optional
 
-import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.api.router import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, registry
+from app.services.analytics import AnalyticsService
+from app.services.cache import CacheBackend, MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+from app.services.category_index import CategoryIndex
+from app.services.http_client import UpBankClientPool
+from app.services.live_feed import LiveFeed
+from app.services.transaction_store import TransactionStore
+from app.services.transaction_sync import TransactionSyncService
+from app.services.up_api_service import UpBankApiService
+from app.services.warmup import CacheWarmer
+from app.services.webhooks import WebhookProcessor
 
 # Configure logging
 logging.basicConfig(
@@ -15,6 +30,8 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger("up_bank_api")
+# httpx logs every request at INFO; request counts and latencies are in /metrics instead
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 def check_env_variables():
@@ -41,6 +58,13 @@ def check_env_variables():
             )
 
 
+def create_cache_backend() -> CacheBackend:
+    """Create the response cache backend selected by ``CACHE_BACKEND``."""
+    if settings.cache_backend == "sqlite":
+        return SQLiteCacheBackend(settings.cache_path, settings.cache_max_entries)
+    return MemoryCacheBackend(settings.cache_max_entries)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -49,20 +73,60 @@ async def lifespan(app: FastAPI):
     # Startup logic
     logger.info("Starting Up Bank Local API...")
     check_env_variables()
+    cache = ResponseCache(create_cache_backend()) if settings.cache_enabled else None
+    app.state.up_api_service = UpBankApiService(UpBankClientPool(), cache)
+    registry.set_collector("up_api_service", app.state.up_api_service.collect_metrics)
+    app.state.category_index = CategoryIndex(app.state.up_api_service)
+    app.state.transaction_store = TransactionStore(settings.store_path) if settings.store_path else None
+    app.state.live_feed = LiveFeed(app.state.up_api_service)
+    registry.set_collector("live_feed", app.state.live_feed.collect_metrics)
+    app.state.webhook_processor = WebhookProcessor(
+        app.state.up_api_service, app.state.transaction_store, app.state.live_feed
+    )
+    app.state.sync_service = None
+    app.state.analytics_service = None
+    if app.state.transaction_store is not None:
+        app.state.analytics_service = AnalyticsService(app.state.transaction_store)
+        app.state.sync_service = TransactionSyncService(app.state.up_api_service, app.state.transaction_store)
+        if settings.sync_enabled:
+            app.state.sync_service.start()
+    app.state.cache_warmer = CacheWarmer(
+        app.state.up_api_service, app.state.transaction_store, app.state.analytics_service, app.state.category_index
+    )
+    if settings.warmup_enabled:
+        app.state.cache_warmer.start()
+    else:
+        app.state.cache_warmer.ready = True
     yield
     # Shutdown logic
     logger.info("Shutting down Up Bank Local API...")
+    await app.state.cache_warmer.stop()
+    await app.state.live_feed.stop()
+    registry.set_collector("live_feed", None)
+    if app.state.sync_service is not None:
+        await app.state.sync_service.stop()
+    if app.state.transaction_store is not None:
+        app.state.transaction_store.close()
+    registry.set_collector("up_api_service", None)
+    await app.state.up_api_service.aclose()
+    if cache is not None:
+        cache.backend.close()
 
 
 def create_application() -> FastAPI:
     """
     Create the FastAPI application with settings and routes.
     """
+    # The OpenAPI schema is only built when /docs or /openapi.json is first requested
+    docs = settings.docs_enabled
     application = FastAPI(
         title="Up Bank Local API",
         description="A local API wrapper for the Up Bank REST API",
         version="0.1.0",
         lifespan=lifespan,
+        openapi_url="/openapi.json" if docs else None,
+        docs_url="/docs" if docs else None,
+        redoc_url="/redoc" if docs else None,
     )
 
     # Set up CORS
@@ -74,6 +138,13 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if settings.compression_enabled:
+        application.add_middleware(CompressionMiddleware)
+
+    # Added last so it wraps everything else and sees the bytes actually sent
+    if settings.metrics_enabled:
+        application.add_middleware(MetricsMiddleware)
+
     # Include API router
     application.include_router(api_router, prefix="/api/v1")
 
@@ -98,13 +169,35 @@ async def root():
         "name": "Up Bank Local API",
         "version": "0.1.0",
         "status": "running",
-        "documentation": "/docs",
+        "documentation": "/docs" if settings.docs_enabled else None,
         "tokens_status": token_status,
     }
 
 
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness probe: 503 until the first cache warm-up has finished."""
+    warmer = app.state.cache_warmer
+    return JSONResponse(
+        {
+            "status": "ready" if warmer.ready else "warming",
+            "warmup": {account_type.value: result for account_type, result in warmer.results.items()},
+        },
+        status_code=200 if warmer.ready else 503,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for requests, upstream calls, the cache and the schedulers."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 def main():
-    """Entry point for the application."""
+    """Development entry point: a single process that reloads on code changes."""
+    # Imported here so loading the app under another server (or in tests) does not pay for it
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host=settings.api_host,
@@ -113,5 +206,41 @@ def main():
     )
 
 
+def serve(workers: Optional[int] = None):
+    """
+    Production entry point: several worker processes and no reloading.
+
+    uvloop and httptools are used when installed (``pip install -e ".[server]"``).
+    """
+    workers = workers or settings.api_workers
+    if workers > 1 and settings.cache_enabled and settings.cache_backend == "memory":
+        logger.warning(
+            f"Running {workers} workers with the memory cache backend; each keeps its own cache. "
+            f"Set CACHE_BACKEND=sqlite to share it."
+        )
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(f"Serving with {workers} worker(s), {loop} event loop and {http} HTTP parser")
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        reload=False,
+        log_level=settings.log_level.lower(),
+    )
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the Up Bank Local API.")
+    parser.add_argument("--production", action="store_true", help="Run worker processes without reloading")
+    parser.add_argument("--workers", type=int, help="Worker processes in production mode (default: API_WORKERS)")
+    args = parser.parse_args()
+    if args.production:
+        serve(args.workers)
+    else:
+        main()